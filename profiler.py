@@ -25,12 +25,15 @@ Simple script to run the profiler and generate a log file.
 Change python to whichever version you are using.
 """
 
+# Comma separated modules, classes or functions to line profile, relative to src
+PROFILED_MODULES = "main.py,camera/Camera.py,detector/HUSTDetector.py"
+
 def run_profiler():
     # Change directory to src
     os.chdir("src")
 
-    # Run the profiler
-    subprocess.run(["python", "-m", "kernprof", "-lvr", "main.py"])
+    # Run the profiler, there are no @profile decorators in the code so tell kernprof what to profile
+    subprocess.run(["python", "-m", "kernprof", "-lvr", "--prof-mod", PROFILED_MODULES, "main.py"])
     
     stats = load_stats("main.py.lprof")
     
@@ -0,0 +1,257 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import hashlib
+import json
+import math
+import os
+from dataclasses import asdict, dataclass
+from typing import Tuple
+
+import numpy as np
+
+from util import Point3D
+
+# Bumped whenever the way tables are computed changes, so old cached tables aren't reused
+TABLE_FORMAT = 1
+
+
+@dataclass(frozen=True)
+class BallisticConfig:
+    """
+    The projectile and the area the table covers. Defaults are for the 17mm projectile.
+
+    args:
+        muzzle_velocity_mps (float): Speed the projectile leaves the barrel at.
+        mass_kg, diameter_m, drag_coefficient (float): Of the projectile.
+        air_density (float): In kg/m^3.
+        max_distance_m (float): Furthest horizontal distance in the table.
+        max_height_m (float): Highest (and lowest) target relative to the barrel in the table.
+        grid_step_m (float): Spacing of the table in distance and height.
+        max_pitch_deg (float): Steepest the barrel can point, up or down.
+        time_step_s (float): Integration step of the simulated trajectories.
+    """
+
+    muzzle_velocity_mps: float = 25.0
+    mass_kg: float = 0.0032
+    diameter_m: float = 0.0168
+    drag_coefficient: float = 0.47
+    air_density: float = 1.169
+    gravity_mps2: float = 9.81
+    max_distance_m: float = 12.0
+    max_height_m: float = 3.0
+    grid_step_m: float = 0.02
+    max_pitch_deg: float = 40.0
+    time_step_s: float = 0.0005
+
+    @property
+    def drag_factor(self) -> float:
+        """
+        k in a_drag = -k |v| v.
+        """
+        area = np.pi * (self.diameter_m / 2) ** 2
+        return 0.5 * self.air_density * self.drag_coefficient * area / self.mass_kg
+
+
+def simulateTrajectories(config: BallisticConfig, pitches: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Flies a projectile at every pitch (radians) at once with a midpoint integrator, until all of them are past
+    max_distance_m or have dropped below the table.
+
+    returns:
+        positions: steps x pitches x 2 of (distance, height)
+        times: time of each step
+    """
+    k = config.drag_factor
+    gravity = np.array([0.0, -config.gravity_mps2])
+    dt = config.time_step_s
+
+    def acceleration(velocity):
+        return gravity - k * np.linalg.norm(velocity, axis=1, keepdims=True) * velocity
+
+    position = np.zeros((len(pitches), 2))
+    velocity = config.muzzle_velocity_mps * np.stack([np.cos(pitches), np.sin(pitches)], axis=1)
+    positions = [position]
+
+    while True:
+        half_velocity = velocity + acceleration(velocity) * dt / 2
+        position = position + half_velocity * dt
+        velocity = velocity + acceleration(half_velocity) * dt
+        positions.append(position)
+
+        done = (position[:, 0] > config.max_distance_m) | (position[:, 1] < -2 * config.max_height_m)
+        done |= ~np.isfinite(position[:, 0])
+        # Drag never stops the projectile completely, but it can run out of speed long before reaching the end
+        if done.all() or (velocity[:, 0] < 1e-3).all():
+            break
+
+    positions = np.array(positions)
+    return positions, np.arange(len(positions)) * dt
+
+
+class BallisticTable:
+    """
+    Turns target positions into the barrel pitch, yaw and time of flight needed to hit them, with bullet drop and air
+    drag accounted for.
+
+    Solving the trajectory for every target would take too long in the loop, so it's solved once for a dense grid of
+    horizontal distances and heights (see BallisticConfig) and looked up with bilinear interpolation at runtime, aim
+    for one target and lookup for many at once. Tables take a moment to compute and are cached on disk, keyed by
+    the config.
+
+    Of the two pitches that hit a point the lower, flatter one is used. Points out of range get NaN.
+    """
+
+    def __init__(self, config: BallisticConfig, pitch: np.ndarray, time_of_flight: np.ndarray):
+        self.config = config
+        # distance x height
+        self.pitch = pitch
+        self.time_of_flight = time_of_flight
+        self.distances = np.arange(pitch.shape[0]) * config.grid_step_m
+        self.heights = np.arange(pitch.shape[1]) * config.grid_step_m - config.max_height_m
+        # Python lists for aim, indexing numpy arrays one element at a time is slow
+        self.pitch_rows = pitch.tolist()
+        self.time_of_flight_rows = time_of_flight.tolist()
+
+    @classmethod
+    def compute(cls, config: BallisticConfig) -> "BallisticTable":
+        pitches = np.radians(np.linspace(-config.max_pitch_deg, config.max_pitch_deg, 1601))
+        positions, times = simulateTrajectories(config, pitches)
+
+        step = config.grid_step_m
+        distances = np.arange(int(round(config.max_distance_m / step)) + 1) * step
+        heights = np.arange(int(round(2 * config.max_height_m / step)) + 1) * step - config.max_height_m
+
+        # Height and time of each trajectory as it passes each distance, the distance along a trajectory always grows
+        height_at = np.full((len(pitches), len(distances)), np.nan)
+        time_at = np.full((len(pitches), len(distances)), np.nan)
+        for i in range(len(pitches)):
+            x = positions[:, i, 0]
+            reached = distances <= x[-1]
+            height_at[i, reached] = np.interp(distances[reached], x, positions[:, i, 1])
+            time_at[i, reached] = np.interp(distances[reached], x, times)
+
+        pitch = np.full((len(distances), len(heights)), np.nan)
+        time_of_flight = np.full((len(distances), len(heights)), np.nan)
+        for j in range(len(distances)):
+            column = height_at[:, j]
+            valid = ~np.isnan(column)
+            if not valid.any():
+                continue
+
+            # Up to the pitch reaching the highest point at this distance, height only grows with pitch (flat arc)
+            top = np.nanargmax(column)
+            low_arc = np.arange(len(pitches)) <= top
+            arc = valid & low_arc
+            arc_heights = column[arc]
+            if len(arc_heights) < 2:
+                continue
+
+            reachable = (heights >= arc_heights[0]) & (heights <= arc_heights[-1])
+            pitch[j, reachable] = np.interp(heights[reachable], arc_heights, pitches[arc])
+            time_of_flight[j, reachable] = np.interp(pitch[j, reachable], pitches[arc], time_at[arc, j])
+
+        return cls(config, pitch, time_of_flight)
+
+    @classmethod
+    def load(cls, config: BallisticConfig, cache_directory: str = None) -> "BallisticTable":
+        """
+        Loads the table for config from cache_directory, computing and saving it first if it isn't there.
+        """
+        if cache_directory is None:
+            return cls.compute(config)
+
+        key = json.dumps({"format": TABLE_FORMAT, **asdict(config)}, sort_keys=True)
+        path = os.path.join(cache_directory, f"ballistics.{hashlib.sha1(key.encode()).hexdigest()[:12]}.npz")
+
+        if os.path.exists(path):
+            try:
+                with np.load(path) as data:
+                    return cls(config, data["pitch"], data["time_of_flight"])
+            except Exception as e:
+                print(f"Cached ballistic table {path} failed to load ({e}), recomputing it")
+
+        table = cls.compute(config)
+        os.makedirs(cache_directory, exist_ok=True)
+        # Written under a temporary name first, so a cut off write is never mistaken for a table
+        temporary_path = path + ".tmp.npz"
+        np.savez(temporary_path, pitch=table.pitch, time_of_flight=table.time_of_flight)
+        os.replace(temporary_path, path)
+        print(f"Saved ballistic table to {path}")
+        return table
+
+    def lookup(self, positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Aims at several targets at once.
+
+        args:
+            positions: N x 3 target positions relative to the barrel, in meters (x forwards, y left, z up).
+
+        returns:
+            pitch (radians, up is positive), yaw (radians, left is positive) and time of flight (seconds), each of
+            length N. NaN for targets out of range.
+        """
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        distance = np.hypot(positions[:, 0], positions[:, 1])
+        yaw = np.arctan2(positions[:, 1], positions[:, 0])
+
+        # Fractional indices into the table
+        step = self.config.grid_step_m
+        u = distance / step
+        v = (positions[:, 2] + self.config.max_height_m) / step
+        inside = (u >= 0) & (u <= self.pitch.shape[0] - 1) & (v >= 0) & (v <= self.pitch.shape[1] - 1)
+
+        i = np.clip(np.floor(u).astype(np.int64), 0, self.pitch.shape[0] - 2)
+        j = np.clip(np.floor(v).astype(np.int64), 0, self.pitch.shape[1] - 2)
+        du = (u - i)[:, None]
+        dv = (v - j)[:, None]
+
+        def interpolate(table):
+            corners = np.stack([table[i, j], table[i + 1, j], table[i, j + 1], table[i + 1, j + 1]], axis=1)
+            weights = np.hstack([(1 - du) * (1 - dv), du * (1 - dv), (1 - du) * dv, du * dv])
+            values = np.sum(corners * weights, axis=1)
+            values[~inside] = np.nan
+            return values
+
+        return interpolate(self.pitch), yaw, interpolate(self.time_of_flight)
+
+    def aim(self, position: Point3D) -> Tuple[float, float, float]:
+        """
+        lookup for a single target, returns (pitch, yaw, time_of_flight). Done with plain floats, for one target
+        that's several times faster than going through numpy.
+        """
+        step = self.config.grid_step_m
+        u = math.hypot(position.x, position.y) / step
+        v = (position.z + self.config.max_height_m) / step
+        yaw = math.atan2(position.y, position.x)
+        if not (0 <= u <= self.pitch.shape[0] - 1 and 0 <= v <= self.pitch.shape[1] - 1):
+            return math.nan, yaw, math.nan
+
+        i = min(int(u), self.pitch.shape[0] - 2)
+        j = min(int(v), self.pitch.shape[1] - 2)
+        du = u - i
+        dv = v - j
+        weights = ((1 - du) * (1 - dv), du * (1 - dv), (1 - du) * dv, du * dv)
+
+        values = []
+        for table in (self.pitch_rows, self.time_of_flight_rows):
+            row, next_row = table[i], table[i + 1]
+            corners = (row[j], next_row[j], row[j + 1], next_row[j + 1])
+            values.append(sum(weight * corner for weight, corner in zip(weights, corners)))
+
+        return values[0], yaw, values[1]
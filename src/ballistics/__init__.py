@@ -0,0 +1,6 @@
+from .BallisticTable import BallisticConfig, BallisticTable
+
+__all__ = [
+    "BallisticConfig",
+    "BallisticTable",
+]
@@ -0,0 +1,116 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+from typing import Callable, Optional
+
+import numpy as np
+
+
+def runBenchmark(
+    function: Callable[[], object],
+    setup: Optional[Callable[[], object]] = None,
+    warmup: int = 20,
+    iterations: int = 200,
+    max_seconds: float = 10.0,
+) -> dict:
+    """
+    Times function on its own, returning latency percentiles in microseconds and allocation stats.
+
+    args:
+        function: The code to time, called with no arguments.
+        setup: Optional untimed code to run before every call, e.g. resetting state the function changes.
+        warmup: Untimed calls made first, to fill caches and let lazy initialization happen.
+        iterations: Timed calls, fewer are made if they take longer than max_seconds in total.
+        max_seconds: Time limit on the timed calls.
+
+    Garbage collection is turned off while timing so a collection landing in one call doesn't skew it.
+    Allocations are measured in a separate pass since tracemalloc slows everything down:
+        peak_bytes: Most memory allocated at once during a call.
+        net_blocks: Memory blocks still allocated after a call, anything above 0 is growing caches or leaks.
+    """
+    for _ in range(warmup):
+        if setup is not None:
+            setup()
+        function()
+
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        deadline = time.perf_counter() + max_seconds
+        for _ in range(iterations):
+            if setup is not None:
+                setup()
+            start = time.perf_counter_ns()
+            function()
+            samples.append(time.perf_counter_ns() - start)
+            if time.perf_counter() > deadline:
+                break
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    allocations = measureAllocations(function, setup, min(len(samples), 20))
+
+    samples_us = np.array(samples) / 1000
+    return {
+        "warmup": warmup,
+        "iterations": len(samples),
+        "mean_us": float(samples_us.mean()),
+        "min_us": float(samples_us.min()),
+        "p50_us": float(np.percentile(samples_us, 50)),
+        "p90_us": float(np.percentile(samples_us, 90)),
+        "p99_us": float(np.percentile(samples_us, 99)),
+        "max_us": float(samples_us.max()),
+        "stdev_us": float(samples_us.std()),
+        **allocations,
+    }
+
+
+def measureAllocations(
+    function: Callable[[], object], setup: Optional[Callable[[], object]], iterations: int
+) -> dict:
+    peak_bytes = []
+    net_blocks = []
+
+    tracemalloc.start()
+    try:
+        for _ in range(iterations):
+            if setup is not None:
+                setup()
+            gc.collect()
+            tracemalloc.reset_peak()
+            start_memory, _ = tracemalloc.get_traced_memory()
+            start_blocks = sys.getallocatedblocks()
+
+            function()
+
+            _, peak = tracemalloc.get_traced_memory()
+            peak_bytes.append(peak - start_memory)
+            net_blocks.append(sys.getallocatedblocks() - start_blocks)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "peak_bytes": int(np.median(peak_bytes)) if peak_bytes else 0,
+        "net_blocks": int(np.median(net_blocks)) if net_blocks else 0,
+    }
@@ -0,0 +1,97 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import multiprocessing as mp
+from typing import Dict, List
+
+import numpy as np
+
+from .Stages import FRAME_HEIGHT, FRAME_WIDTH, MODEL_PATH
+
+# Fields read from /proc/self/status and /proc/self/smaps_rollup, all in kB
+STATUS_FIELDS = ["VmRSS", "RssAnon", "RssFile"]
+ROLLUP_FIELDS = ["Pss"]
+
+
+def readMemory() -> Dict[str, int]:
+    """
+    Returns the memory use of this process in kB. Linux only.
+
+    RssAnon is memory private to the process, RssFile is memory mapped from files, which processes mapping the same
+    file share. Pss splits each shared page evenly between the processes mapping it, so the Pss of every process
+    adds up to the memory they actually use together.
+    """
+    memory = {}
+    for path, fields in (("/proc/self/status", STATUS_FIELDS), ("/proc/self/smaps_rollup", ROLLUP_FIELDS)):
+        with open(path) as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in fields:
+                    memory[name] = int(value.split()[0])
+    return memory
+
+
+def measureWorker(model_path: str, shared_weights: bool, barrier, results):
+    """
+    Worker process: loads the detector, runs a frame through it and reports how much memory that took.
+    Every worker measures after all of them have loaded, so shared pages are split between all of them.
+    """
+    import onnxruntime as ort
+
+    from detector import HUSTDetector
+
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = 1
+    before = readMemory()
+    detector = HUSTDetector(model_path, ["CPUExecutionProvider"], options, shared_weights=shared_weights)
+    detector.processInput(np.zeros((FRAME_HEIGHT, FRAME_WIDTH, 3), dtype=np.uint8))
+
+    barrier.wait()
+    after = readMemory()
+    results.put({name: after[name] - before[name] for name in after})
+    # Stay alive until everyone has measured, otherwise the shared pages of the last workers grow
+    barrier.wait()
+
+
+def measureDetectorMemory(num_workers: int, shared_weights: bool, model_path: str = MODEL_PATH) -> List[Dict]:
+    """
+    Starts num_workers processes that each load a detector, like the offline and sweep workers do.
+
+    Returns:
+        The memory (kB) each worker gained by loading the detector, see readMemory.
+    """
+    if shared_weights:
+        from detector import Detector
+
+        # Write the shared model up front, so the workers only measure loading it
+        Detector.createSession(model_path, ["CPUExecutionProvider"], shared_weights=True)
+
+    context = mp.get_context("spawn")
+    barrier = context.Barrier(num_workers)
+    results = context.Queue()
+    processes = [
+        context.Process(target=measureWorker, args=(model_path, shared_weights, barrier, results))
+        for _ in range(num_workers)
+    ]
+    for process in processes:
+        process.start()
+
+    measurements = [results.get(timeout=300) for _ in processes]
+    for process in processes:
+        process.join()
+    return measurements
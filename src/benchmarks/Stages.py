@@ -0,0 +1,123 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import glob
+import os
+from typing import Callable, Dict, Tuple
+
+import cv2
+import numpy as np
+
+from communication import RobotPositionMessage, TimestampedRobotPositionMessage, calculateCRC8, calculateCRC16
+from detector import HUSTDetector, OpenCVBackend, mergeListOfTargets
+from pose_estimator.TargetPositionEstimator import TargetPositionEstimator
+from rules import CenterTargetRule, TargetSelector
+from util import Point3D
+
+SRC_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_PATH = os.path.join(SRC_DIRECTORY, "detector/models/HUST_model.onnx")
+CALIBRATION_PATH = os.path.join(SRC_DIRECTORY, "example_camera_calibration.json")
+IMAGESET_DIRECTORY = os.path.join(SRC_DIRECTORY, "../imageset")
+
+# Frames are resized to what the OV9782 gives us in deployment
+FRAME_WIDTH = 1280
+FRAME_HEIGHT = 800
+
+
+def loadFrames() -> Dict[str, np.ndarray]:
+    """
+    Returns the frames to benchmark on: every image in imageset/ plus synthetic frames.
+    The synthetic noise frame is a worst case for decoding as the model sees lots of almost-targets in it.
+    """
+    frames = {}
+    for path in sorted(glob.glob(os.path.join(IMAGESET_DIRECTORY, "*.jpg"))):
+        image = cv2.imread(path)
+        name = os.path.splitext(os.path.basename(path))[0]
+        frames[name] = cv2.resize(image, (FRAME_WIDTH, FRAME_HEIGHT))
+
+    generator = np.random.default_rng(0)
+    frames["synthetic_noise"] = generator.integers(0, 256, (FRAME_HEIGHT, FRAME_WIDTH, 3), dtype=np.uint8)
+    frames["synthetic_black"] = np.zeros((FRAME_HEIGHT, FRAME_WIDTH, 3), dtype=np.uint8)
+    return frames
+
+
+def createBenchmarks() -> Dict[str, Tuple[Callable, Callable]]:
+    """
+    Builds every benchmark as name -> (function, setup). Setup may be None.
+    Stages are benchmarked on their own with inputs captured from a real frame, then end to end on each frame.
+    """
+    detector = HUSTDetector(MODEL_PATH, providers=["CPUExecutionProvider"])
+    opencv_backend = OpenCVBackend(MODEL_PATH, detector.model.inputs)
+    pose_estimator = TargetPositionEstimator(CALIBRATION_PATH)
+    target_selector = TargetSelector([CenterTargetRule(FRAME_WIDTH, FRAME_HEIGHT)])
+
+    frames = loadFrames()
+    frame = next(iter(frames.values()))
+
+    # Capture the intermediate values of each stage on the first frame
+    formatted = detector.formatInput(frame)
+    model_input = formatted[0]
+    output = np.array(detector.model.run({"images": model_input}))[0][0]
+    unmerged_targets = detector.getTargetsFromOutput(output)
+    targets = mergeListOfTargets(unmerged_targets)
+    best_target = target_selector.getBestTarget(targets) if targets else None
+
+    position = Point3D(1.0, 0.2, 0.1)
+    message = TimestampedRobotPositionMessage(position, 1, 1234, 5000, 42, True).createMessage()
+
+    benchmarks = {
+        "HUSTDetector.formatInput": (lambda: detector.formatInput(frame), None),
+        "inference_cpu": (lambda: detector.model.run({"images": model_input}), None),
+        "inference_cpu_opencv": (lambda: opencv_backend.run({"images": model_input}), None),
+        "HUSTDetector.getTargetsFromOutput": (lambda: detector.getTargetsFromOutput(output), None),
+        "mergeListOfTargets": (lambda: mergeListOfTargets(unmerged_targets), None),
+        "RobotPositionMessage.createMessage": (
+            lambda: RobotPositionMessage(position, 1).createMessage(),
+            None,
+        ),
+        "TimestampedRobotPositionMessage.createMessage": (
+            lambda: TimestampedRobotPositionMessage(position, 1, 1234, 5000, 42, True).createMessage(7),
+            None,
+        ),
+        "calculateCRC8": (lambda: calculateCRC8(message[:4]), None),
+        "calculateCRC16": (lambda: calculateCRC16(message[:-2]), None),
+    }
+
+    if best_target is not None:
+        benchmarks["TargetSelector.getBestTarget"] = (lambda: target_selector.getBestTarget(targets), None)
+        benchmarks["TargetPositionEstimator.estimatePosition"] = (
+            lambda: pose_estimator.estimatePosition(best_target),
+            None,
+        )
+    else:
+        print("No targets found in the first frame, skipping the selection and pose benchmarks")
+
+    def endToEnd(frame):
+        found = detector.processInput(frame)
+        if found:
+            target = target_selector.getBestTarget(found)
+            _, _, target_position = pose_estimator.estimatePosition(target)
+            TimestampedRobotPositionMessage(target_position, target.color_id, 1, 0).createMessage(1)
+
+    for name, end_to_end_frame in frames.items():
+        benchmarks[f"end_to_end[{name}]"] = (
+            lambda end_to_end_frame=end_to_end_frame: endToEnd(end_to_end_frame),
+            None,
+        )
+
+    return benchmarks
@@ -0,0 +1,4 @@
+from .Benchmark import runBenchmark
+from .Stages import createBenchmarks, loadFrames
+
+__all__ = ["createBenchmarks", "loadFrames", "runBenchmark"]
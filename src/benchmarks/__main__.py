@@ -0,0 +1,169 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Headless benchmarks of each stage of the vision pipeline, runs on any CPU only Linux machine without a camera.
+
+Usage (from src):
+    python -m benchmarks run --output results.json
+    python -m benchmarks compare baseline.json results.json
+    python -m benchmarks memory --workers 4
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+
+import cv2
+import numpy as np
+import onnxruntime as ort
+
+from .Benchmark import runBenchmark
+from .Memory import measureDetectorMemory
+from .Stages import createBenchmarks
+
+# Percentiles compared between runs
+COMPARED_STATS = ["p50_us", "p99_us"]
+
+
+def getMetadata() -> dict:
+    return {
+        "time": datetime.datetime.now().isoformat(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "onnxruntime": ort.__version__,
+    }
+
+
+def run(args):
+    benchmarks = createBenchmarks()
+    results = {}
+
+    for name, (function, setup) in benchmarks.items():
+        if args.filter and args.filter not in name:
+            continue
+
+        result = runBenchmark(function, setup, warmup=args.warmup, iterations=args.iterations)
+        results[name] = result
+        print(
+            f"{name:<50} p50 {result['p50_us']:10.1f} us  p99 {result['p99_us']:10.1f} us  "
+            f"peak {result['peak_bytes'] / 1024:8.1f} KiB  net blocks {result['net_blocks']}"
+        )
+
+    with open(args.output, "w") as f:
+        json.dump({"metadata": getMetadata(), "benchmarks": results}, f, indent=2)
+    print(f"Results saved to {args.output}")
+
+
+def compare(args) -> int:
+    """
+    Flags every benchmark whose compared percentiles got slower than the baseline by more than the threshold.
+    Returns the number of regressions.
+    """
+    with open(args.baseline) as f:
+        baseline = json.load(f)["benchmarks"]
+    with open(args.current) as f:
+        current = json.load(f)["benchmarks"]
+
+    regressions = 0
+    for name, result in current.items():
+        if name not in baseline:
+            print(f"{name:<50} new")
+            continue
+
+        changes = []
+        regressed = False
+        for stat in COMPARED_STATS:
+            change = (result[stat] - baseline[name][stat]) / baseline[name][stat] * 100
+            changes.append(f"{stat} {change:+7.1f}%")
+            # Tiny stages are noisy in relative terms, ignore changes below the absolute floor
+            if change > args.threshold and result[stat] - baseline[name][stat] > args.min_change_us:
+                regressed = True
+
+        regressions += regressed
+        print(f"{name:<50} {'  '.join(changes)}{'  REGRESSION' if regressed else ''}")
+
+    for name in baseline:
+        if name not in current:
+            print(f"{name:<50} missing")
+
+    print(f"{regressions} regression(s) over {args.threshold}%")
+    return regressions
+
+
+def memory(args):
+    """
+    Measures how much memory each detector worker process takes, with and without shared weights.
+    """
+    totals = {}
+    for shared_weights in (False, True):
+        label = "shared weights" if shared_weights else "private weights"
+        measurements = measureDetectorMemory(args.workers, shared_weights)
+        for i, measurement in enumerate(measurements):
+            print(
+                f"{label:<16} worker {i}  "
+                + "  ".join(f"{k} {v / 1024:7.1f} MiB" for k, v in measurement.items())
+            )
+        totals[label] = sum(measurement["Pss"] for measurement in measurements)
+        print(f"{label:<16} total Pss {totals[label] / 1024:.1f} MiB over {args.workers} workers")
+
+    saved = totals["private weights"] - totals["shared weights"]
+    print(
+        f"Shared weights save {saved / 1024:.1f} MiB in total, {saved / 1024 / args.workers:.1f} MiB per worker"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the stages of the vision pipeline")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the benchmarks and save the results")
+    run_parser.add_argument("--output", default="benchmark_results.json", help="Where to save the results")
+    run_parser.add_argument("--warmup", type=int, default=20, help="Untimed calls before timing")
+    run_parser.add_argument("--iterations", type=int, default=200, help="Timed calls per benchmark")
+    run_parser.add_argument("--filter", help="Only run benchmarks whose name contains this")
+
+    compare_parser = subparsers.add_parser("compare", help="Compare results against a baseline")
+    compare_parser.add_argument("baseline", help="Results to compare against")
+    compare_parser.add_argument("current", help="Results to check")
+    compare_parser.add_argument("--threshold", type=float, default=10.0, help="Allowed slowdown in percent")
+    compare_parser.add_argument(
+        "--min-change-us", type=float, default=2.0, help="Ignore slowdowns smaller than this"
+    )
+
+    memory_parser = subparsers.add_parser("memory", help="Measure the memory used by each detector worker")
+    memory_parser.add_argument("--workers", type=int, default=4, help="Detector processes running together")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    elif args.command == "memory":
+        memory(args)
+    else:
+        sys.exit(1 if compare(args) > 0 else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -16,10 +16,15 @@ You should have received a copy of the GNU Affero General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, Optional
 
 import cv2
-from line_profiler import profile
+
+from telemetry import tracer
+
+from .FrameSource import FrameSource
 
 
 @dataclass
@@ -66,6 +71,13 @@ OV9782_CONFIG = CameraConfig(
     white_balance=0,
 )
 
+# Lower resolution, faster mode for tracking a close target, the full sensor binned so the calibration still applies.
+# Check the modes a camera supports with `v4l2-ctl --list-formats-ext`
+OV9782_TRACK_CONFIG = replace(OV9782_CONFIG, width=640, height=400, fps=120)
+
+# Most frames a driver buffers, V4L2 queues 4 by default
+MAX_BUFFERED_FRAMES = 4
+
 
 class Camera(cv2.VideoCapture):
     """
@@ -73,27 +85,136 @@ class Camera(cv2.VideoCapture):
 
     This class initializes a camera, applies the provided configuration, and provides utilities
     to retrieve frames and properties like width and height.
+
+    Every frame is stamped when it is grabbed, the sequence number and time.perf_counter_ns timestamp of the
+    latest frame are available through frame_sequence and last_capture_time_ns.
+
+    The camera can switch between named modes (configs) while running with setMode, e.g. a lower resolution for
+    tracking a close target. The frame size is read from the driver once per mode rather than on every access,
+    and anything depending on it can register with addModeListener to be told when it changes.
+
+    args:
+        config (CameraConfig): The config to start with.
+        port (int): Camera index.
+        modes (Dict[str, CameraConfig]): Named configs setMode can switch to.
     """
 
-    def __init__(self, config: CameraConfig, port: int = 0):
+    def __init__(self, config: CameraConfig, port: int = 0, modes: Optional[Dict[str, CameraConfig]] = None):
         super().__init__(port)
 
+        self.config = config
+        self.port = port
+        self.modes = dict(modes or {})
+        self.mode_listeners = []
+        self.config_listeners = []
+        self.frame_sequence = 0
+        self.last_capture_time_ns = 0
+
         config.applyConfig(self)
+        self.updateGeometry()
 
         print(f"Setup camera on port {port} with following settings: {config}")
         print(f"Actual width x height: {self.width} x {self.height}")
-        print(f"Actual fps {self.get(cv2.CAP_PROP_FPS)}")
+        print(f"Actual fps {self.fps}")
         print()
 
-    @profile
-    def getFrame(self):
-        self.grab()
-        return self.retrieve()[1]
+    def updateGeometry(self):
+        self.frame_width = int(self.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.frame_height = int(self.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.fps = self.get(cv2.CAP_PROP_FPS)
+
+    @tracer.traced("Camera.getFrame")
+    def getFrame(self, image=None):
+        """
+        Grabs and decodes the next frame.
+
+        args:
+            image: Optional preallocated array to decode the frame into, e.g. a slot in shared memory.
+                OpenCV only writes into it when the shape and type match, so compare the returned frame to it.
+        """
+        if not self.grab():
+            return None
+        self.last_capture_time_ns = time.perf_counter_ns()
+        self.frame_sequence += 1
+        return self.retrieve(image)[1]
+
+    def reconnect(self) -> bool:
+        """
+        Closes and reopens the camera with the same port and config, returns False if it couldn't be opened.
+        The frame sequence carries on from where it was.
+        """
+        self.release()
+        if not self.open(self.port):
+            return False
+
+        self.config.applyConfig(self)
+        self.updateGeometry()
+        self.notifyConfigListeners()
+        return True
+
+    def addModeListener(self, listener: Callable[[int, int], None]):
+        """
+        listener is called with the new (width, height) whenever setMode changes the frame size.
+        """
+        self.mode_listeners.append(listener)
+
+    def addConfigListener(self, listener: Callable[[], None]):
+        """
+        listener is called whenever a mode switch or reconnect applies a CameraConfig again, which resets every
+        property set with set since (exposure and the like), so they can be set again.
+        """
+        self.config_listeners.append(listener)
+
+    def notifyConfigListeners(self):
+        for listener in self.config_listeners:
+            listener()
+
+    def setMode(self, name: str) -> bool:
+        """
+        Switches to the mode called name, returns False if it was already active.
+        Frames the driver buffered in the old mode are dropped, the next getFrame returns a frame in the new mode.
+        """
+        config = self.modes[name]
+        if config is self.config:
+            return False
+
+        start_ns = time.perf_counter_ns()
+        size = (self.frame_width, self.frame_height)
+        config.applyConfig(self)
+        self.config = config
+        self.updateGeometry()
+        self.flush()
+        self.notifyConfigListeners()
+
+        if (self.frame_width, self.frame_height) != size:
+            for listener in self.mode_listeners:
+                listener(self.frame_width, self.frame_height)
+
+        print(
+            f"Camera mode {name}: {self.frame_width} x {self.frame_height} {self.fps:g}fps, "
+            f"switching took {(time.perf_counter_ns() - start_ns) / 1e6:.1f} ms"
+        )
+        return True
+
+    def flush(self):
+        """
+        Drops frames the driver has buffered. A buffered frame is grabbed straight away, while a new one has to be
+        waited for, so frames are grabbed until one takes a while to arrive (which is dropped too).
+        """
+        wait_ns = 0.5e9 / self.fps if self.fps > 0 else 0
+        for _ in range(MAX_BUFFERED_FRAMES + 1):
+            start_ns = time.perf_counter_ns()
+            if not self.grab() or time.perf_counter_ns() - start_ns > wait_ns:
+                break
 
     @property
     def width(self):
-        return int(self.get(cv2.CAP_PROP_FRAME_WIDTH))
+        return self.frame_width
 
     @property
     def height(self):
-        return int(self.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        return self.frame_height
+
+
+# Registered rather than inherited, mixing the ABC into a cv2.VideoCapture subclass crashes OpenCV
+FrameSource.register(Camera)
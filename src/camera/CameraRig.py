@@ -0,0 +1,214 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from detector import HUSTDetector, Target
+from pose_estimator.TargetPositionEstimator import TargetPositionEstimator
+from telemetry import metrics
+from util import Point3D
+
+from .FrameSource import FrameSource
+from .ReplaySource import ReplaySource
+
+# Seconds a capture thread waits after getting no frame, so a camera that's down doesn't spin a core
+NO_FRAME_BACKOFF = 0.005
+
+
+@dataclass
+class CameraExtrinsics:
+    """
+    Where a camera sits on the robot, in the axes of Point3D.convertFromOpenCVToNormalAxes
+    (x forwards, y left, z up) with the robot's origin (e.g. the turret pivot) at 0.
+
+    args:
+        translation (Tuple[float, float, float]): Position of the camera on the robot, in meters.
+        yaw_deg (float): Rotation about z, positive turns the camera left.
+        pitch_deg (float): Rotation about y, positive tilts the camera down.
+        roll_deg (float): Rotation about x.
+    """
+
+    translation: Tuple[float, float, float] = (0.0, 0.0, 0.0)
+    yaw_deg: float = 0.0
+    pitch_deg: float = 0.0
+    roll_deg: float = 0.0
+
+    def __post_init__(self):
+        yaw, pitch, roll = np.radians([self.yaw_deg, self.pitch_deg, self.roll_deg])
+        rotate_z = np.array([[np.cos(yaw), -np.sin(yaw), 0], [np.sin(yaw), np.cos(yaw), 0], [0, 0, 1]])
+        rotate_y = np.array(
+            [[np.cos(pitch), 0, np.sin(pitch)], [0, 1, 0], [-np.sin(pitch), 0, np.cos(pitch)]]
+        )
+        rotate_x = np.array([[1, 0, 0], [0, np.cos(roll), -np.sin(roll)], [0, np.sin(roll), np.cos(roll)]])
+        self.rotation = rotate_z @ rotate_y @ rotate_x
+
+    def toRobotFrame(self, point: Point3D) -> Point3D:
+        x, y, z = self.rotation @ (point.x, point.y, point.z) + self.translation
+        return Point3D(float(x), float(y), float(z))
+
+
+@dataclass
+class RigCamera:
+    """
+    One camera of a CameraRig.
+
+    args:
+        name (str): Tagged onto every target from this camera as target.source.
+        source (FrameSource): Where frames come from, usually a CameraWatchdog wrapped Camera.
+        estimator (TargetPositionEstimator): Estimator with this camera's calibration.
+        extrinsics (CameraExtrinsics): Where the camera is mounted.
+        priority (float): Share of inference this camera gets when there's more frames than can be processed.
+        max_fps (float): Most frames per second processed from this camera, None for no limit.
+    """
+
+    name: str
+    source: FrameSource
+    estimator: TargetPositionEstimator
+    extrinsics: CameraExtrinsics = field(default_factory=CameraExtrinsics)
+    priority: float = 1.0
+    max_fps: Optional[float] = None
+
+    def __post_init__(self):
+        # (frame, frame_sequence, capture_time_ns) of the newest frame, replaced as a whole by the capture thread
+        self.latest = None
+        self.last_sequence = 0
+        self.last_processed_ns = 0
+        self.credit = 0.0
+        self.min_interval_ns = int(1e9 / self.max_fps) if self.max_fps else 0
+        self.frame_counter = metrics.counter(f"frames_{self.name}")
+
+
+class CameraRig:
+    """
+    Runs several cameras through one detector, so extra cameras cost inference time rather than another model in
+    memory (and another CUDA context) each.
+
+    Every camera is captured on its own thread, which only keeps the newest frame, and stops at the end of the
+    recording for a ReplaySource. process waits for new frames and picks up to batch_size cameras to run inference
+    on, weighted round robin by priority: cameras that are passed over build up credit until they're picked, and
+    cameras are skipped while they're over their max_fps. Models with a dynamic batch size run all picked frames at
+    once, see HUSTDetector.processFormattedBatch.
+
+    Each target is tagged with the camera it came from (target.source), its frame (target.frame_sequence,
+    target.capture_time_ns), and its position in the robot frame (target.position) through the camera's
+    calibration and extrinsics, so targets from all cameras can be compared by the same selection rules.
+
+    args:
+        cameras (List[RigCamera]): The cameras, names must be unique.
+        detector (HUSTDetector): The detector shared by all cameras.
+        batch_size (int): Most frames run through the detector at once.
+    """
+
+    def __init__(self, cameras: List[RigCamera], detector: HUSTDetector, batch_size: int = 2):
+        if len({camera.name for camera in cameras}) != len(cameras):
+            raise ValueError("Camera names in a CameraRig must be unique")
+
+        self.cameras = cameras
+        self.detector = detector
+        self.batch_size = batch_size
+        self.frame_available = threading.Event()
+        self.running = False
+        self.threads = []
+
+    def start(self):
+        self.running = True
+        for camera in self.cameras:
+            thread = threading.Thread(
+                target=self.capture, args=(camera,), name=f"capture-{camera.name}", daemon=True
+            )
+            thread.start()
+            self.threads.append(thread)
+
+    def capture(self, camera: RigCamera):
+        # OpenCV releases the GIL while grabbing and decoding, so the cameras capture in parallel
+        while self.running:
+            frame = camera.source.getFrame()
+            if frame is None:
+                if isinstance(camera.source, ReplaySource):
+                    print(f"Camera {camera.name} reached the end of its recording")
+                    return
+                time.sleep(NO_FRAME_BACKOFF)
+                continue
+
+            camera.latest = (frame, camera.source.frame_sequence, camera.source.last_capture_time_ns)
+            self.frame_available.set()
+
+    def pickCameras(self) -> List[RigCamera]:
+        now = time.perf_counter_ns()
+        ready = []
+        for camera in self.cameras:
+            latest = camera.latest
+            if latest is None or latest[1] == camera.last_sequence:
+                continue
+            if now - camera.last_processed_ns < camera.min_interval_ns:
+                continue
+            camera.credit += camera.priority
+            ready.append(camera)
+
+        ready.sort(key=lambda camera: camera.credit, reverse=True)
+        picked = ready[: self.batch_size]
+        for camera in picked:
+            camera.credit = 0.0
+            camera.last_processed_ns = now
+        return picked
+
+    def process(self, timeout: float = 1.0) -> Optional[List[Target]]:
+        """
+        Waits for new frames, runs the detector on the picked cameras' frames and returns all targets found,
+        tagged and positioned as described in the class docs. Returns None if no frame arrived within timeout.
+        """
+        deadline = time.perf_counter() + timeout
+        while not (picked := self.pickCameras()):
+            # Cleared before looking again, so a frame arriving in between still wakes the next wait
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0 or not self.frame_available.wait(remaining):
+                return None
+            self.frame_available.clear()
+
+        frames = []
+        for camera in picked:
+            frame, sequence, capture_time_ns = camera.latest
+            camera.last_sequence = sequence
+            camera.frame_counter.add()
+            frames.append((camera, sequence, capture_time_ns, self.detector.formatInput(frame)))
+
+        results = self.detector.processFormattedBatch([formatted for *_, formatted in frames])
+
+        targets = []
+        for (camera, sequence, capture_time_ns, _), camera_targets in zip(frames, results):
+            for target in camera_targets:
+                _, _, position = camera.estimator.estimatePosition(target)
+                target.source = camera.name
+                target.frame_sequence = sequence
+                target.capture_time_ns = capture_time_ns
+                target.position = camera.extrinsics.toRobotFrame(position)
+                targets.append(target)
+
+        return targets
+
+    def stop(self):
+        self.running = False
+        for thread in self.threads:
+            thread.join(timeout=2.0)
+        for camera in self.cameras:
+            camera.source.release()
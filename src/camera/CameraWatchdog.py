@@ -0,0 +1,186 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import time
+
+import cv2
+
+from telemetry import metrics
+
+from .Camera import Camera
+from .FrameSource import FrameSource
+
+
+class CameraWatchdog(FrameSource):
+    """
+    Wraps a Camera and reopens it in place when it stops delivering frames, so a USB hiccup costs the time it takes
+    to reopen the camera instead of a restart of the whole process (and the model warming up again).
+
+    A frame counts as failed when grabbing or decoding it fails, the frame is empty, or the driver timestamp
+    (CAP_PROP_POS_MSEC) didn't move on from the previous frame, meaning the camera handed back the same buffer.
+    Grabs are kept from blocking forever with CAP_PROP_READ_TIMEOUT_MSEC where the backend supports it, and a grab
+    that takes longer than stall_timeout is treated as a stall either way.
+
+    The camera is reopened after max_failures failed frames in a row, or once no good frame arrived for
+    stall_timeout. While the camera is down every getFrame makes one attempt to reopen it, at most every
+    retry_interval, and returns None. Outages are recorded in the "camera_outage" histogram and printed once the camera is back.
+
+    args:
+        camera (Camera): The camera to watch, reopened with the port and config it was created with.
+        stall_timeout (float): Seconds without a good frame before the camera is reopened.
+        max_failures (int): Failed frames in a row before the camera is reopened.
+        retry_interval (float): Seconds between attempts to reopen the camera while it's down.
+    """
+
+    def __init__(
+        self, camera: Camera, stall_timeout: float = 0.5, max_failures: int = 10, retry_interval: float = 0.5
+    ):
+        self.camera = camera
+        self.stall_timeout_ns = int(stall_timeout * 1e9)
+        self.max_failures = max_failures
+        self.retry_interval_ns = int(retry_interval * 1e9)
+
+        self.failures = 0
+        self.last_good_ns = time.perf_counter_ns()
+        self.last_position = None
+        # Start of the current outage, None while the camera is working
+        self.outage_start_ns = None
+        self.outage_cause = None
+        self.next_retry_ns = 0
+        self.attempts = 0
+
+        self.outage_histogram = metrics.histogram("camera_outage")
+        self.reconnect_counter = metrics.counter("camera_reconnects")
+
+        self.setReadTimeout()
+
+    def setReadTimeout(self):
+        self.camera.set(cv2.CAP_PROP_READ_TIMEOUT_MSEC, self.stall_timeout_ns / 1e6)
+
+    @property
+    def frame_sequence(self) -> int:
+        return self.camera.frame_sequence
+
+    @property
+    def last_capture_time_ns(self) -> int:
+        return self.camera.last_capture_time_ns
+
+    @property
+    def width(self) -> int:
+        return self.camera.width
+
+    @property
+    def height(self) -> int:
+        return self.camera.height
+
+    def setMode(self, name: str) -> bool:
+        switched = self.camera.setMode(name)
+        # The stream restarts, don't count the gap as a stall
+        self.last_good_ns = time.perf_counter_ns()
+        self.last_position = None
+        return switched
+
+    def addModeListener(self, listener):
+        self.camera.addModeListener(listener)
+
+    def addConfigListener(self, listener):
+        self.camera.addConfigListener(listener)
+
+    def set(self, property_id: int, value: float) -> bool:
+        return self.camera.set(property_id, value)
+
+    def grab(self) -> bool:
+        if self.outage_start_ns is not None:
+            return False
+        return self.camera.grab()
+
+    def getFrame(self, image=None):
+        if self.outage_start_ns is not None and not self.reconnect():
+            return None
+
+        start_ns = time.perf_counter_ns()
+        frame = self.camera.getFrame(image)
+        now = time.perf_counter_ns()
+
+        cause = self.checkFrame(frame)
+        if cause is None:
+            self.failures = 0
+            self.last_good_ns = now
+            # The frame is fine, but a grab that hangs this long means the camera is about to stop delivering
+            if now - start_ns >= self.stall_timeout_ns:
+                self.startOutage(f"grab took {(now - start_ns) / 1e6:.0f} ms", now)
+            return frame
+
+        self.failures += 1
+        if self.failures >= self.max_failures or now - self.last_good_ns >= self.stall_timeout_ns:
+            self.startOutage(cause, now)
+        return None
+
+    def checkFrame(self, frame):
+        """
+        Returns why the frame is bad, or None if it's good.
+        """
+        if frame is None or frame.size == 0:
+            return "no frame"
+
+        # Backends without driver timestamps always report 0
+        position = self.camera.get(cv2.CAP_PROP_POS_MSEC)
+        if position != 0 and position == self.last_position:
+            return "frozen frame"
+        self.last_position = position
+
+        return None
+
+    def startOutage(self, cause: str, now: int):
+        # A stall is counted from the last good frame
+        self.outage_start_ns = self.last_good_ns
+        self.outage_cause = cause
+        self.next_retry_ns = now
+        self.attempts = 0
+        print(f"Camera stopped delivering frames ({cause}), reopening")
+
+    def reconnect(self) -> bool:
+        # Waiting here rather than returning straight away keeps the loop from spinning while the camera is gone
+        wait_ns = self.next_retry_ns - time.perf_counter_ns()
+        if wait_ns > 0:
+            time.sleep(wait_ns / 1e9)
+
+        self.attempts += 1
+        self.reconnect_counter.add()
+        start_ns = time.perf_counter_ns()
+        if not self.camera.reconnect():
+            self.next_retry_ns = time.perf_counter_ns() + self.retry_interval_ns
+            return False
+
+        self.setReadTimeout()
+        now = time.perf_counter_ns()
+        outage_ns = now - self.outage_start_ns
+        self.outage_histogram.record(outage_ns)
+        print(
+            f"Camera recovered after {outage_ns / 1e6:.0f} ms ({self.outage_cause}), "
+            f"{self.attempts} attempts, reopening took {(now - start_ns) / 1e6:.0f} ms"
+        )
+
+        self.outage_start_ns = None
+        self.failures = 0
+        self.last_good_ns = now
+        self.last_position = None
+        return True
+
+    def release(self):
+        self.camera.release()
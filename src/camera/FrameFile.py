@@ -0,0 +1,184 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import errno
+import os
+import struct
+from typing import Tuple
+
+import numpy as np
+
+# Header: magic, version, height, width, channels, capacity, number of frames written
+HEADER_FORMAT = "<4sIIIIQQ"
+HEADER_SIZE = 64
+MAGIC = b"HBFR"
+VERSION = 1
+
+# Offset of the frame count in the header, rewritten after every frame
+NUM_FRAMES_OFFSET = struct.calcsize("<4sIIIIQ")
+
+
+def getRecordType(frame_shape: Tuple[int, int, int]) -> np.dtype:
+    return np.dtype(
+        [
+            ("sequence", "<i8"),
+            ("capture_time_ns", "<i8"),
+            ("frame", np.uint8, frame_shape),
+        ]
+    )
+
+
+def getFileSize(frame_shape: Tuple[int, int, int], capacity: int) -> int:
+    """
+    Size in bytes of a raw frame file holding capacity frames.
+    """
+    return HEADER_SIZE + capacity * getRecordType(tuple(frame_shape)).itemsize
+
+
+def reserveSpace(f, size: int):
+    # Allocates the blocks instead of leaving a sparse file, so writes to the mapping can't run out of space later.
+    # Filesystems (or platforms) without fallocate get a sparse file
+    if hasattr(os, "posix_fallocate"):
+        try:
+            os.posix_fallocate(f.fileno(), 0, size)
+            return
+        except OSError as e:
+            if e.errno not in (errno.EOPNOTSUPP, errno.EINVAL):
+                raise
+    f.truncate(size)
+
+
+class FrameFileWriter:
+    """
+    Writes frames to a raw frame file, a file of uncompressed frames that can be memory mapped and read back
+    without decoding anything.
+
+    Layout:
+        header (64 bytes): see HEADER_FORMAT
+        records: sequence (int64), capture time (int64, time.perf_counter_ns), frame (uint8, height x width x channels)
+
+    The file is preallocated for capacity frames, with the disk space reserved up front: frames are written through a
+    memory map, and running out of space in the middle of one kills the process with SIGBUS instead of raising.
+    The frame count in the header is updated after every frame,
+    so a recording cut short (robot powered off) still reads back up to the last complete frame.
+
+    args:
+        path (str): File to create, overwritten if it exists.
+        frame_shape (Tuple[int, int, int]): Shape of every frame, (height, width, channels).
+        capacity (int): Maximum number of frames the file holds.
+
+    raises:
+        OSError: With errno.ENOSPC if there isn't enough disk space for capacity frames, the file is removed.
+    """
+
+    def __init__(self, path: str, frame_shape: Tuple[int, int, int], capacity: int):
+        self.path = path
+        self.frame_shape = tuple(frame_shape)
+        self.capacity = capacity
+        self.num_frames = 0
+
+        record_type = getRecordType(self.frame_shape)
+        size = getFileSize(self.frame_shape, capacity)
+        with open(path, "wb") as f:
+            f.write(self.packHeader().ljust(HEADER_SIZE, b"\0"))
+            try:
+                reserveSpace(f, size)
+            except OSError:
+                f.close()
+                os.remove(path)
+                raise
+
+        self.header = np.memmap(path, dtype=np.uint8, mode="r+", shape=(HEADER_SIZE,))
+        self.records = np.memmap(path, dtype=record_type, mode="r+", offset=HEADER_SIZE, shape=(capacity,))
+
+    def packHeader(self) -> bytes:
+        height, width, channels = self.frame_shape
+        return struct.pack(
+            HEADER_FORMAT, MAGIC, VERSION, height, width, channels, self.capacity, self.num_frames
+        )
+
+    @property
+    def is_full(self) -> bool:
+        return self.num_frames >= self.capacity
+
+    def write(self, frame: np.ndarray, sequence: int, capture_time_ns: int) -> bool:
+        """
+        Appends a frame, returns False if the file is full.
+        """
+        if self.is_full:
+            return False
+
+        record = self.records[self.num_frames]
+        record["sequence"] = sequence
+        record["capture_time_ns"] = capture_time_ns
+        record["frame"] = frame
+
+        self.num_frames += 1
+        self.header[NUM_FRAMES_OFFSET : NUM_FRAMES_OFFSET + 8] = np.frombuffer(
+            struct.pack("<Q", self.num_frames), dtype=np.uint8
+        )
+        return True
+
+    def close(self):
+        if self.records is None:
+            return
+
+        self.records.flush()
+        self.header.flush()
+        self.header = self.records = None
+
+        # Give back the space that was preallocated but never used
+        with open(self.path, "r+b") as f:
+            f.truncate(HEADER_SIZE + self.num_frames * getRecordType(self.frame_shape).itemsize)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class FrameFile:
+    """
+    Read only, memory mapped view of a raw frame file written by FrameFileWriter.
+    Frames are returned as views into the mapping, so reading one costs nothing until its pixels are touched.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            header = f.read(struct.calcsize(HEADER_FORMAT))
+
+        magic, version, height, width, channels, _, num_frames = struct.unpack(HEADER_FORMAT, header)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a raw frame file")
+        if version != VERSION:
+            raise ValueError(f"{path} has unsupported frame file version {version}")
+
+        self.frame_shape = (height, width, channels)
+        record_type = getRecordType(self.frame_shape)
+
+        # Don't trust the count past the end of the file, in case it was truncated
+        num_frames = min(num_frames, (os.path.getsize(path) - HEADER_SIZE) // record_type.itemsize)
+        self.records = np.memmap(path, dtype=record_type, mode="r", offset=HEADER_SIZE, shape=(num_frames,))
+
+        self.frames = self.records["frame"]
+        self.sequences = self.records["sequence"]
+        self.capture_times_ns = self.records["capture_time_ns"]
+
+    def __len__(self) -> int:
+        return len(self.records)
@@ -0,0 +1,73 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from abc import ABC, abstractmethod
+
+
+class FrameSource(ABC):
+    """
+    Anything the vision loop can take frames from: a live camera, or a recording being replayed.
+
+    Implementations keep the same bookkeeping as Camera, frame_sequence and last_capture_time_ns
+    (time.perf_counter_ns) describe the latest frame returned by getFrame.
+    """
+
+    frame_sequence: int = 0
+    last_capture_time_ns: int = 0
+
+    @abstractmethod
+    def grab(self) -> bool:
+        """
+        Advances to the next frame without returning it, used to skip frames cheaply.
+        """
+        pass
+
+    @abstractmethod
+    def getFrame(self, image=None):
+        """
+        Returns the next frame, or None if there isn't one.
+
+        args:
+            image: Optional preallocated array to write the frame into, compare the returned frame to it.
+        """
+        pass
+
+    @property
+    @abstractmethod
+    def width(self) -> int:
+        pass
+
+    @property
+    @abstractmethod
+    def height(self) -> int:
+        pass
+
+    def setMode(self, name: str) -> bool:
+        """
+        Switches to a named mode, see Camera.setMode. Sources without modes never change.
+        """
+        return False
+
+    def addModeListener(self, listener):
+        pass
+
+    def addConfigListener(self, listener):
+        pass
+
+    def release(self):
+        pass
@@ -0,0 +1,389 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import glob
+import os
+import threading
+import time
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from telemetry import tracer
+
+from .FrameFile import MAGIC, FrameFile
+from .FrameSource import FrameSource
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+# Playback modes
+FAST = "fast"
+REALTIME = "realtime"
+STEP = "step"
+MODES = (FAST, REALTIME, STEP)
+
+
+class RawFrameReader:
+    """
+    Reads a raw frame file, frames are views into the memory mapping so there is nothing to decode.
+    """
+
+    def __init__(self, path: str):
+        self.file = FrameFile(path)
+        self.index = 0
+        self.height, self.width = self.file.frame_shape[:2]
+
+    def __len__(self) -> int:
+        return len(self.file)
+
+    def read(self, image=None) -> Optional[Tuple[np.ndarray, int]]:
+        if self.index >= len(self.file):
+            return None
+
+        frame = self.file.frames[self.index]
+        if image is not None and image.shape == frame.shape:
+            np.copyto(image, frame)
+            frame = image
+        time_ns = int(self.file.capture_times_ns[self.index])
+        self.index += 1
+        return frame, time_ns
+
+    def skip(self) -> bool:
+        self.index += 1
+        return self.index <= len(self.file)
+
+    def rewind(self):
+        self.index = 0
+
+    def seek(self, index: int):
+        self.index = index
+
+
+class ImageDirectoryReader:
+    """
+    Reads the images in a directory in name order, timestamped as if they were captured at fps.
+    """
+
+    def __init__(self, path: str, fps: float):
+        self.paths = sorted(
+            os.path.join(path, name) for name in os.listdir(path) if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        if len(self.paths) == 0:
+            raise ValueError(f"No images found in {path}")
+
+        self.frame_interval_ns = int(1e9 / fps)
+        self.index = 0
+        # The size of the first image that can be decoded
+        first = next((image for image in map(cv2.imread, self.paths) if image is not None), None)
+        if first is None:
+            raise ValueError(f"None of the images in {path} can be read")
+        self.height, self.width = first.shape[:2]
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def read(self, image=None) -> Optional[Tuple[np.ndarray, int]]:
+        if self.index >= len(self.paths):
+            return None
+
+        # None for an image that can't be decoded, the caller decides whether to skip it
+        frame = cv2.imread(self.paths[self.index])
+        if image is not None and frame is not None and image.shape == frame.shape:
+            np.copyto(image, frame)
+            frame = image
+        time_ns = self.index * self.frame_interval_ns
+        self.index += 1
+        return frame, time_ns
+
+    def skip(self) -> bool:
+        self.index += 1
+        return self.index <= len(self.paths)
+
+    def rewind(self):
+        self.index = 0
+
+    def seek(self, index: int):
+        self.index = index
+
+
+class VideoReader:
+    """
+    Reads a video file, timestamped with the presentation time of each frame.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.video = cv2.VideoCapture(path)
+        if not self.video.isOpened():
+            raise ValueError(f"Could not open video {path}")
+
+        self.width = int(self.video.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.video.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    def __len__(self) -> int:
+        return int(self.video.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    def read(self, image=None) -> Optional[Tuple[np.ndarray, int]]:
+        if not self.video.grab():
+            return None
+        time_ns = int(self.video.get(cv2.CAP_PROP_POS_MSEC) * 1e6)
+        return self.video.retrieve(image)[1], time_ns
+
+    def skip(self) -> bool:
+        return self.video.grab()
+
+    def rewind(self):
+        self.video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+    def seek(self, index: int):
+        self.video.set(cv2.CAP_PROP_POS_FRAMES, index)
+
+
+class ChunkedReader:
+    """
+    Reads a recording split into chunk files (see recording.MatchRecorder) as one continuous recording.
+    """
+
+    def __init__(self, readers: list):
+        self.readers = readers
+        self.index = 0
+        self.width = readers[0].width
+        self.height = readers[0].height
+
+        # Video chunks each start their clock at 0, shift them to follow on from the previous chunk
+        self.time_offset_ns = 0
+        self.last_time_ns = 0
+        self.frame_interval_ns = 0
+
+    def __len__(self) -> int:
+        return sum(len(reader) for reader in self.readers)
+
+    def read(self, image=None) -> Optional[Tuple[np.ndarray, int]]:
+        while self.index < len(self.readers):
+            result = self.readers[self.index].read(image)
+            if result is not None:
+                frame, time_ns = result
+                time_ns += self.time_offset_ns
+                if time_ns < self.last_time_ns:
+                    self.time_offset_ns += self.last_time_ns + self.frame_interval_ns - time_ns
+                    time_ns = self.last_time_ns + self.frame_interval_ns
+                self.frame_interval_ns = time_ns - self.last_time_ns if self.last_time_ns else 0
+                self.last_time_ns = time_ns
+                return frame, time_ns
+
+            self.index += 1
+        return None
+
+    def skip(self) -> bool:
+        return self.read() is not None
+
+    def rewind(self):
+        for reader in self.readers:
+            reader.rewind()
+        self.index = 0
+        self.time_offset_ns = 0
+        self.last_time_ns = 0
+        self.frame_interval_ns = 0
+
+
+def createReader(path: str, fps: float):
+    if os.path.isdir(path):
+        # A recording made by recording.MatchRecorder
+        chunks = sorted(glob.glob(os.path.join(path, "frames_*.frames")))
+        if len(chunks) > 0:
+            return ChunkedReader([RawFrameReader(chunk) for chunk in chunks])
+        chunks = sorted(glob.glob(os.path.join(path, "frames_*.avi")))
+        if len(chunks) > 0:
+            return ChunkedReader([VideoReader(chunk) for chunk in chunks])
+
+        return ImageDirectoryReader(path, fps)
+
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) == MAGIC:
+            return RawFrameReader(path)
+
+    return VideoReader(path)
+
+
+class ReplaySource(FrameSource):
+    """
+    Plays back a recorded session in place of a live camera, so the pipeline can be run, benchmarked and
+    debugged off the robot.
+
+    The recording can be a video file, a directory of images, a raw frame file (see FrameFileWriter), or a
+    directory recorded by recording.MatchRecorder.
+    Raw frame files are memory mapped and cost nothing to decode, use them when measuring the vision stages.
+
+    Modes:
+        fast: Frames are returned as fast as they are asked for, for measuring throughput.
+        realtime: Frames "arrive" at the rate they were recorded. Asking early waits for the next frame, asking late
+            skips to the newest frame that has arrived, like a live camera would. last_capture_time_ns is the
+            arrival time, so latencies include the time a frame sat waiting.
+        step: Every frame waits for a call to step, for going through a session frame by frame.
+
+    args:
+        path (str): Video file, image directory, raw frame file or recording directory.
+        mode (str): One of "fast", "realtime" or "step".
+        loop (bool): Start over at the end of the recording instead of returning None.
+        fps (float): Frame rate of an image directory, which has no timestamps of its own.
+        speed (float): Playback speed multiplier in realtime mode.
+    """
+
+    def __init__(
+        self, path: str, mode: str = FAST, loop: bool = False, fps: float = 100.0, speed: float = 1.0
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown replay mode {mode}, expected one of {MODES}")
+
+        self.reader = createReader(path, fps)
+        self.mode = mode
+        self.loop = loop
+        self.speed = speed
+
+        self.frame_sequence = 0
+        self.last_capture_time_ns = 0
+        # Time of the latest frame in the recording's own clock
+        self.recorded_time_ns = 0
+        self.frames_dropped = 0
+        # Frames that couldn't be decoded and were skipped over
+        self.frames_unreadable = 0
+
+        # Realtime mode: when playback started, in both clocks
+        self.start_time_ns = None
+        self.recorded_start_time_ns = 0
+
+        # Frame read ahead in realtime mode that hadn't arrived yet
+        self.pending = None
+        self.steps = threading.Semaphore(0)
+
+        print(f"Replaying {path} ({len(self.reader)} frames) in {mode} mode")
+
+    @property
+    def width(self) -> int:
+        return self.reader.width
+
+    @property
+    def height(self) -> int:
+        return self.reader.height
+
+    def step(self, count: int = 1):
+        """
+        Lets count more frames through in step mode, can be called from any thread.
+        """
+        for _ in range(count):
+            self.steps.release()
+
+    def readNext(self, image=None) -> Optional[Tuple[np.ndarray, int]]:
+        if self.pending is not None:
+            result, self.pending = self.pending, None
+            return result
+
+        result = self.readDecodable(image)
+        if result is None and self.loop:
+            self.reader.rewind()
+            # The recording's clock starts over, so does the pacing
+            self.start_time_ns = None
+            result = self.readDecodable(image)
+        return result
+
+    def readDecodable(self, image=None) -> Optional[Tuple[np.ndarray, int]]:
+        """
+        Reads the next frame that can be decoded, so None only ever means the end of the recording.
+        """
+        result = self.reader.read(image)
+        while result is not None and result[0] is None:
+            if self.frames_unreadable == 0:
+                print("Skipping replay frames that can't be decoded")
+            self.frames_unreadable += 1
+            result = self.reader.read(image)
+        return result
+
+    def getArrivalTime(self, recorded_time_ns: int) -> int:
+        return self.start_time_ns + int((recorded_time_ns - self.recorded_start_time_ns) / self.speed)
+
+    def grab(self) -> bool:
+        if self.mode == STEP:
+            self.steps.acquire()
+
+        if self.pending is not None:
+            self.pending = None
+        elif not self.reader.skip():
+            return False
+
+        self.frame_sequence += 1
+        return True
+
+    @tracer.traced("ReplaySource.getFrame")
+    def getFrame(self, image=None):
+        if self.mode == STEP:
+            self.steps.acquire()
+
+        result = self.readNext(image)
+        if result is None:
+            return None
+
+        frame, recorded_time_ns = result
+        self.frame_sequence += 1
+
+        if self.mode == REALTIME:
+            if self.start_time_ns is None:
+                self.start_time_ns = time.perf_counter_ns()
+                self.recorded_start_time_ns = recorded_time_ns
+
+            frame, recorded_time_ns = self.catchUp(frame, recorded_time_ns)
+            if image is not None and frame is not image and frame.shape == image.shape:
+                np.copyto(image, frame)
+                frame = image
+
+            arrival_time_ns = self.getArrivalTime(recorded_time_ns)
+            wait_ns = arrival_time_ns - time.perf_counter_ns()
+            if wait_ns > 0:
+                time.sleep(wait_ns / 1e9)
+            self.last_capture_time_ns = arrival_time_ns
+        else:
+            self.last_capture_time_ns = time.perf_counter_ns()
+
+        self.recorded_time_ns = recorded_time_ns
+        return frame
+
+    def catchUp(self, frame, recorded_time_ns: int) -> Tuple[np.ndarray, int]:
+        """
+        Realtime mode. Skips ahead to the newest frame that has already arrived, dropping the ones in between.
+        The first frame that hasn't arrived yet is kept for the next getFrame.
+        """
+        while time.perf_counter_ns() > self.getArrivalTime(recorded_time_ns):
+            # Read into a new array, the frame we have must survive if the next one isn't due yet
+            next_result = self.readDecodable()
+            if next_result is None:
+                break
+            if time.perf_counter_ns() < self.getArrivalTime(next_result[1]):
+                self.pending = next_result
+                break
+
+            frame, recorded_time_ns = next_result
+            self.frame_sequence += 1
+            self.frames_dropped += 1
+
+        return frame, recorded_time_ns
+
+    def release(self):
+        readers = self.reader.readers if isinstance(self.reader, ChunkedReader) else [self.reader]
+        for reader in readers:
+            if isinstance(reader, VideoReader):
+                reader.video.release()
@@ -0,0 +1,107 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import time
+
+from .Message import ClockSyncRequestMessage, ClockSyncResponseMessage
+from .Serial import Serial
+
+# Remote clock is an unsigned 32 bit microsecond counter
+CLOCK_WRAP = 2**32
+
+
+class ClockSync:
+    """
+    Estimates the offset between the coprocessor clock and the MCB clock over the serial link.
+
+    This works similar to NTP: we send a request stamped with our time (t0), the MCB stamps it with its own time
+    when it arrives (t1), and we note when the response gets back to us (t2). Assuming the link takes the same
+    time in both directions, the MCB clock read t1 at our time (t0 + t2) / 2.
+    The sample with the shortest round trip is the least affected by serial delays, so that's the one we keep.
+
+    Local times are taken from time.perf_counter_ns, the same clock used to stamp camera frames.
+    """
+
+    def __init__(self, serial: Serial):
+        self.serial = serial
+        self.offset_us = 0
+        self.round_trip_us = None
+
+    @property
+    def is_synchronized(self) -> bool:
+        return self.round_trip_us is not None
+
+    def synchronize(self, num_samples: int = 8, timeout: float = 0.05) -> bool:
+        """
+        Runs the handshake num_samples times and keeps the best estimate.
+
+        Args:
+            num_samples (int): Number of request/response rounds to run.
+            timeout (float): How long to wait for each response, in seconds.
+
+        Returns:
+            bool: True if at least one round got a valid response.
+        """
+        for request_id in range(num_samples):
+            send_time_us = time.perf_counter_ns() // 1000
+            request = ClockSyncRequestMessage(request_id, send_time_us)
+            self.serial.write(request.createMessage())
+
+            response = self.waitForResponse(request_id, send_time_us, timeout)
+            receive_time_us = time.perf_counter_ns() // 1000
+            if response is None:
+                continue
+
+            round_trip_us = receive_time_us - send_time_us
+            if self.round_trip_us is None or round_trip_us < self.round_trip_us:
+                self.round_trip_us = round_trip_us
+                self.offset_us = (response.mcb_time_us - (send_time_us + receive_time_us) // 2) % CLOCK_WRAP
+
+        if self.is_synchronized:
+            print(
+                f"Clock synchronized with MCB, offset: {self.offset_us} us, round trip: {self.round_trip_us} us"
+            )
+        else:
+            print("Clock synchronization with MCB failed, no responses received")
+
+        return self.is_synchronized
+
+    def waitForResponse(self, request_id: int, send_time_us: int, timeout: float):
+        deadline = time.perf_counter() + timeout
+
+        while (remaining := deadline - time.perf_counter()) > 0:
+            message = self.serial.readMessage(remaining)
+            if message is None:
+                return None
+
+            message_id, _, payload = message
+            if message_id != ClockSyncResponseMessage.ID:
+                continue
+
+            response = ClockSyncResponseMessage.fromPayload(payload)
+            # Ignore stale responses from earlier rounds that timed out
+            if response.request_id == request_id and response.request_time_us == send_time_us % CLOCK_WRAP:
+                return response
+
+        return None
+
+    def toRemoteMicros(self, local_time_ns: int) -> int:
+        """
+        Converts a time.perf_counter_ns timestamp into the MCB clock, in microseconds.
+        """
+        return (local_time_ns // 1000 + self.offset_us) % CLOCK_WRAP
@@ -0,0 +1,72 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import math
+import struct
+import threading
+import time
+
+from .Message import GimbalStateMessage
+from .Serial import Serial
+
+
+class GimbalState:
+    """
+    Keeps the latest gimbal pitch sent by the MCB (GimbalStateMessage), read from the serial port on a background
+    thread so the loop never waits for it.
+
+    Start it after ClockSync.synchronize, both read messages from the same port.
+    """
+
+    def __init__(self, serial: Serial):
+        self.serial = serial
+        self.pitch = 0.0
+        self.last_receive_time_ns = None
+        self.running = False
+        self.thread = None
+
+    @property
+    def is_received(self) -> bool:
+        return self.last_receive_time_ns is not None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.receive, name="gimbal-state", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+
+    def receive(self):
+        while self.running:
+            message = self.serial.readMessage(0.1)
+            if message is None:
+                continue
+
+            message_id, _, payload = message
+            if message_id != GimbalStateMessage.ID or len(payload) != struct.calcsize(
+                GimbalStateMessage.PAYLOAD_FORMAT
+            ):
+                continue
+
+            pitch = GimbalStateMessage.fromPayload(payload).pitch
+            if math.isfinite(pitch):
+                self.pitch = pitch
+                self.last_receive_time_ns = time.perf_counter_ns()
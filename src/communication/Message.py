@@ -18,6 +18,7 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import struct
 from abc import ABC, abstractmethod
+from typing import Optional, Tuple
 
 from util import Point3D
 
@@ -60,6 +61,9 @@ class DJIMessage(ABC):
     """
 
     HEAD_BYTE = 0xA5
+    HEADER_SIZE = 5
+    # Message type (2 bytes) before the payload and the CRC16 (2 bytes) after it
+    OVERHEAD_SIZE = HEADER_SIZE + 4
 
     @abstractmethod
     def getID(self) -> int:
@@ -136,3 +140,226 @@ class RobotPositionMessage(DJIMessage):
             bytes: Encoded position data as 3 floats (x, y, z) in little-endian format.
         """
         return struct.pack("<fffB", self.position.x, self.position.y, self.position.z, self.color_id)
+
+
+class TimestampedRobotPositionMessage(RobotPositionMessage):
+    """
+    A RobotPositionMessage that also tells the MCB how old the measurement is, so the gimbal controller can
+    compensate for vision latency that changes from frame to frame.
+
+    On top of the position and color, the payload carries:
+        frame_sequence: The camera frame the position was measured from, lets the MCB spot dropped frames.
+        latency_us: Time between the frame being captured and the message being sent, in microseconds.
+        capture_time_us: When the frame was captured, in the MCB's clock (microseconds, wraps at 2^32).
+            Only meaningful when clock_synced is set, see ClockSync.
+        clock_synced: 1 if capture_time_us is in the MCB's clock, 0 otherwise.
+    """
+
+    def __init__(
+        self,
+        position: Point3D,
+        color_id: int,
+        frame_sequence: int,
+        latency_us: int,
+        capture_time_us: int = 0,
+        clock_synced: bool = False,
+    ):
+        super().__init__(position, color_id)
+        self.frame_sequence = frame_sequence
+        self.latency_us = latency_us
+        self.capture_time_us = capture_time_us
+        self.clock_synced = clock_synced
+
+    def getID(self) -> int:
+        """
+        Returns the unique message ID for TimestampedRobotPositionMessage.
+        ID: 0x02
+        """
+        return 0x02
+
+    def getPayload(self) -> bytes:
+        """
+        Constructs the payload containing the robot's position and timing information.
+
+        Returns:
+            bytes: Position as 3 floats, color as a byte, frame sequence, latency and capture time as unsigned 32 bit
+            integers and the clock synced flag as a byte, all in little-endian format.
+        """
+        return struct.pack(
+            "<fffBIIIB",
+            self.position.x,
+            self.position.y,
+            self.position.z,
+            self.color_id,
+            self.frame_sequence & 0xFFFFFFFF,
+            min(max(self.latency_us, 0), 0xFFFFFFFF),
+            self.capture_time_us & 0xFFFFFFFF,
+            int(self.clock_synced),
+        )
+
+
+class AimMessage(TimestampedRobotPositionMessage):
+    """
+    A TimestampedRobotPositionMessage that also carries where to point the barrel to hit the target, with bullet drop
+    and drag already accounted for (see ballistics.BallisticTable), so the MCB doesn't have to solve the trajectory.
+
+    On top of the TimestampedRobotPositionMessage payload:
+        pitch: Barrel pitch in radians from level, up is positive. NaN if the target is out of range.
+        yaw: Yaw to the target in radians relative to where the gimbal points, left is positive.
+        time_of_flight: Seconds until the projectile reaches the target, NaN if out of range.
+
+    The position itself is still the one measured from the camera, like in TimestampedRobotPositionMessage.
+    """
+
+    def __init__(
+        self,
+        position: Point3D,
+        color_id: int,
+        frame_sequence: int,
+        latency_us: int,
+        pitch: float,
+        yaw: float,
+        time_of_flight: float,
+        capture_time_us: int = 0,
+        clock_synced: bool = False,
+    ):
+        super().__init__(position, color_id, frame_sequence, latency_us, capture_time_us, clock_synced)
+        self.pitch = pitch
+        self.yaw = yaw
+        self.time_of_flight = time_of_flight
+
+    def getID(self) -> int:
+        """
+        Returns the unique message ID for AimMessage.
+        ID: 0x05
+        """
+        return 0x05
+
+    def getPayload(self) -> bytes:
+        """
+        Returns:
+            bytes: The TimestampedRobotPositionMessage payload followed by pitch, yaw and time of flight as floats,
+            in little-endian format.
+        """
+        return super().getPayload() + struct.pack("<fff", self.pitch, self.yaw, self.time_of_flight)
+
+
+class ClockSyncRequestMessage(DJIMessage):
+    """
+    Sent to the MCB to start one round of clock synchronization.
+    The MCB is expected to answer with a ClockSyncResponseMessage echoing the request ID and send time,
+    along with its own clock reading when the request arrived.
+    """
+
+    def __init__(self, request_id: int, send_time_us: int):
+        """
+        Args:
+            request_id (int): Identifier used to match the response to this request (0 - 255).
+            send_time_us (int): Coprocessor clock when the request was sent, in microseconds.
+        """
+        self.request_id = request_id
+        self.send_time_us = send_time_us
+
+    def getID(self) -> int:
+        """
+        Returns the unique message ID for ClockSyncRequestMessage.
+        ID: 0x03
+        """
+        return 0x03
+
+    def getPayload(self) -> bytes:
+        return struct.pack("<BI", self.request_id & 0xFF, self.send_time_us & 0xFFFFFFFF)
+
+
+class ClockSyncResponseMessage(DJIMessage):
+    """
+    Reply from the MCB to a ClockSyncRequestMessage.
+    """
+
+    ID = 0x04
+    PAYLOAD_FORMAT = "<BII"
+
+    def __init__(self, request_id: int, request_time_us: int, mcb_time_us: int):
+        """
+        Args:
+            request_id (int): The ID of the request being answered.
+            request_time_us (int): The send time from the request, echoed back.
+            mcb_time_us (int): MCB clock when the request was received, in microseconds.
+        """
+        self.request_id = request_id
+        self.request_time_us = request_time_us
+        self.mcb_time_us = mcb_time_us
+
+    def getID(self) -> int:
+        """
+        Returns the unique message ID for ClockSyncResponseMessage.
+        ID: 0x04
+        """
+        return self.ID
+
+    def getPayload(self) -> bytes:
+        return struct.pack(self.PAYLOAD_FORMAT, self.request_id, self.request_time_us, self.mcb_time_us)
+
+    @classmethod
+    def fromPayload(cls, payload: bytes) -> "ClockSyncResponseMessage":
+        return cls(*struct.unpack(cls.PAYLOAD_FORMAT, payload))
+
+
+class GimbalStateMessage(DJIMessage):
+    """
+    Sent by the MCB to tell the coprocessor where the gimbal is pointing, used to level the camera's measurements
+    before solving the aim point, see communication.GimbalState.
+    """
+
+    ID = 0x06
+    PAYLOAD_FORMAT = "<f"
+
+    def __init__(self, pitch: float):
+        """
+        Args:
+            pitch (float): Gimbal pitch in radians from level, up is positive.
+        """
+        self.pitch = pitch
+
+    def getID(self) -> int:
+        """
+        Returns the unique message ID for GimbalStateMessage.
+        ID: 0x06
+        """
+        return self.ID
+
+    def getPayload(self) -> bytes:
+        return struct.pack(self.PAYLOAD_FORMAT, self.pitch)
+
+    @classmethod
+    def fromPayload(cls, payload: bytes) -> "GimbalStateMessage":
+        return cls(*struct.unpack(cls.PAYLOAD_FORMAT, payload))
+
+
+def parseMessage(data: bytes) -> Optional[Tuple[int, int, bytes]]:
+    """
+    Parses a complete message following the DJI serial protocol, the inverse of DJIMessage.createMessage.
+
+    Args:
+        data (bytes): The full binary message, starting at the head byte.
+
+    Returns:
+        (message_id, sequence_num, payload) if the message is well formed and both CRCs match, None otherwise.
+    """
+    if len(data) < DJIMessage.OVERHEAD_SIZE or data[0] != DJIMessage.HEAD_BYTE:
+        return None
+
+    payload_len, sequence_num = struct.unpack_from("<HB", data, 1)
+    if len(data) != DJIMessage.OVERHEAD_SIZE + payload_len:
+        return None
+
+    if calculateCRC8(data[:4]) != data[4]:
+        return None
+
+    if calculateCRC16(data[:-2]) != struct.unpack_from("<H", data, len(data) - 2)[0]:
+        return None
+
+    (message_id,) = struct.unpack_from("<H", data, DJIMessage.HEADER_SIZE)
+    payload = bytes(data[DJIMessage.HEADER_SIZE + 2 : -2])
+
+    return message_id, sequence_num, payload
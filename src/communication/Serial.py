@@ -16,8 +16,15 @@ You should have received a copy of the GNU Affero General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
+import struct
+import time
+from typing import Optional, Tuple
+
 import serial
 
+from .CRC import calculateCRC8
+from .Message import DJIMessage, parseMessage
+
 
 class Serial:
     """
@@ -45,6 +52,9 @@ class Serial:
         if not self.port.isOpen():
             self.port.open()
 
+        # Received bytes that weren't part of a message returned by readMessage yet
+        self.buffer = bytearray()
+
     def write(self, data: bytes):
         """
         Sends binary data over the serial port.
@@ -53,3 +63,69 @@ class Serial:
             data (bytes): The binary data to be transmitted.
         """
         self.port.write(data)
+
+    def readMessage(self, timeout: float) -> Optional[Tuple[int, int, bytes]]:
+        """
+        Reads the next valid DJI protocol message from the serial port.
+        Bytes that don't form a valid message (wrong head byte, bad CRC) are skipped, see takeMessage.
+
+        Args:
+            timeout (float): Maximum time to wait for a message, in seconds.
+
+        Returns:
+            (message_id, sequence_num, payload) of the message, or None if no valid message arrived in time.
+        """
+        deadline = time.perf_counter() + timeout
+        previous_timeout = self.port.timeout
+
+        try:
+            while True:
+                message = self.takeMessage()
+                if message is not None:
+                    return message
+
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    return None
+                self.port.timeout = remaining
+                data = self.port.read(max(1, self.port.in_waiting))
+                if len(data) == 0:
+                    return None
+                self.buffer += data
+        finally:
+            self.port.timeout = previous_timeout
+
+    def takeMessage(self) -> Optional[Tuple[int, int, bytes]]:
+        """
+        Takes the first valid message out of the bytes received so far, None if there's no complete one yet.
+
+        When a head byte turns out not to start a message (bad CRC), only that byte is dropped and the search
+        continues right after it, so a message that starts inside the bad one (e.g. after a byte was lost on the
+        line) isn't thrown away with it.
+        """
+        buffer = self.buffer
+        while True:
+            start = buffer.find(DJIMessage.HEAD_BYTE)
+            if start < 0:
+                buffer.clear()
+                return None
+            del buffer[:start]
+
+            if len(buffer) < DJIMessage.HEADER_SIZE:
+                return None
+            if calculateCRC8(buffer[:4]) != buffer[4]:
+                del buffer[:1]
+                continue
+
+            (payload_len,) = struct.unpack_from("<H", buffer, 1)
+            size = DJIMessage.OVERHEAD_SIZE + payload_len
+            if len(buffer) < size:
+                return None
+
+            message = parseMessage(bytes(buffer[:size]))
+            if message is None:
+                del buffer[:1]
+                continue
+
+            del buffer[:size]
+            return message
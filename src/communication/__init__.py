@@ -1,5 +1,30 @@
+from .ClockSync import ClockSync
 from .CRC import calculateCRC8, calculateCRC16
-from .Message import DJIMessage, RobotPositionMessage
+from .GimbalState import GimbalState
+from .Message import (
+    AimMessage,
+    ClockSyncRequestMessage,
+    ClockSyncResponseMessage,
+    DJIMessage,
+    GimbalStateMessage,
+    RobotPositionMessage,
+    TimestampedRobotPositionMessage,
+    parseMessage,
+)
 from .Serial import Serial
 
-__all__ = ["calculateCRC8", "calculateCRC16", "DJIMessage", "RobotPositionMessage", "Serial"]
+__all__ = [
+    "AimMessage",
+    "calculateCRC8",
+    "calculateCRC16",
+    "ClockSync",
+    "ClockSyncRequestMessage",
+    "ClockSyncResponseMessage",
+    "DJIMessage",
+    "GimbalState",
+    "GimbalStateMessage",
+    "parseMessage",
+    "RobotPositionMessage",
+    "Serial",
+    "TimestampedRobotPositionMessage",
+]
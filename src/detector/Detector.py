@@ -16,13 +16,105 @@ You should have received a copy of the GNU Affero General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
+import hashlib
+import os
+import platform
+import threading
+import time
 from abc import ABC, abstractmethod
 from typing import List
 
+import cv2
+import numpy as np
 import onnxruntime as ort
 
+from .InferenceBackend import InferenceBackend, outputsMatch
+from .ONNXRuntimeBackend import ONNXRuntimeBackend
+from .OpenCVBackend import OpenCVBackend
 from .Target import Target
 
+BACKENDS = ["onnxruntime", "opencv"]
+
+# What copySessionOptions carries over. SessionOptions can't be copied and can't list its config entries, so these are
+# the settings and entries this code base (see util.createSessionOptions) and ONNXRuntime's thread tuning use
+SESSION_OPTION_ATTRIBUTES = [
+    "intra_op_num_threads",
+    "inter_op_num_threads",
+    "execution_mode",
+    "execution_order",
+    "graph_optimization_level",
+    "enable_cpu_mem_arena",
+    "enable_mem_pattern",
+    "enable_mem_reuse",
+    "enable_profiling",
+    "profile_file_prefix",
+    "log_severity_level",
+    "log_verbosity_level",
+    "logid",
+    "use_deterministic_compute",
+    "use_per_session_threads",
+]
+SESSION_CONFIG_KEYS = [
+    "session.intra_op.allow_spinning",
+    "session.inter_op.allow_spinning",
+    "session.intra_op_thread_affinities",
+    "session.disable_prepacking",
+    "session.set_denormal_as_zero",
+    "session.use_env_allocators",
+]
+
+# Lines of /proc/cpuinfo that identify the CPU: the model on x86, the implementer and part on ARM, and the instruction
+# set extensions on both
+CPUINFO_FIELDS = ["model name", "flags", "CPU implementer", "CPU part", "Features"]
+
+
+def feedMatches(inputs, feed: dict) -> bool:
+    """
+    Whether feed has the shapes of inputs, (name, shape) as in InferenceBackend.inputs. Dynamic dimensions match any size.
+    """
+    for name, shape in inputs:
+        array = feed.get(name)
+        if array is None or len(array.shape) != len(shape):
+            return False
+        if any(isinstance(d, int) and d != size for d, size in zip(shape, array.shape)):
+            return False
+    return True
+
+
+def copySessionOptions(session_options: ort.SessionOptions) -> ort.SessionOptions:
+    """
+    New SessionOptions with the settings of session_options, see SESSION_OPTION_ATTRIBUTES and SESSION_CONFIG_KEYS.
+    """
+    options = ort.SessionOptions()
+    for attribute in SESSION_OPTION_ATTRIBUTES:
+        setattr(options, attribute, getattr(session_options, attribute))
+    for key in SESSION_CONFIG_KEYS:
+        try:
+            options.add_session_config_entry(key, session_options.get_session_config_entry(key))
+        except RuntimeError:
+            # Not set
+            pass
+    return options
+
+
+def getCPUIdentity() -> str:
+    """
+    The architecture, model and instruction set extensions of the CPU. ONNXRuntime picks kernels for the instruction
+    set while optimizing, so a model optimized on one CPU isn't guaranteed to run on another.
+    """
+    fields = {}
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                name = name.strip()
+                # Only the first core, they're all the same
+                if name in CPUINFO_FIELDS and name not in fields:
+                    fields[name] = value.strip()
+    except OSError:
+        fields["processor"] = platform.processor()
+    return f"{platform.machine()}:{fields}"
+
 
 class Detector(ABC):
     """
@@ -32,11 +124,474 @@ class Detector(ABC):
     This is using the ONNXRuntime library, which is a library used to load and run ONNX models.
     ONNX is an open source standard for storing machine learning models. We use this library to run inference on the image to find targets.
     Alternative libraries are TensorFlow and PyTorch.
+
+    The model can also be run with OpenCV's DNN module instead, or whichever of the two is faster, see createBackend.
+    The model can be replaced while running with loadModel, see there.
     """
 
-    def __init__(self, model_path: str):
+    # Weight of the newest run in the smoothed inference latency
+    LATENCY_SMOOTHING = 0.1
+    # Runs of each backend when picking the fastest, the first are untimed warmup
+    BACKEND_WARMUP_RUNS = 3
+    BACKEND_TIMED_RUNS = 10
+
+    def __init__(
+        self,
+        model_path: str,
+        providers=None,
+        session_options: ort.SessionOptions = None,
+        cache_directory: str = None,
+        shared_weights: bool = False,
+        backend: str = "onnxruntime",
+    ):
+        """
+        args:
+            model_path (str): Path to the ONNX model.
+            providers: Execution providers to use instead of configureProviders, e.g. ["CPUExecutionProvider"].
+            session_options (ort.SessionOptions): Optional session settings, e.g. the number of threads to use.
+            cache_directory (str): Optional directory to cache the optimized model in, see createSession.
+            shared_weights (bool): Share the weights with other processes using the same model, see createSession.
+            backend (str): "onnxruntime", "opencv" or "auto" for the fastest, see createBackend.
+        """
         super().__init__()
-        self.model = ort.InferenceSession(model_path, providers=self.configureProviders())
+        if providers is None:
+            providers = self.configureProviders()
+        self.shared_weights = shared_weights
+        self.model: InferenceBackend = self.createBackend(
+            model_path, backend, providers, session_options, cache_directory
+        )
+        self.model_path = model_path
+
+        # Smoothed latency of self.model.run and the last input it was run on, for judging a new model against
+        self.latency_ns = None
+        self.last_feed = None
+        self.last_output_shapes = None
+
+        # Model switching, see loadModel
+        self.pending_model = None
+        self.previous_model = None
+        self.loading = False
+        self.trial_latencies = []
+        self.trial_frames = 0
+        self.max_slowdown = 1.0
+        # Set when the model on trial failed, it's rolled back before the next frame, see swapPendingModel
+        self.rollback_reason = None
+
+    def runModel(self, feed: dict) -> list:
+        """
+        Runs the model, the only place subclasses should call self.model.run from. Swaps in a model loaded with
+        loadModel between two runs, and rolls it back if it turns out to be slower or gives different outputs.
+        The outputs are overwritten by the next run, see InferenceBackend.
+
+        A model with a different input size can't take a feed formatted for the current one, subclasses swap it in
+        before formatting the next frame instead, see swapPendingModel.
+        """
+        self.swapPendingModel(feed)
+
+        start = time.perf_counter_ns()
+        outputs = self.model.run(feed)
+        elapsed = time.perf_counter_ns() - start
+        output_shapes = self.getOutputSignature(outputs)
+
+        if self.previous_model is not None:
+            if output_shapes != self.last_output_shapes:
+                self.rollback_reason = f"output shapes {output_shapes} instead of {self.last_output_shapes}"
+                # Rerun on the old model if the feed fits it, otherwise this frame keeps the new model's outputs
+                if feedMatches(self.previous_model[0].inputs, feed):
+                    return self.runModel(feed)
+                return outputs
+            self.checkTrial(elapsed)
+        else:
+            if self.latency_ns is None:
+                self.latency_ns = elapsed
+            self.latency_ns += self.LATENCY_SMOOTHING * (elapsed - self.latency_ns)
+            self.last_output_shapes = output_shapes
+
+        self.last_feed = feed
+        return outputs
+
+    def loadModel(
+        self,
+        model_path: str,
+        providers=None,
+        session_options: ort.SessionOptions = None,
+        cache_directory: str = None,
+        warmup_runs: int = 10,
+        trial_frames: int = 30,
+        max_slowdown: float = 1.25,
+    ) -> threading.Thread:
+        """
+        Loads a new model (or the same model with new providers or options) on a background thread and switches to it
+        without stopping the loop. It's run with the same backend as the current model.
+            1. The session is created and warmed up on the most recent real input, so engines are built and memory
+               is allocated before it sees a frame.
+            2. It's rejected if the detector can't take its inputs (acceptsInputs), its outputs have a different
+               shape (getOutputSignature), or it's more than max_slowdown times slower than the current model on
+               the same input while warming up (on its own input size, if that's different).
+            3. Otherwise it replaces the current model between two runs.
+            4. For the first trial_frames frames the old session is kept. If the new model gives outputs of a
+               different shape, or is more than max_slowdown times slower over those frames, the old one is put back.
+
+        returns:
+            The loading thread, join it to wait for the new model to be ready (or rejected).
+        """
+        if self.loading:
+            raise RuntimeError("A model is already being loaded")
+
+        self.loading = True
+        thread = threading.Thread(
+            target=self.prepareModel,
+            args=(
+                model_path,
+                providers,
+                session_options,
+                cache_directory,
+                warmup_runs,
+                trial_frames,
+                max_slowdown,
+            ),
+            name="model-loader",
+            daemon=True,
+        )
+        thread.start()
+        return thread
+
+    def prepareModel(
+        self, model_path, providers, session_options, cache_directory, warmup_runs, trial_frames, max_slowdown
+    ):
+        try:
+            if providers is None:
+                providers = self.configureProviders()
+            session = self.createBackend(
+                model_path, self.model.name, providers, session_options, cache_directory
+            )
+
+            if not self.acceptsInputs(session.inputs):
+                print(f"Rejected model {model_path}: inputs {session.inputs} don't match {self.model.inputs}")
+                return
+
+            # Warm up on the last frame, or a made up one if there wasn't any yet or it's the wrong size
+            current_feed = self.last_feed or self.createWarmupFeed(self.model.inputs)
+            feed = (
+                current_feed
+                if feedMatches(session.inputs, current_feed)
+                else self.createWarmupFeed(session.inputs)
+            )
+
+            output_shapes = self.getOutputSignature(session.run(feed))
+            current_output_shapes = self.getOutputSignature(self.model.run(current_feed))
+            if output_shapes != current_output_shapes:
+                print(
+                    f"Rejected model {model_path}: outputs {output_shapes} don't match {current_output_shapes}"
+                )
+                return
+
+            # Time the current model on the same input in between, the loop is running alongside and slows both
+            # down the same way, so only the ratio means anything
+            current = self.model
+            latencies = []
+            current_latencies = []
+            for _ in range(warmup_runs):
+                start = time.perf_counter_ns()
+                session.run(feed)
+                latencies.append(time.perf_counter_ns() - start)
+
+                start = time.perf_counter_ns()
+                current.run(current_feed)
+                current_latencies.append(time.perf_counter_ns() - start)
+
+            # The first runs include one time setup, judge by the rest
+            latency_ns = float(np.median(latencies[len(latencies) // 2 :]))
+            current_latency_ns = float(np.median(current_latencies[len(current_latencies) // 2 :]))
+            if latency_ns > current_latency_ns * max_slowdown:
+                print(
+                    f"Rejected model {model_path}: {latency_ns / 1e6:.2f} ms per run while warming up, "
+                    f"current model takes {current_latency_ns / 1e6:.2f} ms"
+                )
+                return
+
+            self.trial_frames = trial_frames
+            self.max_slowdown = max_slowdown
+            self.pending_model = (session, model_path)
+            print(f"Model {model_path} is ready, {latency_ns / 1e6:.2f} ms per run while warming up")
+        except Exception as e:
+            print(f"Failed to load model {model_path}: {e}")
+        finally:
+            self.loading = False
+
+    def swapPendingModel(self, feed: dict = None):
+        """
+        Swaps in the model loaded with loadModel, or rolls back a model that failed its trial. Subclasses whose
+        input depends on the model call this before formatting a frame, so frames are always formatted for the
+        model that runs them. With a feed, only swaps to a model that can run it.
+        """
+        if self.rollback_reason is not None and (
+            feed is None or feedMatches(self.previous_model[0].inputs, feed)
+        ):
+            self.rollBack(self.rollback_reason)
+        if self.pending_model is not None and (
+            feed is None or feedMatches(self.pending_model[0].inputs, feed)
+        ):
+            self.swapModel()
+
+    def swapModel(self):
+        session, model_path = self.pending_model
+        self.pending_model = None
+        self.previous_model = (self.model, self.model_path)
+        self.model = session
+        self.model_path = model_path
+        self.trial_latencies = []
+        self.modelChanged()
+        print(f"Switched to model {model_path}")
+
+    def modelChanged(self):
+        """
+        Called after another model was swapped in or rolled back, for subclasses that depend on the model's inputs.
+        """
+
+    def acceptsInputs(self, inputs) -> bool:
+        """
+        Whether a model with these inputs can replace the current one, see loadModel.
+        """
+        return inputs == self.model.inputs
+
+    def getOutputSignature(self, outputs) -> list:
+        """
+        The part of the output shapes a replacement model has to keep. The batch dimension is left out, it
+        changes with the number of frames run together.
+        """
+        return [output.shape[1:] for output in outputs]
+
+    def checkTrial(self, elapsed: int):
+        self.trial_latencies.append(elapsed)
+        if len(self.trial_latencies) < self.trial_frames:
+            return
+
+        latency_ns = float(np.median(self.trial_latencies))
+        if self.latency_ns is not None and latency_ns > self.latency_ns * self.max_slowdown:
+            self.rollback_reason = (
+                f"{latency_ns / 1e6:.2f} ms per run, previous model took {self.latency_ns / 1e6:.2f} ms"
+            )
+            return
+
+        # The new model is kept, its latency is the new reference
+        self.latency_ns = latency_ns
+        self.previous_model = None
+        print(f"Kept model {self.model_path}, {latency_ns / 1e6:.2f} ms per run")
+
+    def rollBack(self, reason: str):
+        print(f"Rolling back model {self.model_path}: {reason}")
+        self.model, self.model_path = self.previous_model
+        self.previous_model = None
+        self.rollback_reason = None
+        self.modelChanged()
+
+    def createBackend(
+        self, model_path: str, backend: str, providers, session_options, cache_directory
+    ) -> InferenceBackend:
+        """
+        Creates the backend to run the model with, one of BACKENDS, or "auto" to benchmark all of them on startup:
+        each runs the same warmup input (createWarmupFeed), any whose outputs don't match the first backend's are
+        dropped, and the one with the lowest median latency is used. Which engine is fastest depends on the
+        machine and how OpenCV and ONNXRuntime were built, so this picks it without editing the code.
+
+        Loading every backend and timing them takes several times longer than loading one, so with a cache
+        directory the choice is saved next to the cached model and reused on later boots, under the same name (see
+        getCacheName). Delete the .backend file to time them again.
+        """
+        choice_path = None
+        if backend == "auto" and cache_directory is not None:
+            choice_path = os.path.join(cache_directory, f"{self.getCacheName(model_path, providers)}.backend")
+            if os.path.exists(choice_path):
+                with open(choice_path) as f:
+                    chosen = f.read().strip()
+                if chosen in BACKENDS:
+                    try:
+                        chosen_backend = self.createBackend(
+                            model_path, chosen, providers, session_options, cache_directory
+                        )
+                        print(f"Using backend {chosen}, chosen on an earlier boot ({choice_path})")
+                        return chosen_backend
+                    except Exception as e:
+                        print(
+                            f"Backend {chosen} chosen on an earlier boot failed to load ({e}), timing them again"
+                        )
+
+        names = BACKENDS if backend == "auto" else [backend]
+        candidates = []
+        inputs = None
+        for name in names:
+            try:
+                match name:
+                    case "onnxruntime":
+                        session = self.createSession(
+                            model_path, providers, session_options, cache_directory, self.shared_weights
+                        )
+                        candidate = ONNXRuntimeBackend(session)
+                    case "opencv":
+                        provider_names = [p[0] if isinstance(p, tuple) else p for p in providers]
+                        use_cuda = (
+                            "CUDAExecutionProvider" in provider_names
+                            and cv2.cuda.getCudaEnabledDeviceCount() > 0
+                        )
+                        candidate = OpenCVBackend(model_path, inputs or self.readInputs(model_path), use_cuda)
+                    case _:
+                        raise ValueError(f"Unknown backend {name}, expected one of {BACKENDS} or auto")
+            except Exception as e:
+                if len(names) == 1:
+                    raise
+                print(f"Backend {name} failed to load: {e}")
+                continue
+
+            inputs = candidate.inputs
+            candidates.append(candidate)
+
+        if len(candidates) == 0:
+            raise RuntimeError(f"No backend could load {model_path}")
+        if len(names) == 1:
+            return candidates[0]
+
+        feed = self.createWarmupFeed(inputs)
+        reference = None
+        best, best_latency_ns = None, None
+        for candidate in candidates:
+            for _ in range(self.BACKEND_WARMUP_RUNS):
+                outputs = candidate.run(feed)
+
+            if reference is None:
+                reference = [output.copy() for output in outputs]
+            elif not outputsMatch(outputs, reference):
+                print(f"Backend {candidate.name} skipped, its outputs don't match {candidates[0].name}")
+                continue
+
+            latencies = []
+            for _ in range(self.BACKEND_TIMED_RUNS):
+                start = time.perf_counter_ns()
+                candidate.run(feed)
+                latencies.append(time.perf_counter_ns() - start)
+
+            latency_ns = float(np.median(latencies))
+            print(f"Backend {candidate.name}: {latency_ns / 1e6:.2f} ms per run")
+            if best is None or latency_ns < best_latency_ns:
+                best, best_latency_ns = candidate, latency_ns
+
+        print(f"Using backend {best.name}")
+        if choice_path is not None:
+            os.makedirs(cache_directory, exist_ok=True)
+            with open(choice_path, "w") as f:
+                f.write(best.name)
+        return best
+
+    def createWarmupFeed(self, inputs) -> dict:
+        """
+        An input to warm up and compare backends on. Random rather than zeros, so every weight of the model
+        affects the outputs. Dynamic dimensions are set to 1.
+        """
+        generator = np.random.default_rng(0)
+        return {
+            name: generator.uniform(0, 255, [d if isinstance(d, int) else 1 for d in shape]).astype(
+                np.float32
+            )
+            for name, shape in inputs
+        }
+
+    @staticmethod
+    def readInputs(model_path: str):
+        """
+        Reads the (name, shape) of each input of a model, for backends that can't tell themselves.
+        """
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+        session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        return [(i.name, i.shape) for i in session.get_inputs()]
+
+    @staticmethod
+    def getCacheName(model_path: str, providers) -> str:
+        """
+        Name for what's cached about model_path (see createSession and createBackend): the model's name and a hash
+        of the model file, ONNXRuntime version, available providers and CPU (see getCPUIdentity).
+        """
+        provider_names = [provider[0] if isinstance(provider, tuple) else provider for provider in providers]
+        available = [name for name in provider_names if name in ort.get_available_providers()]
+        stat = os.stat(model_path)
+        key = (
+            f"{os.path.abspath(model_path)}:{stat.st_size}:{stat.st_mtime_ns}:{ort.__version__}:{available}:"
+            f"{getCPUIdentity()}"
+        )
+        name = os.path.splitext(os.path.basename(model_path))[0]
+        return f"{name}.{hashlib.sha1(key.encode()).hexdigest()[:12]}"
+
+    @staticmethod
+    def createSession(
+        model_path: str, providers, session_options=None, cache_directory=None, shared_weights=False
+    ) -> ort.InferenceSession:
+        """
+        ONNXRuntime optimizes the model graph every time a session is created. With a cache directory, the optimized
+        model is saved the first time and loaded as is afterwards, which skips the optimization on later boots.
+
+        The cached model is specific to the model file, ONNXRuntime version, providers and CPU (see getCPUIdentity),
+        all of which are part of its name. session_options isn't changed, the settings the cache needs are made on
+        a copy (see copySessionOptions). TensorRT compiles the model into an engine instead, which it caches on its own (see
+        configureProviders), so nothing is cached here when it's used.
+
+        With shared_weights, the weights of the optimized model are saved to a separate file that ONNXRuntime
+        memory maps instead of copying, and prepacking (which makes a private, rearranged copy of them) is turned off.
+        Every process loading the model then shares one copy of the weights through the page cache, so an extra
+        worker only adds its activations and runtime. The cache directory defaults to "cache" next to the model.
+        When starting several workers at once, call this once beforehand so they don't all write the files.
+        """
+        provider_names = [provider[0] if isinstance(provider, tuple) else provider for provider in providers]
+        available = [name for name in provider_names if name in ort.get_available_providers()]
+        if shared_weights and cache_directory is None:
+            cache_directory = os.path.join(os.path.dirname(model_path), "cache")
+        if cache_directory is None or "TensorrtExecutionProvider" in available:
+            return ort.InferenceSession(model_path, sess_options=session_options, providers=providers)
+
+        session_options = (
+            copySessionOptions(session_options) if session_options is not None else ort.SessionOptions()
+        )
+        suffix = ".shared" if shared_weights else ""
+        cached_path = os.path.join(
+            cache_directory, f"{Detector.getCacheName(model_path, providers)}{suffix}.onnx"
+        )
+
+        if shared_weights:
+            session_options.add_session_config_entry("session.disable_prepacking", "1")
+
+        if os.path.exists(cached_path):
+            try:
+                session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+                return ort.InferenceSession(cached_path, sess_options=session_options, providers=providers)
+            except Exception as e:
+                # Most likely a write that was cut short, rebuild it
+                print(f"Cached model {cached_path} failed to load ({e}), recreating it")
+                os.remove(cached_path)
+                session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        os.makedirs(cache_directory, exist_ok=True)
+        if not shared_weights:
+            session_options.optimized_model_filepath = cached_path
+            session = ort.InferenceSession(model_path, sess_options=session_options, providers=providers)
+            print(f"Saved optimized model to {cached_path}")
+            return session
+
+        # The weights file is found relative to the model, so the model can be written under a temporary name and
+        # renamed once complete, other processes never see it half written
+        writer_options = ort.SessionOptions()
+        writer_options.optimized_model_filepath = cached_path + ".tmp"
+        writer_options.add_session_config_entry(
+            "session.optimized_model_external_initializers_file_name",
+            os.path.basename(cached_path).replace(".onnx", ".weights"),
+        )
+        writer_options.add_session_config_entry(
+            "session.optimized_model_external_initializers_min_size_in_bytes", "1024"
+        )
+        ort.InferenceSession(model_path, sess_options=writer_options, providers=providers)
+        os.replace(cached_path + ".tmp", cached_path)
+        print(f"Saved optimized model with shared weights to {cached_path}")
+
+        session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+        return ort.InferenceSession(cached_path, sess_options=session_options, providers=providers)
 
     @abstractmethod
     def processInput(self, input) -> List[Target]:
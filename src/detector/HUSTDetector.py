@@ -1,9 +1,12 @@
-from typing import List
+import math
+import time
+from typing import List, Optional, Tuple
 
 import cv2
 import numpy as np
 from cv2.typing import MatLike
 
+from telemetry import metrics, recordStage
 from util import Point2D
 
 from .Detector import Detector
@@ -18,27 +21,191 @@ class HUSTDetector(Detector):
     https://github.com/HUSTLYRM/HUST_HeroAim_2024/blob/main/src/armor_detector/src/Inference.cpp
     """
 
+    # Input size of the square model, and the long side of rectangular inputs, see fitInputShape
     INPUT_SIZE = 416
+    # Downsampling of each output grid of the model, input sizes have to be a multiple of the largest
+    STRIDES = [8, 16, 32]
     BOUNDING_BOX_CONFIDENCE_THRESHOLD = 0.85
 
     color_to_word = ["Blue", "Red", "Neutral", "Purple"]
     tag_to_word = ["Sentry", "1", "2", "3", "4", "5", "Outpost", "Base"]
 
-    def __init__(self, model_path: str) -> None:
-        super().__init__(model_path)
-        self.offsets = self.generateOffsets()
+    def __init__(
+        self,
+        model_path: str,
+        providers=None,
+        session_options=None,
+        cache_directory=None,
+        shared_weights=False,
+        backend="onnxruntime",
+        input_shape: Optional[Tuple[int, int]] = None,
+    ) -> None:
+        """
+        args:
+            input_shape: (height, width) to run models with dynamic spatial axes at, e.g. fitInputShape(1280, 800).
+                Models with a fixed input size always run at that size. Defaults to INPUT_SIZE x INPUT_SIZE.
+        """
+        self.requested_input_shape = input_shape
+        super().__init__(model_path, providers, session_options, cache_directory, shared_weights, backend)
+        self.modelChanged()
+
+        self.preprocess_latency = metrics.histogram("preprocess")
+        self.inference_latency = metrics.histogram("inference")
+        self.decode_latency = metrics.histogram("decode")
+        self.merge_latency = metrics.histogram("merge")
 
         # Warmup the model to build/cache anything needed for processing
-        input_shape = (1, 3, self.INPUT_SIZE, self.INPUT_SIZE)
+        input_shape = (1, 3, self.input_height, self.input_width)
         dummy_input = np.zeros(input_shape, dtype=np.float32)
-        self.model.run(None, {"images": dummy_input})
-
-    def processInput(self, input: MatLike) -> List[Target]:
-        input, scalar_h, scalar_w, x_offset, y_offset = self.formatInput(input)
-
-        output = self.model.run(None, {"images": input})
+        self.model.run({"images": dummy_input})
+
+    def modelChanged(self):
+        """
+        Sets the input size, offsets and batching for the current model, models loaded while running (see
+        Detector.loadModel) may have another input size.
+        """
+        input_shape = self.requested_input_shape
+        model_height, model_width = self.model.inputs[0][1][2:]
+        if isinstance(model_height, int) and isinstance(model_width, int):
+            if input_shape is not None and tuple(input_shape) != (model_height, model_width):
+                print(
+                    f"{self.model_path} has a fixed {model_width}x{model_height} input, using it instead of "
+                    f"{input_shape[1]}x{input_shape[0]}, see detector.ModelExport"
+                )
+            input_shape = (model_height, model_width)
+        elif input_shape is None:
+            input_shape = (self.INPUT_SIZE, self.INPUT_SIZE)
+
+        if input_shape[0] % self.STRIDES[-1] or input_shape[1] % self.STRIDES[-1]:
+            raise ValueError(f"Input shape {input_shape} isn't a multiple of {self.STRIDES[-1]}")
+        self.input_height, self.input_width = input_shape
+        self.offsets = self.generateOffsets()
+        # Models exported with a dynamic batch size have a named batch dimension instead of 1
+        self.dynamic_batch = isinstance(self.model.inputs[0][1][0], str)
+
+    def acceptsInputs(self, inputs) -> bool:
+        # Any image input works, formatInput and the offsets follow the model's size once it's swapped in
+        return (
+            len(inputs) == 1
+            and inputs[0][0] == "images"
+            and len(inputs[0][1]) == 4
+            and inputs[0][1][1] == 3
+            and all(isinstance(d, str) or d % self.STRIDES[-1] == 0 for d in inputs[0][1][2:])
+        )
+
+    def getOutputSignature(self, outputs) -> list:
+        # The number of rows follows the input size, only the values per row have to stay the same
+        return [output.shape[2:] for output in outputs]
+
+    @classmethod
+    def fitInputShape(cls, width: int, height: int, long_side: Optional[int] = None) -> Tuple[int, int]:
+        """
+        Returns the smallest (height, width) input with the aspect ratio of width x height frames, long_side
+        (INPUT_SIZE by default) on the long side and both a multiple of the largest stride.
+
+        A 1280x800 frame letterboxed into a 416x416 input is more than a third padding, into a 416x288 one
+        about a tenth. The model runs on fewer pixels and the frame is shrunk as much as before.
+        """
+        long_side = long_side or cls.INPUT_SIZE
+        stride = cls.STRIDES[-1]
+        short_side = math.ceil(long_side * min(width, height) / max(width, height) / stride) * stride
+        return (short_side, long_side) if width >= height else (long_side, short_side)
+
+    def createWarmupFeed(self, inputs) -> dict:
+        # Dynamic spatial axes would otherwise be warmed up at 1x1
+        height, width = self.requested_input_shape or (self.INPUT_SIZE, self.INPUT_SIZE)
+        inputs = [
+            (
+                name,
+                [*shape[:2], *(d if isinstance(d, int) else s for d, s in zip(shape[2:], (height, width)))],
+            )
+            for name, shape in inputs
+        ]
+        return super().createWarmupFeed(inputs)
+
+    def processInput(self, input: MatLike, roi: Optional[Tuple[int, int, int, int]] = None) -> List[Target]:
+        """
+        Finds targets in the image.
+
+        args:
+            input: The camera frame.
+            roi: Optional (x, y, width, height) region of the frame to run the detector on, see getRegionOfInterest.
+                Target points are still returned in full frame coordinates.
+        """
+        start = time.perf_counter_ns()
+
+        if roi is None:
+            formatted = self.formatInput(input)
+        else:
+            x, y, width, height = roi
+            input, scalar_h, scalar_w, x_offset, y_offset = self.formatInput(
+                input[y : y + height, x : x + width]
+            )
+            formatted = (input, scalar_h, scalar_w, x_offset + x, y_offset + y)
+
+        recordStage(self.preprocess_latency, start, time.perf_counter_ns())
+        return self.processFormattedInput(*formatted)
+
+    def getRegionOfInterest(self, target: Target, image_width: int, image_height: int, scale: float = 4.0):
+        """
+        Returns a (x, y, width, height) region centered on target with the aspect ratio of the model input, scale
+        times the size of the target and no smaller than the model input. Running on this region skips padding and
+        shrinking the full frame, which is cheaper and gives the plate more pixels, at the cost of not seeing
+        anything outside of it.
+        """
+        xs = [vertex.x for vertex in target.rect.vertices]
+        ys = [vertex.y for vertex in target.rect.vertices]
+
+        # Size of the region in model inputs
+        factor = max(
+            (max(xs) - min(xs)) * scale / self.input_width,
+            (max(ys) - min(ys)) * scale / self.input_height,
+            1.0,
+        )
+        factor = min(factor, image_width / self.input_width, image_height / self.input_height)
+        width = int(self.input_width * factor)
+        height = int(self.input_height * factor)
+
+        center = target.getCenter()
+        x = int(min(max(center.x - width / 2, 0), image_width - width))
+        y = int(min(max(center.y - height / 2, 0), image_height - height))
+
+        return x, y, width, height
+
+    # Runs the model on the output of formatInput, split out so callers can release the frame before inference
+    def processFormattedInput(self, input, scalar_h, scalar_w, x_offset, y_offset) -> List[Target]:
+        start = time.perf_counter_ns()
+        output = self.runModel({"images": input})
         output = np.array(output)[0][0]
-
+        inference_end = time.perf_counter_ns()
+        recordStage(self.inference_latency, start, inference_end)
+
+        return self.decodeOutput(output, scalar_h, scalar_w, x_offset, y_offset, inference_end)
+
+    def processFormattedBatch(self, batch: List[tuple]) -> List[List[Target]]:
+        """
+        Runs the model on several outputs of formatInput. Models exported with a dynamic batch size run them all
+        at once, others run them one after the other.
+        """
+        if not self.dynamic_batch:
+            return [self.processFormattedInput(*formatted) for formatted in batch]
+
+        start = time.perf_counter_ns()
+        inputs = np.concatenate([formatted[0] for formatted in batch])
+        outputs = self.runModel({"images": inputs})[0]
+        inference_end = time.perf_counter_ns()
+        recordStage(self.inference_latency, start, inference_end)
+
+        return [
+            self.decodeOutput(output, *formatted[1:], time.perf_counter_ns())
+            for output, formatted in zip(outputs, batch)
+        ]
+
+    def decodeOutput(self, output, scalar_h, scalar_w, x_offset, y_offset, start: int) -> List[Target]:
+        """
+        Turns the model output for one image into targets in the coordinates of the original image.
+        start is when decoding started, for the latency histograms.
+        """
         targets: List[Target] = self.getTargetsFromOutput(output)
 
         # Scale the targets back to the original image size
@@ -48,37 +215,49 @@ class HUSTDetector(Detector):
                 vertices[i].x = vertices[i].x * scalar_w + x_offset
                 vertices[i].y = vertices[i].y * scalar_h + y_offset
 
+        decode_end = time.perf_counter_ns()
+        recordStage(self.decode_latency, start, decode_end)
+
         targets = mergeListOfTargets(targets)
+        recordStage(self.merge_latency, decode_end, time.perf_counter_ns())
 
         return targets
 
-    # Format input to target expected model input of (1, 3, 416, 416)
+    # Format input to target expected model input of (1, 3, input_height, input_width)
     def formatInput(self, img: MatLike):
+        # A model loaded while running is swapped in here, before anything is formatted for the old one
+        self.swapPendingModel()
+
         h, w = img.shape[:2]
         x_offset = 0
         y_offset = 0
 
-        if w > h:
-            # Letterbox: pad top/bottom to make square, preserving full width
-            pad_top = (w - h) // 2
-            pad_bottom = w - h - pad_top
-            img = cv2.copyMakeBorder(img, pad_top, pad_bottom, 0, 0, cv2.BORDER_CONSTANT, value=(0, 0, 0))
-            y_offset = -pad_top
-        elif h > w:
-            # Letterbox: pad left/right to make square, preserving full height
-            pad_left = (h - w) // 2
-            pad_right = h - w - pad_left
-            img = cv2.copyMakeBorder(img, 0, 0, pad_left, pad_right, cv2.BORDER_CONSTANT, value=(0, 0, 0))
+        # Letterbox: pad the short side to the aspect ratio of the model input, preserving the full frame
+        padded_h = max(h, math.ceil(w * self.input_height / self.input_width))
+        padded_w = max(w, math.ceil(h * self.input_width / self.input_height))
+        if padded_h > h or padded_w > w:
+            pad_top = (padded_h - h) // 2
+            pad_left = (padded_w - w) // 2
+            img = cv2.copyMakeBorder(
+                img,
+                pad_top,
+                padded_h - h - pad_top,
+                pad_left,
+                padded_w - w - pad_left,
+                cv2.BORDER_CONSTANT,
+                value=(0, 0, 0),
+            )
             x_offset = -pad_left
+            y_offset = -pad_top
 
         # Resize the image to the input size of the model
-        scalar_h = img.shape[0] / self.INPUT_SIZE
-        scalar_w = img.shape[1] / self.INPUT_SIZE
+        scalar_h = img.shape[0] / self.input_height
+        scalar_w = img.shape[1] / self.input_width
 
-        # Image shape is resized to (416, 416, 3)
-        img = cv2.resize(img, (self.INPUT_SIZE, self.INPUT_SIZE))
+        # Image shape is resized to (input_height, input_width, 3)
+        img = cv2.resize(img, (self.input_width, self.input_height))
 
-        # Model input expects (1, 3, 416, 416), conversion to NCHW
+        # Model input expects (1, 3, input_height, input_width), conversion to NCHW
         img = img.transpose((2, 0, 1))
         img = np.expand_dims(img, axis=0)
 
@@ -137,11 +316,10 @@ class HUSTDetector(Detector):
         return targets
 
     def generateOffsets(self):
-        STRIDES = [8, 16, 32]
         output = []
-        for scalar in STRIDES:
-            grid_h = self.INPUT_SIZE // scalar
-            grid_w = self.INPUT_SIZE // scalar
+        for scalar in self.STRIDES:
+            grid_h = self.input_height // scalar
+            grid_w = self.input_width // scalar
             for y in range(grid_h):
                 for x in range(grid_w):
                     output.append((x, y, scalar))
@@ -0,0 +1,84 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+class InferenceBackend(ABC):
+    """
+    Runs an ONNX model with some inference engine, so the detector doesn't depend on which one.
+
+    Every backend keeps the same contract:
+        - inputs lists the (name, shape) of each model input, dynamic dimensions are strings.
+        - run takes a feed of contiguous float32 arrays by input name and returns the outputs in model order.
+        - Outputs are written into arrays that are allocated on the first run with a given input shape and reused
+          afterwards, so a run allocates nothing. They're overwritten by the next run on the same thread, copy
+          anything that has to outlive it. Each thread gets its own arrays, so a model can be timed on a
+          background thread (see Detector.loadModel) while the loop is using it.
+    """
+
+    # Shown in the logs and accepted by Detector as the backend to use
+    name = ""
+
+    def __init__(self):
+        # (thread, input shapes) -> state of the backend for that key, usually the output arrays
+        self.prepared: Dict[Tuple, object] = {}
+
+    @property
+    @abstractmethod
+    def inputs(self) -> List[Tuple[str, list]]:
+        pass
+
+    def run(self, feed: Dict[str, np.ndarray]) -> List[np.ndarray]:
+        key = (threading.get_ident(), *(array.shape for array in feed.values()))
+        prepared = self.prepared.get(key)
+        if prepared is None:
+            outputs, self.prepared[key] = self.runFirst(feed)
+            return outputs
+        return self.runPrepared(feed, prepared)
+
+    @abstractmethod
+    def runFirst(self, feed: Dict[str, np.ndarray]) -> Tuple[List[np.ndarray], object]:
+        """
+        Runs the model on a new input shape, returns the outputs and what runPrepared needs to run it again.
+        """
+
+    @abstractmethod
+    def runPrepared(self, feed: Dict[str, np.ndarray], prepared) -> List[np.ndarray]:
+        """
+        Runs the model on an input shape that was seen before, writing into the outputs prepared by runFirst.
+        """
+
+
+def outputsMatch(outputs: List[np.ndarray], reference: List[np.ndarray], tolerance: float = 0.01) -> bool:
+    """
+    True if outputs have the same shapes as reference and no value is further off than tolerance times the
+    largest reference value. Loose enough for FP16 engines, tight enough to catch a wrong layout or broken op.
+    """
+    if [output.shape for output in outputs] != [output.shape for output in reference]:
+        return False
+
+    for output, expected in zip(outputs, reference):
+        scale = max(float(np.max(np.abs(expected))), 1.0) if expected.size else 1.0
+        if not np.all(np.abs(output - expected) <= tolerance * scale):
+            return False
+    return True
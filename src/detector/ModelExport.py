@@ -0,0 +1,77 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Makes the spatial axes of a fixed size model dynamic, so it can run on rectangular inputs that match the camera's
+aspect ratio instead of a padded square, see HUSTDetector.fitInputShape.
+
+Usage (from src):
+    python -m detector.ModelExport detector/models/HUST_model.onnx detector/models/HUST_model_dynamic.onnx
+"""
+
+import argparse
+
+import numpy as np
+import onnxruntime as ort
+
+from .HUSTDetector import HUSTDetector
+
+
+def makeSpatialAxesDynamic(model_path: str, output_path: str):
+    """
+    Renames the height and width of every image input to dynamic axes, along with the number of output rows.
+    This only works for fully convolutional models whose reshapes don't hardcode the grid size, which is checked by
+    running the result on a rectangular input.
+    """
+    # Only needed here, not to run models
+    import onnx
+
+    model = onnx.load(model_path)
+    for value in model.graph.input:
+        dims = value.type.tensor_type.shape.dim
+        if len(dims) == 4:
+            dims[2].dim_param = "height"
+            dims[3].dim_param = "width"
+    for value in model.graph.output:
+        dims = value.type.tensor_type.shape.dim
+        if len(dims) == 3:
+            dims[1].dim_param = "rows"
+
+    # Shapes inferred for the fixed size would contradict the dynamic ones
+    del model.graph.value_info[:]
+    onnx.checker.check_model(model)
+    onnx.save(model, output_path)
+
+    height, width = HUSTDetector.fitInputShape(1280, 800)
+    session = ort.InferenceSession(output_path, providers=["CPUExecutionProvider"])
+    output = session.run(None, {session.get_inputs()[0].name: np.zeros((1, 3, height, width), np.float32)})[0]
+    expected_rows = sum((height // stride) * (width // stride) for stride in HUSTDetector.STRIDES)
+    if output.shape[1] != expected_rows:
+        raise ValueError(
+            f"{model_path} gives {output.shape[1]} rows for a {width}x{height} input instead of {expected_rows}, "
+            "it needs to be re-exported with dynamic axes"
+        )
+    print(f"Saved {output_path}, checked on a {width}x{height} input")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Make the input size of an ONNX model dynamic")
+    parser.add_argument("model", help="Model with a fixed input size")
+    parser.add_argument("output", help="Where to save the model with dynamic axes")
+    args = parser.parse_args()
+    makeSpatialAxesDynamic(args.model, args.output)
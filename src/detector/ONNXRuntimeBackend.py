@@ -0,0 +1,62 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+import onnxruntime as ort
+
+from .InferenceBackend import InferenceBackend
+
+
+class ONNXRuntimeBackend(InferenceBackend):
+    """
+    Runs the model with an ONNXRuntime session, see Detector.createSession for how it's created.
+    Inputs and outputs are bound with IOBinding, which skips allocating and copying the outputs on every run.
+    """
+
+    name = "onnxruntime"
+
+    def __init__(self, session: ort.InferenceSession):
+        super().__init__()
+        self.session = session
+        self.output_names = [output.name for output in session.get_outputs()]
+
+    @property
+    def inputs(self) -> List[Tuple[str, list]]:
+        return [(i.name, i.shape) for i in self.session.get_inputs()]
+
+    @property
+    def providers(self) -> List[str]:
+        return self.session.get_providers()
+
+    def runFirst(self, feed: Dict[str, np.ndarray]):
+        outputs = self.session.run(None, feed)
+
+        # The outputs of this run become the buffers of every later one
+        binding = self.session.io_binding()
+        for name, output in zip(self.output_names, outputs):
+            binding.bind_output(name, "cpu", 0, output.dtype, output.shape, output.ctypes.data)
+        return outputs, (binding, outputs)
+
+    def runPrepared(self, feed: Dict[str, np.ndarray], prepared) -> List[np.ndarray]:
+        binding, outputs = prepared
+        for name, array in feed.items():
+            binding.bind_cpu_input(name, np.ascontiguousarray(array))
+        self.session.run_with_iobinding(binding)
+        return outputs
@@ -0,0 +1,71 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import threading
+from typing import Dict, List, Tuple
+
+import cv2
+import numpy as np
+
+from .InferenceBackend import InferenceBackend
+
+
+class OpenCVBackend(InferenceBackend):
+    """
+    Runs the model with OpenCV's DNN module. It has less overhead per run than ONNXRuntime and needs nothing
+    besides OpenCV, which can make it the faster choice on small CPUs or builds without a fitting ONNXRuntime.
+
+    OpenCV doesn't report the input shapes of a model, so they're passed in (usually read with ONNXRuntime).
+    Its thread count is set globally with cv2.setNumThreads, session options don't apply.
+
+    args:
+        model_path (str): Path to the ONNX model.
+        inputs: (name, shape) of each model input, see InferenceBackend.inputs.
+        use_cuda (bool): Run on the GPU, requires OpenCV built with CUDA.
+    """
+
+    name = "opencv"
+
+    def __init__(self, model_path: str, inputs: List[Tuple[str, list]], use_cuda: bool = False):
+        super().__init__()
+        self.net = cv2.dnn.readNetFromONNX(model_path)
+        if use_cuda:
+            self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_CUDA)
+            self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CUDA)
+        self.model_inputs = inputs
+        self.output_names = list(self.net.getUnconnectedOutLayersNames())
+        # A net holds the input and intermediate blobs of the run in progress, it can only run one at a time
+        self.lock = threading.Lock()
+
+    @property
+    def inputs(self) -> List[Tuple[str, list]]:
+        return self.model_inputs
+
+    def runFirst(self, feed: Dict[str, np.ndarray]):
+        with self.lock:
+            for name, array in feed.items():
+                self.net.setInput(array, name)
+            outputs = list(self.net.forward(self.output_names))
+        return outputs, outputs
+
+    def runPrepared(self, feed: Dict[str, np.ndarray], outputs) -> List[np.ndarray]:
+        with self.lock:
+            for name, array in feed.items():
+                self.net.setInput(array, name)
+            self.net.forward(self.output_names, outputs)
+        return outputs
@@ -1,5 +1,17 @@
 from .Detector import Detector
 from .HUSTDetector import HUSTDetector
+from .InferenceBackend import InferenceBackend, outputsMatch
+from .ONNXRuntimeBackend import ONNXRuntimeBackend
+from .OpenCVBackend import OpenCVBackend
 from .Target import Target, mergeListOfTargets
 
-__all__ = ["Detector", "Target", "mergeListOfTargets", "HUSTDetector"]
+__all__ = [
+    "Detector",
+    "Target",
+    "mergeListOfTargets",
+    "HUSTDetector",
+    "InferenceBackend",
+    "ONNXRuntimeBackend",
+    "OpenCVBackend",
+    "outputsMatch",
+]
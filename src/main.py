@@ -16,71 +16,489 @@ You should have received a copy of the GNU Affero General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
-import cv2
-from line_profiler import profile
+import math
+import time
 
-from camera.Camera import OV9782_CONFIG, Camera
-from communication import RobotPositionMessage, Serial
+from util.StartupTimer import StartupTimer
+
+# Created first so the report covers the imports below
+startup = StartupTimer()
+
+from concurrent.futures import ThreadPoolExecutor
+
+from ballistics import BallisticConfig, BallisticTable
+from camera.Camera import OV9782_CONFIG, OV9782_TRACK_CONFIG, Camera
+from camera.CameraRig import CameraExtrinsics
+from camera.CameraWatchdog import CameraWatchdog
+from communication import (
+    AimMessage,
+    ClockSync,
+    GimbalState,
+    RobotPositionMessage,
+    Serial,
+    TimestampedRobotPositionMessage,
+)
 from detector import HUSTDetector
 from pose_estimator.TargetPositionEstimator import TargetPositionEstimator
-from rules import CenterTargetRule, TargetSelector
-from util import FrameRateTracker, Point3D, putTextOnImage
+from rules import CenterTargetRule
+from telemetry import ConsoleSink, MetricsExporter, UDPSink, metrics, recordStage, tracer
+from tuning import LiveTuning, TuningConfig
+from util import (
+    DeadlineScheduler,
+    GCController,
+    PlacementProfile,
+    Point3D,
+    ThrottledLogger,
+    applyPlacement,
+    createSessionOptions,
+)
 
-# Enable additional print info
-# This does slow down main loop, do not enable in deployment
+startup.mark("imports")
+
+# Enable additional print info and the debug stream, can be changed while running, see TUNING_CONTROL_ADDRESS
+# Printing and drawing is throttled and done off the main loop, but still costs some CPU, do not enable in deployment
 DEBUG = True
+# Where to serve the debug stream, view it at http://<coprocessor ip>:8080/
+DEBUG_STREAM_ADDRESS = ("0.0.0.0", 8080)
+
+# Send the frame sequence number and capture latency along with the position, see TimestampedRobotPositionMessage.
+# Requires MCB support, the MCB must parse message type 0x02 instead of the plain RobotPositionMessage
+SEND_TIMESTAMPS = False
+# Run the clock sync handshake at startup so capture times can be sent in the MCB clock, requires MCB support
+SYNC_CLOCK = False
+
+# Also send the barrel pitch, yaw and time of flight to hit the target, solved with the ballistic table, see AimMessage.
+# Requires MCB support. The position is moved from the camera to the gimbal with CAMERA_EXTRINSICS and leveled with the
+# gimbal pitch before solving, see toBarrelFrame
+SEND_AIM = False
+# Where the camera sits relative to the gimbal's pitch axis while the gimbal is level. The barrel is assumed to fire from
+# the pitch axis
+CAMERA_EXTRINSICS = CameraExtrinsics(translation=(0.0, 0.0, 0.0))
+# Level positions with the gimbal pitch sent by the MCB (GimbalStateMessage), requires MCB support. Otherwise the gimbal
+# is assumed to be level and the aim pitch is off by however far it's tilted
+READ_GIMBAL_PITCH = False
+BALLISTICS = BallisticConfig(muzzle_velocity_mps=25.0)
+# Where ballistic tables are saved the first time they're computed, see BallisticTable.load
+BALLISTICS_CACHE_DIRECTORY = "ballistics/cache"
+
+# Latency budget from frame capture to the end of the loop, work is shed to stay within it, see DeadlineScheduler
+DEADLINE_MS = 20.0
+
+# How the garbage collector runs once the loop is warmed up: "default", "tuned" or "manual", see util.GCController
+GC_MODE = "manual"
+
+# Stage latencies and counters are sent here every second as JSON, see telemetry.UDPSink
+METRICS_UDP_ADDRESS = ("127.0.0.1", 9870)
+
+# Tracing is started with `kill -USR1 <pid>` or `echo "trace 5" | nc -u -w0 127.0.0.1 9871`, see telemetry.Tracer
+TRACE_SECONDS = 5.0
+TRACE_CONTROL_ADDRESS = ("127.0.0.1", 9871)
+
+# Thresholds, target selection rules, camera settings and DEBUG can be changed while running by sending commands here,
+# e.g. `echo "set threshold 0.7" | nc -u -w1 127.0.0.1 9872`, see tuning.LiveTuning
+TUNING_CONTROL_ADDRESS = ("127.0.0.1", 9872)
+# Rules that can be added by name, and the rules used at startup as (name, weight)
+RULE_FACTORIES = {
+    "center": lambda: createCenterTargetRule(),
+}
+RULES = (("center", 1.0),)
+
+# Record frames and detections for reviewing after the match, written off the main loop, see recording.MatchRecorder
+RECORD_MATCH = False
+# "jpeg" or "raw", raw frames replay without decoding but take ~3MB each
+RECORDING_FORMAT = "jpeg"
+
+# Camera modes by name, see Camera.setMode. "search" is used while looking for targets and "track" while the target is
+# closer than TRACK_MODE_DISTANCE_M, where a lower resolution is plenty and captures and preprocesses faster
+CAMERA_MODES = {"search": OV9782_CONFIG, "track": OV9782_TRACK_CONFIG}
+# None to always stay in "search"
+TRACK_MODE_DISTANCE_M = None
+# Frames in a row a different mode has to be wanted before switching, so the mode doesn't flap around the threshold
+MODE_SWITCH_FRAMES = 30
+
+# Publish every frame's targets and pose to shared memory for other programs on the coprocessor, see
+# results.ResultsReader for reading them
+PUBLISH_RESULTS = True
+RESULTS_SHM_NAME = "huskybot_vision"
+
+# Play back a recording (video, image directory or raw frame file) instead of using the camera, see ReplaySource
+REPLAY_PATH = None
+# "fast", "realtime" or "step"
+REPLAY_MODE = "realtime"
+
+# Cores and scheduling policy of the main loop and of the background threads (debug stream, recorder, metrics),
+# see util.PlacementProfile. Real time policies need root or CAP_SYS_NICE and fall back to normal without it.
+PLACEMENT = {
+    "background": PlacementProfile(cores=[0]),
+    "loop": PlacementProfile(cores=[1, 2, 3], policy="fifo", priority=50),
+}
+
+# Where the optimized model is saved on the first boot and loaded from afterwards, see Detector.createSession
+MODEL_CACHE_DIRECTORY = "detector/models/cache"
+# Engine the model runs on: "onnxruntime", "opencv", or "auto" to time both at startup and use the fastest one whose
+# outputs match, see Detector.createBackend
+INFERENCE_BACKEND = "auto"
+MODEL_PATH = "detector/models/HUST_model.onnx"
+# Model input matching the camera's aspect ratio instead of a padded square. Only used by models with dynamic input
+# axes (made with detector.ModelExport), fixed size models run at their own size
+MODEL_INPUT_SHAPE = HUSTDetector.fitInputShape(CAMERA_MODES["search"].width, CAMERA_MODES["search"].height)
+
+capture_latency = metrics.histogram("capture")
+frame_counter = metrics.counter("frames")
+skipped_counter = metrics.counter("frames_skipped")
+detection_counter = metrics.counter("detections")
+
+
+def setup():
+    """
+    Creates everything the loop needs. The slow, independent parts (model, camera, calibration, serial port) are
+    created at the same time on a thread pool, so startup takes about as long as the slowest of them.
+    """
+    global detector, camera, pose_estimator, target_selector, serial, clock_sync, scheduler, gc_controller
+    global logger, streamer, recorder, exporter, tuning, camera_mode, mode_switch_frames, publisher, ballistic_table
+    global requested_model_path, gimbal_state
+
+    # Threads inherit the placement of the thread that starts them, so background threads are started first
+    applyPlacement("background", PLACEMENT.get("background"))
+
+    metric_sinks = [UDPSink(*METRICS_UDP_ADDRESS)]
+    streamer = None
+    if DEBUG:
+        metric_sinks.append(ConsoleSink())
+        startDebugOutput()
+
+    publisher = None
+    if PUBLISH_RESULTS:
+        from pipeline import ResultsPublisher
+
+        publisher = ResultsPublisher(RESULTS_SHM_NAME)
+
+    recorder = None
+    if RECORD_MATCH:
+        from recording import MatchRecorder
+
+        recorder = MatchRecorder(frame_format=RECORDING_FORMAT)
+
+    exporter = MetricsExporter(metrics, metric_sinks)
+    tracer.listenForSignal(TRACE_SECONDS)
+    tracer.startControlSocket(*TRACE_CONTROL_ADDRESS)
+    # Settings are filled in once the camera the rules need exists
+    tuning = LiveTuning(RULE_FACTORIES)
+    tuning.startControlSocket(*TUNING_CONTROL_ADDRESS)
+
+    # Everything from here on, including ONNXRuntime's thread pool, runs with the loop's placement
+    applyPlacement("loop", PLACEMENT.get("loop"))
+    startup.mark("background threads")
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        detector_future = pool.submit(
+            startup.run,
+            "detector",
+            HUSTDetector,
+            MODEL_PATH,
+            session_options=createSessionOptions(PLACEMENT.get("loop")),
+            cache_directory=MODEL_CACHE_DIRECTORY,
+            backend=INFERENCE_BACKEND,
+            input_shape=MODEL_INPUT_SHAPE,
+        )
+        camera_future = pool.submit(startup.run, "camera", createCamera)
+        estimator_future = pool.submit(
+            startup.run, "pose estimator", TargetPositionEstimator, "example_camera_calibration.json"
+        )
+        serial_future = pool.submit(startup.run, "serial", Serial, "/dev/ttyTHS1", 115200)
+        ballistics_future = None
+        if SEND_AIM:
+            ballistics_future = pool.submit(
+                startup.run, "ballistics", BallisticTable.load, BALLISTICS, BALLISTICS_CACHE_DIRECTORY
+            )
+
+        camera = camera_future.result()
+        pose_estimator = estimator_future.result()
+        serial = serial_future.result()
+        detector = detector_future.result()
+        ballistic_table = ballistics_future.result() if ballistics_future is not None else None
+
+    tuning.setConfig(
+        TuningConfig(
+            confidence_threshold=detector.BOUNDING_BOX_CONFIDENCE_THRESHOLD,
+            debug=DEBUG,
+            rules=RULES,
+            model_path=MODEL_PATH,
+        )
+    )
+    requested_model_path = MODEL_PATH
+    target_selector = tuning.config.selector
+    camera.addModeListener(pose_estimator.setImageSize)
+    camera.addConfigListener(lambda: tuning.reapplyCamera(camera))
+    camera_mode = "search"
+    mode_switch_frames = 0
+    clock_sync = ClockSync(serial)
+    scheduler = DeadlineScheduler(DEADLINE_MS)
+    gc_controller = GCController(GC_MODE)
+
+    if SYNC_CLOCK:
+        startup.run("clock sync", clock_sync.synchronize)
+    # Started after the clock sync, which reads from the same port
+    gimbal_state = None
+    if SEND_AIM and READ_GIMBAL_PITCH:
+        gimbal_state = GimbalState(serial)
+        gimbal_state.start()
+
+    startup.mark("setup")
 
-detector = HUSTDetector("detector/models/HUST_model.onnx")
-camera = Camera(OV9782_CONFIG)
-pose_estimator = TargetPositionEstimator("example_camera_calibration.json")
-target_selector = TargetSelector([CenterTargetRule(camera.width, camera.height)])
-serial = Serial("/dev/ttyTHS1", 115200)
 
-if DEBUG:
-    tracker = FrameRateTracker(1.0)
+def startDebugOutput():
+    global logger, streamer
+
+    # Only imported when used, to keep it out of the startup time
+    from util.DebugStreamer import DebugStreamer
+
+    logger = ThrottledLogger(1.0)
+    streamer = DebugStreamer(*DEBUG_STREAM_ADDRESS)
+
+
+def applyTuning(config: TuningConfig):
+    """
+    Applies a new version of the live tuning settings, called by the loop between frames.
+    """
+    global target_selector, requested_model_path
+
+    detector.BOUNDING_BOX_CONFIDENCE_THRESHOLD = config.confidence_threshold
+    if config.model_path != requested_model_path:
+        # Loaded and checked in the background, the detector swaps it in between two frames once it's ready
+        requested_model_path = config.model_path
+        try:
+            detector.loadModel(
+                config.model_path,
+                session_options=createSessionOptions(PLACEMENT.get("loop")),
+                cache_directory=MODEL_CACHE_DIRECTORY,
+            )
+        except RuntimeError as e:
+            print(f"Not switching to {config.model_path}: {e}")
+    target_selector = config.selector
+    if config.debug and streamer is None:
+        # Turned on while running, the streamer's thread gets the loop's placement
+        startDebugOutput()
+    tuning.applyCamera(camera, config)
+
+
+def createCenterTargetRule() -> CenterTargetRule:
+    rule = CenterTargetRule(camera.width, camera.height)
+    camera.addModeListener(rule.setImageSize)
+    return rule
+
+
+def updateCameraMode(target_position):
+    """
+    Switches to the "track" mode while a target is close and back to "search" otherwise, see CAMERA_MODES.
+    """
+    global camera_mode, mode_switch_frames
+
+    close = target_position is not None and target_position.getMagnitude() < TRACK_MODE_DISTANCE_M
+    wanted = "track" if close else "search"
+    if wanted == camera_mode:
+        mode_switch_frames = 0
+        return
+
+    mode_switch_frames += 1
+    if mode_switch_frames >= MODE_SWITCH_FRAMES:
+        camera.setMode(wanted)
+        camera_mode = wanted
+        mode_switch_frames = 0
+
+
+def createCamera():
+    if REPLAY_PATH:
+        from camera.ReplaySource import ReplaySource
+
+        return ReplaySource(REPLAY_PATH, REPLAY_MODE)
+    return CameraWatchdog(Camera(CAMERA_MODES["search"], modes=CAMERA_MODES))
+
 
 # Nav function
 # def sendRobotPosition(position: Point3D):
 #     message = RobotPositionMessage(position)
 #     serial.write(message.createMessage())
 
+
 # Aim based function
-def sendRobotPosition(position: Point3D, color_id: int):
+def createRobotPositionMessage(position: Point3D, color_id: int) -> bytes:
     message = RobotPositionMessage(position, color_id)
-    serial.write(message.createMessage())
+    return message.createMessage()
+
+
+# Aim based function, with timing info so the MCB can compensate for vision latency
+def createTimestampedRobotPositionMessage(
+    position: Point3D, color_id: int, frame_sequence: int, capture_time_ns: int
+) -> bytes:
+    message = TimestampedRobotPositionMessage(
+        position,
+        color_id,
+        frame_sequence,
+        latency_us=(time.perf_counter_ns() - capture_time_ns) // 1000,
+        capture_time_us=clock_sync.toRemoteMicros(capture_time_ns),
+        clock_synced=clock_sync.is_synchronized,
+    )
+    return message.createMessage(frame_sequence & 0xFF)
+
+
+def toBarrelFrame(position: Point3D) -> Point3D:
+    """
+    Moves a position measured by the camera to the gimbal's pitch axis and levels it with the current gimbal pitch,
+    since the ballistic table is solved from the barrel with gravity straight down.
+    """
+    position = CAMERA_EXTRINSICS.toRobotFrame(position)
+    pitch = gimbal_state.pitch if gimbal_state is not None else 0.0
+    cos_pitch, sin_pitch = math.cos(pitch), math.sin(pitch)
+    return Point3D(
+        position.x * cos_pitch - position.z * sin_pitch,
+        position.y,
+        position.x * sin_pitch + position.z * cos_pitch,
+    )
+
+
+# Aim based function, with the aim point solved here so the MCB doesn't have to
+def createAimMessage(position: Point3D, color_id: int, frame_sequence: int, capture_time_ns: int) -> bytes:
+    pitch, yaw, time_of_flight = ballistic_table.aim(toBarrelFrame(position))
+    message = AimMessage(
+        position,
+        color_id,
+        frame_sequence,
+        latency_us=(time.perf_counter_ns() - capture_time_ns) // 1000,
+        pitch=pitch,
+        yaw=yaw,
+        time_of_flight=time_of_flight,
+        capture_time_us=clock_sync.toRemoteMicros(capture_time_ns),
+        clock_synced=clock_sync.is_synchronized,
+    )
+    return message.createMessage(frame_sequence & 0xFF)
+
 
-@profile
 def main():
+    setup()
+    last_target = None
+    tuning_config = tuning.config
+
     while True:
+        # The settings are read once per frame, a change made mid frame is picked up by the next one
+        config = tuning.config
+        if config is not tuning_config:
+            tuning_config = config
+            applyTuning(tuning_config)
+
+        if scheduler.shouldSkipFrame():
+            camera.grab()
+            skipped_counter.add()
+            continue
+
+        capture_start_ns = time.perf_counter_ns()
         frame = camera.getFrame()
-        targets = detector.processInput(frame)
+        if frame is None:
+            # End of the recording when replaying, otherwise the camera is down and CameraWatchdog is reopening it
+            if REPLAY_PATH:
+                break
+            continue
+        recordStage(capture_latency, capture_start_ns, time.perf_counter_ns())
+        if frame_counter.value == 0:
+            startup.mark("first frame")
+        frame_counter.add()
+        frame_sequence = camera.frame_sequence
+        capture_time_ns = camera.last_capture_time_ns
+        scheduler.startFrame(capture_time_ns)
+
+        # When running behind, only look around where the target was last frame
+        roi = None
+        if scheduler.use_reduced_input and last_target is not None:
+            roi = detector.getRegionOfInterest(last_target, frame.shape[1], frame.shape[0])
+
+        targets = detector.processInput(frame, roi)
+        scheduler.endStage("detect")
 
         has_any_target = len(targets) > 0
+        detection_counter.add(len(targets))
+        last_target = None
+        best_target = None
+        # Only set when the best target's pose is estimated, never carried over from an earlier frame
+        target_position = None
 
         if has_any_target:
             best_target = target_selector.getBestTarget(targets)
-            _, target_rotation, target_position = pose_estimator.estimatePosition(best_target)
-            color_id = getattr(best_target, 'color_id', 0)
-            sendRobotPosition(target_position, color_id)
+            scheduler.endStage("select")
 
-        if DEBUG:
-            tracker.update()
+        # The selector can still come back empty handed, e.g. when no target passes its rules
+        if best_target is not None:
+            _, target_rotation, target_position = pose_estimator.estimatePosition(best_target)
+            scheduler.endStage("pose")
+            color_id = getattr(best_target, "color_id", 0)
+            if SEND_AIM:
+                data = createAimMessage(target_position, color_id, frame_sequence, capture_time_ns)
+            elif SEND_TIMESTAMPS:
+                data = createTimestampedRobotPositionMessage(
+                    target_position, color_id, frame_sequence, capture_time_ns
+                )
+            else:
+                data = createRobotPositionMessage(target_position, color_id)
+            scheduler.endStage("encode")
+            serial.write(data)
+            scheduler.endStage("write")
+            if not startup.done:
+                startup.finish("first message")
+            last_target = best_target
 
+        if tuning_config.debug and scheduler.run_debug:
             if has_any_target:
-                print("Found targets:")
-                for target in targets:
-                    print(target)
-                print("Best target:", best_target)
-                print("Target position:", target_position)
+                logger.log("targets", "Found targets:", *targets, sep="\n")
+            if best_target is not None:
+                logger.log("best", "Best target:", best_target, "Target position:", target_position)
+
+            # Drawing and encoding happens on the streamer's thread
+            streamer.publish(frame, targets)
+
+        if publisher is not None:
+            if best_target is not None:
+                publisher.publish(
+                    frame_sequence,
+                    capture_time_ns,
+                    targets,
+                    best_target,
+                    target_position,
+                    target_rotation,
+                    scheduler.level,
+                    reduced_input=roi is not None,
+                )
+            else:
+                publisher.publish(
+                    frame_sequence,
+                    capture_time_ns,
+                    targets,
+                    quality_level=scheduler.level,
+                    reduced_input=roi is not None,
+                )
+
+        if recorder is not None:
+            recorder.record(
+                frame,
+                frame_sequence,
+                capture_time_ns,
+                targets,
+                target_position,
+                time.perf_counter_ns() - capture_time_ns,
+                scheduler.level,
+            )
 
-            frame = putTextOnImage(frame, targets)
+        scheduler.endFrame()
+        # Collects garbage only if the frame finished early
+        gc_controller.endFrame(scheduler.slack_ns)
 
-            # cv2.imshow("Frame", frame)
-            # if cv2.waitKey(1) & 0xFF == ord("q"):
-            #     break
+        # Switching modes restarts the camera stream, done after the frame so it isn't counted against it
+        if TRACK_MODE_DISTANCE_M is not None:
+            updateCameraMode(target_position)
 
     camera.release()
-    # cv2.destroyAllWindows()
+    if recorder is not None:
+        recorder.stop()
+    if publisher is not None:
+        publisher.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,96 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Multi-camera version of main.py. Every camera in CAMERAS is captured on its own thread and shares one detector
+(see camera.CameraRig), targets from all cameras are compared in the robot frame and the best one is sent to the MCB.
+"""
+
+import time
+
+from camera.Camera import OV9782_CONFIG, Camera
+from camera.CameraRig import CameraExtrinsics, CameraRig, RigCamera
+from camera.CameraWatchdog import CameraWatchdog
+from communication import Serial, TimestampedRobotPositionMessage
+from detector import HUSTDetector
+from pose_estimator.TargetPositionEstimator import TargetPositionEstimator
+from rules import ClosestTargetRule, TargetSelector
+
+# name: (port, config, calibration file, extrinsics, priority, max fps)
+CAMERAS = {
+    "front": (
+        0,
+        OV9782_CONFIG,
+        "example_camera_calibration.json",
+        CameraExtrinsics((0.1, 0.0, 0.05)),
+        3.0,
+        None,
+    ),
+    "rear": (
+        2,
+        OV9782_CONFIG,
+        "example_camera_calibration.json",
+        CameraExtrinsics((-0.1, 0.0, 0.05), 180),
+        1.0,
+        30,
+    ),
+}
+
+# Frames run through the detector at once, models without a dynamic batch size run them one after the other
+BATCH_SIZE = 2
+
+
+def main():
+    cameras = [
+        RigCamera(
+            name,
+            CameraWatchdog(Camera(config, port)),
+            TargetPositionEstimator(calibration),
+            extrinsics,
+            priority,
+            max_fps,
+        )
+        for name, (port, config, calibration, extrinsics, priority, max_fps) in CAMERAS.items()
+    ]
+    detector = HUSTDetector("detector/models/HUST_model.onnx")
+    target_selector = TargetSelector([ClosestTargetRule()])
+    serial = Serial("/dev/ttyTHS1", 115200)
+
+    rig = CameraRig(cameras, detector, BATCH_SIZE)
+    rig.start()
+
+    try:
+        while True:
+            targets = rig.process()
+            if not targets:
+                continue
+
+            best_target = target_selector.getBestTarget(targets)
+            message = TimestampedRobotPositionMessage(
+                best_target.position,
+                best_target.color_id,
+                best_target.frame_sequence,
+                latency_us=(time.perf_counter_ns() - best_target.capture_time_ns) // 1000,
+            )
+            serial.write(message.createMessage(best_target.frame_sequence & 0xFF))
+    finally:
+        rig.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Multi-process version of main.py. Capture and inference run in their own processes (see pipeline.PipelineRunner),
+while this process picks the best target, estimates its position and sends it to the MCB.
+"""
+
+import time
+
+from camera.Camera import OV9782_CONFIG
+from communication import Serial, TimestampedRobotPositionMessage
+from pipeline import PipelineConfig, PipelineRunner
+from pose_estimator.TargetPositionEstimator import TargetPositionEstimator
+from rules import CenterTargetRule, TargetSelector
+from util import PlacementProfile, applyPlacement
+
+# Cores and scheduling policy of each process, see util.PlacementProfile
+PLACEMENT = {
+    "main": PlacementProfile(cores=[0]),
+    "capture": PlacementProfile(cores=[1], policy="fifo", priority=60),
+    "inference": PlacementProfile(cores=[2, 3], policy="fifo", priority=50),
+}
+
+
+def main():
+    applyPlacement("main", PLACEMENT.get("main"))
+    config = PipelineConfig(OV9782_CONFIG, "detector/models/HUST_model.onnx", placement=PLACEMENT)
+
+    pose_estimator = TargetPositionEstimator("example_camera_calibration.json")
+    target_selector = TargetSelector([CenterTargetRule(OV9782_CONFIG.width, OV9782_CONFIG.height)])
+    serial = Serial("/dev/ttyTHS1", 115200)
+
+    with PipelineRunner(config) as runner:
+        while True:
+            result = runner.getDetections(timeout=1.0)
+            if result is None:
+                continue
+
+            frame_sequence, capture_time_ns, targets = result
+            if len(targets) == 0:
+                continue
+
+            best_target = target_selector.getBestTarget(targets)
+            _, _, target_position = pose_estimator.estimatePosition(best_target)
+
+            message = TimestampedRobotPositionMessage(
+                target_position,
+                best_target.color_id,
+                frame_sequence,
+                latency_us=(time.perf_counter_ns() - capture_time_ns) // 1000,
+            )
+            serial.write(message.createMessage(frame_sequence & 0xFF))
+
+
+if __name__ == "__main__":
+    main()
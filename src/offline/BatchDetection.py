@@ -0,0 +1,210 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import glob
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List
+
+import cv2
+import numpy as np
+import onnxruntime as ort
+
+from camera.ReplaySource import createReader
+from detector import HUSTDetector
+from pipeline.SharedDetectionBuffer import TARGET_COLUMNS, targetsToRows
+
+SHARD_EXTENSION = ".npz"
+
+
+@dataclass
+class Shard:
+    """
+    A range of frames [start, end) of one input, the unit of work handed to a worker.
+    """
+
+    source: str
+    start: int
+    end: int
+
+    @property
+    def name(self) -> str:
+        # Unique per shard and stable between runs, used as the output file name so finished shards can be skipped
+        source = os.path.abspath(self.source).strip(os.sep).replace(os.sep, "_")
+        return f"{source}_{self.start:08d}_{self.end:08d}"
+
+
+def expandInputs(paths: List[str]) -> List[str]:
+    """
+    Splits recordings made by recording.MatchRecorder into their chunk files, so each can be sharded on its own.
+    """
+    inputs = []
+    for path in paths:
+        chunks = sorted(
+            glob.glob(os.path.join(path, "frames_*.frames")) + glob.glob(os.path.join(path, "frames_*.avi"))
+        )
+        inputs.extend(chunks if os.path.isdir(path) and len(chunks) > 0 else [path])
+    return inputs
+
+
+def createShards(paths: List[str], shard_frames: int) -> List[Shard]:
+    shards = []
+    for source in expandInputs(paths):
+        num_frames = len(createReader(source, fps=1.0))
+        for start in range(0, num_frames, shard_frames):
+            shards.append(Shard(source, start, min(start + shard_frames, num_frames)))
+    return shards
+
+
+# Each worker process keeps its own detector, created once by initializeWorker
+worker_detector = None
+worker_max_targets = 0
+
+
+def initializeWorker(model_path: str, num_threads: int, max_targets: int, shared_weights: bool = False):
+    global worker_detector, worker_max_targets
+
+    # Workers already use every core between them, more threads inside a worker only fight over them
+    cv2.setNumThreads(1)
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = num_threads
+    options.inter_op_num_threads = 1
+
+    worker_detector = HUSTDetector(
+        model_path, ["CPUExecutionProvider"], options, shared_weights=shared_weights
+    )
+    worker_max_targets = max_targets
+
+
+def readFrames(shard: Shard, frames: queue.Queue, counts: Dict[str, int]):
+    """
+    Decodes the frames of a shard and formats them for the model, runs on its own thread so decoding overlaps
+    with inference. Frames that can't be decoded are skipped and counted in counts["unreadable"].
+
+    The last item put on the queue is None once every frame was read, or the exception that stopped reading.
+    """
+    error = None
+    try:
+        reader = createReader(shard.source, fps=1.0)
+        reader.seek(shard.start)
+        for index in range(shard.start, shard.end):
+            result = reader.read()
+            if result is None:
+                break
+            if result[0] is None:
+                counts["unreadable"] += 1
+                continue
+            frames.put((index, worker_detector.formatInput(result[0])))
+    except Exception as e:
+        error = e
+    finally:
+        # Always sent, runShard waits for it
+        frames.put(error)
+
+
+def runShard(shard: Shard, output_directory: str, batch_size: int) -> Dict:
+    """
+    Runs the detector on every frame of shard and saves the detections as columns in an npz file.
+    """
+    start_time = time.perf_counter()
+
+    frames = queue.Queue(maxsize=batch_size * 2)
+    counts = {"unreadable": 0}
+    threading.Thread(target=readFrames, args=(shard, frames, counts), daemon=True).start()
+
+    frame_indices = []
+    num_targets = []
+    targets = []
+
+    done = False
+    while not done:
+        batch = []
+        while len(batch) < batch_size:
+            item = frames.get()
+            if isinstance(item, Exception):
+                raise RuntimeError(f"Reading {shard.source} failed") from item
+            if item is None:
+                done = True
+                break
+            batch.append(item)
+        if len(batch) == 0:
+            break
+
+        results = worker_detector.processFormattedBatch([formatted for _, formatted in batch])
+        for (index, _), result in zip(batch, results):
+            rows = np.zeros((worker_max_targets, TARGET_COLUMNS), dtype=np.float32)
+            frame_indices.append(index)
+            num_targets.append(targetsToRows(result, rows))
+            targets.append(rows)
+
+    # Written under a temporary name first, so a shard interrupted mid write isn't mistaken for a finished one
+    path = os.path.join(output_directory, shard.name + SHARD_EXTENSION)
+    temporary_path = path + ".tmp" + SHARD_EXTENSION
+    np.savez(
+        temporary_path,
+        source=np.array(shard.source),
+        frame_index=np.array(frame_indices, dtype=np.int64),
+        num_targets=np.array(num_targets, dtype=np.int32),
+        targets=np.array(targets, dtype=np.float32).reshape(-1, worker_max_targets, TARGET_COLUMNS),
+    )
+    os.replace(temporary_path, path)
+
+    return {
+        "shard": shard.name,
+        "worker": os.getpid(),
+        "frames": len(frame_indices),
+        "unreadable": counts["unreadable"],
+        "seconds": time.perf_counter() - start_time,
+    }
+
+
+# Pool.imap only passes a single argument. A failed shard is reported instead of stopping the whole run, it isn't
+# written so the next run retries it
+def runShardTask(task: tuple) -> Dict:
+    try:
+        return runShard(*task)
+    except Exception as e:
+        error = str(e) if e.__cause__ is None else f"{e}: {e.__cause__!r}"
+        return {"shard": task[0].name, "worker": os.getpid(), "error": error}
+
+
+def isShardDone(shard: Shard, output_directory: str) -> bool:
+    return os.path.exists(os.path.join(output_directory, shard.name + SHARD_EXTENSION))
+
+
+def loadResults(output_directory: str) -> Dict[str, np.ndarray]:
+    """
+    Loads every finished shard in output_directory into one set of columns, in order of source and frame
+    (shard names sort that way). The source column holds the input path of each frame.
+    """
+    columns = {"source": [], "frame_index": [], "num_targets": [], "targets": []}
+    for path in sorted(glob.glob(os.path.join(output_directory, "*" + SHARD_EXTENSION))):
+        if path.endswith(".tmp" + SHARD_EXTENSION):
+            continue
+        with np.load(path) as shard:
+            columns["source"].append(np.full(len(shard["frame_index"]), str(shard["source"]), dtype=object))
+            for name in ("frame_index", "num_targets", "targets"):
+                columns[name].append(shard[name])
+
+    if len(columns["source"]) == 0:
+        return {}
+
+    return {name: np.concatenate(parts) for name, parts in columns.items()}
@@ -0,0 +1,3 @@
+from .BatchDetection import Shard, createShards, loadResults, runShard
+
+__all__ = ["createShards", "loadResults", "runShard", "Shard"]
@@ -0,0 +1,112 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Runs the detector over recorded footage, spread across every core.
+
+Usage (from src):
+    python -m offline footage/ match.avi recordings/20250101_120000 --output detections/
+Run the same command again to resume, shards that were already written are skipped.
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import time
+from collections import defaultdict
+
+from detector import Detector
+
+from .BatchDetection import createShards, initializeWorker, isShardDone, runShardTask
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the detector over videos, image directories and recordings"
+    )
+    parser.add_argument("inputs", nargs="+", help="Videos, image directories, raw frame files or recordings")
+    parser.add_argument("--output", required=True, help="Directory to write the detections to")
+    parser.add_argument("--model", default="detector/models/HUST_model.onnx", help="ONNX model to run")
+    parser.add_argument(
+        "--workers", type=int, help="Worker processes, defaults to cores / threads per worker"
+    )
+    parser.add_argument(
+        "--threads-per-worker", type=int, default=1, help="ONNXRuntime threads in each worker"
+    )
+    parser.add_argument("--batch-size", type=int, default=8, help="Frames per inference call")
+    parser.add_argument("--shard-frames", type=int, default=1000, help="Frames per unit of work")
+    parser.add_argument("--max-targets", type=int, default=16, help="Targets stored per frame")
+    parser.add_argument(
+        "--shared-weights",
+        action="store_true",
+        help="Share one copy of the model weights between the workers, see Detector.createSession",
+    )
+    args = parser.parse_args()
+
+    workers = args.workers or max(os.cpu_count() // args.threads_per_worker, 1)
+    os.makedirs(args.output, exist_ok=True)
+
+    shards = createShards(args.inputs, args.shard_frames)
+    remaining = [shard for shard in shards if not isShardDone(shard, args.output)]
+    print(f"{len(shards)} shards, {len(shards) - len(remaining)} already done, running on {workers} workers")
+
+    if args.shared_weights:
+        # Write the shared model once up front, instead of every worker racing to write it
+        Detector.createSession(args.model, ["CPUExecutionProvider"], shared_weights=True)
+
+    start_time = time.perf_counter()
+    worker_frames = defaultdict(int)
+    worker_seconds = defaultdict(float)
+    failed = []
+
+    # spawn so each worker starts clean instead of inheriting the parent's ONNXRuntime and OpenCV thread pools
+    context = mp.get_context("spawn")
+    with context.Pool(
+        workers,
+        initializeWorker,
+        (args.model, args.threads_per_worker, args.max_targets, args.shared_weights),
+    ) as pool:
+        results = pool.imap_unordered(
+            runShardTask, [(shard, args.output, args.batch_size) for shard in remaining]
+        )
+        for done, result in enumerate(results, 1):
+            if "error" in result:
+                failed.append(result["shard"])
+                print(f"[{done}/{len(remaining)}] {result['shard']}: failed, {result['error']}")
+                continue
+
+            worker_frames[result["worker"]] += result["frames"]
+            worker_seconds[result["worker"]] += result["seconds"]
+            unreadable = f", skipped {result['unreadable']} unreadable" if result["unreadable"] else ""
+            print(
+                f"[{done}/{len(remaining)}] {result['shard']}: {result['frames']} frames, "
+                f"{result['frames'] / result['seconds']:.1f} fps{unreadable}"
+            )
+
+    elapsed = time.perf_counter() - start_time
+    total_frames = sum(worker_frames.values())
+    for worker, frames in sorted(worker_frames.items()):
+        print(f"Worker {worker}: {frames} frames, {frames / worker_seconds[worker]:.1f} fps")
+    if elapsed > 0:
+        print(f"Total: {total_frames} frames in {elapsed:.1f} s, {total_frames / elapsed:.1f} fps")
+    if failed:
+        print(f"{len(failed)} shard(s) failed, run the same command again to retry them")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import multiprocessing as mp
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from camera.Camera import Camera, CameraConfig
+from camera.CameraWatchdog import CameraWatchdog
+from detector import HUSTDetector, Target
+from util import PlacementProfile, applyPlacement, createSessionOptions
+
+from .SharedDetectionBuffer import SharedDetectionBuffer
+from .SharedFrameRing import SharedFrameRing
+
+
+@dataclass
+class PipelineConfig:
+    camera_config: CameraConfig
+    model_path: str
+    camera_port: int = 0
+    # Frames in flight between capture and inference, more slots means fewer frames dropped mid inference
+    ring_slots: int = 6
+    max_targets: int = 32
+    # Placement of the "capture" and "inference" processes, see util.PlacementProfile
+    placement: Optional[Dict[str, PlacementProfile]] = None
+
+
+def runCapture(config: PipelineConfig, ring: SharedFrameRing, stop_event):
+    """
+    Capture process: grabs frames and decodes them straight into the shared frame ring.
+    """
+    applyPlacement("capture", (config.placement or {}).get("capture"))
+    camera = CameraWatchdog(Camera(config.camera_config, config.camera_port))
+    height, width = ring.frame_shape[:2]
+    warned = False
+
+    while not stop_event.is_set():
+        slot = ring.acquireSlot()
+        buffer = ring.frames[slot]
+        frame = camera.getFrame(buffer)
+        if frame is None:
+            continue
+
+        # OpenCV allocates a new frame if the camera isn't running at the configured size
+        if not np.shares_memory(frame, buffer):
+            if not warned:
+                print(
+                    f"Camera frame size {frame.shape} doesn't match the pipeline size {ring.frame_shape}, resizing"
+                )
+                warned = True
+            cv2.resize(frame, (width, height), dst=buffer)
+
+        ring.publish(slot, camera.frame_sequence, camera.last_capture_time_ns)
+
+    camera.release()
+    ring.close()
+
+
+def runInference(
+    config: PipelineConfig, ring: SharedFrameRing, detections: SharedDetectionBuffer, stop_event, ready_event
+):
+    """
+    Inference process: runs the detector on the newest frame in the ring and publishes the targets.
+    """
+    placement = (config.placement or {}).get("inference")
+    applyPlacement("inference", placement)
+    detector = HUSTDetector(config.model_path, session_options=createSessionOptions(placement))
+    ready_event.set()
+
+    processed = 0
+    skipped = 0
+    overwritten = 0
+    last_sequence = None
+    frame = np.empty(ring.frame_shape, dtype=np.uint8)
+
+    while not stop_event.is_set():
+        latest = ring.waitForLatest(timeout=0.1)
+        if latest is None:
+            continue
+
+        slot, sequence, capture_time_ns = latest
+        if last_sequence is not None:
+            skipped += max(sequence - last_sequence - 1, 0)
+        last_sequence = sequence
+
+        # The capture process lapped us while we were copying the frame out, the copy is torn
+        if not ring.copyFrame(slot, sequence, frame):
+            overwritten += 1
+            continue
+
+        formatted = detector.formatInput(frame)
+        targets = detector.processFormattedInput(*formatted)
+        detections.write(sequence, capture_time_ns, targets)
+        processed += 1
+
+    print(
+        f"Inference processed {processed} frames, skipped {skipped} stale frames, {overwritten} overwritten mid copy"
+    )
+    ring.close()
+    detections.close()
+
+
+class PipelineRunner:
+    """
+    Runs capture and inference in their own processes, so decoding, preprocessing and inference each get a core
+    instead of fighting over the GIL. Post-processing and transmitting happen in the process that owns the runner,
+    which reads the detections with getDetections.
+
+    Frames move through a SharedFrameRing and detections come back through a SharedDetectionBuffer, only slot
+    indices and sequence numbers cross the process boundary. Both stages always work on the newest data
+    available and drop anything older, so latency stays bounded when a stage falls behind.
+
+    Processes are started with the "spawn" method, so nothing (ONNXRuntime sessions, CUDA contexts, the camera)
+    is inherited from the parent. Scripts using the runner must keep their setup under `if __name__ == "__main__"`.
+    """
+
+    def __init__(self, config: PipelineConfig):
+        self.config = config
+        frame_shape = (config.camera_config.height, config.camera_config.width, 3)
+
+        self.ring = SharedFrameRing(frame_shape, config.ring_slots)
+        self.detections = SharedDetectionBuffer(config.max_targets)
+
+        context = mp.get_context("spawn")
+        self.stop_event = context.Event()
+        self.ready_event = context.Event()
+
+        self.inference_process = context.Process(
+            target=runInference,
+            args=(config, self.ring, self.detections, self.stop_event, self.ready_event),
+            name="inference",
+            daemon=True,
+        )
+        self.capture_process = context.Process(
+            target=runCapture,
+            args=(config, self.ring, self.stop_event),
+            name="capture",
+            daemon=True,
+        )
+
+    def start(self, timeout: float = 120.0):
+        # Let the model finish loading and warming up before frames start piling up
+        self.inference_process.start()
+        if not self.ready_event.wait(timeout):
+            self.stop()
+            raise RuntimeError("Inference process failed to start")
+
+        self.capture_process.start()
+
+    def getDetections(self, timeout: Optional[float] = None) -> Optional[Tuple[int, int, List[Target]]]:
+        """
+        Waits for the detections of the next processed frame.
+
+        Returns:
+            (frame_sequence, capture_time_ns, targets), or None if nothing arrived within timeout.
+        """
+        return self.detections.read(timeout)
+
+    def stop(self):
+        self.stop_event.set()
+
+        for process in (self.capture_process, self.inference_process):
+            if process.is_alive():
+                process.join(timeout=2.0)
+            if process.is_alive():
+                process.terminate()
+
+        self.ring.close()
+        self.detections.close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
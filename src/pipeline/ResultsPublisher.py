@@ -0,0 +1,164 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import time
+from multiprocessing import shared_memory
+from typing import List, Optional
+
+import numpy as np
+
+from detector import Target
+
+# Imported by name rather than as a module, the package binds results.ResultsReader to the class
+from results.ResultsReader import (
+    BEST_TARGET,
+    CAPTURE_TIME_NS,
+    CHECKSUM,
+    DEFAULT_NAME,
+    FRAME_SEQUENCE,
+    HEADER_COLUMNS,
+    LAYOUT,
+    LAYOUT_ID,
+    MAX_TARGETS,
+    NUM_TARGETS,
+    OWNER_PID,
+    POSITION,
+    PUBLISH_TIME_NS,
+    QUALITY_LEVEL,
+    REDUCED_INPUT,
+    ROTATION,
+    TARGET_COLUMNS,
+    VERSION,
+    checksum,
+    isProcessAlive,
+    untrack,
+)
+from util import Point3D
+
+from .SeqLock import SeqLock
+from .SharedDetectionBuffer import targetsToRows
+
+
+def removeStaleSegment(name: str):
+    """
+    Unlinks a results segment left behind by a publisher that crashed. Raises FileExistsError if its publisher is still
+    running, rather than pulling the segment out from under it and its readers.
+    """
+    existing = shared_memory.SharedMemory(name=name)
+    owner = 0
+    if existing.size >= HEADER_COLUMNS * 8:
+        header = np.ndarray((HEADER_COLUMNS,), dtype=np.int64, buffer=existing.buf)
+        if header[LAYOUT_ID] == LAYOUT:
+            owner = int(header[OWNER_PID])
+        del header
+
+    if owner > 0 and isProcessAlive(owner):
+        untrack(existing)
+        existing.close()
+        raise FileExistsError(
+            f"Results segment {name} is in use by process {owner}, is the vision program already running? "
+            f"If that process isn't a publisher, remove /dev/shm/{name}"
+        )
+
+    existing.close()
+    existing.unlink()
+
+
+class ResultsPublisher:
+    """
+    Publishes every frame's results into a named shared memory segment, for other programs on the coprocessor
+    (navigation, decision making) to read with results.ResultsReader. Only the latest frame is kept, readers poll it
+    whenever they like without sockets, serialization, or ever making the loop wait, see ResultsReader for the layout.
+
+    args:
+        name (str): Name of the shared memory segment, readers attach by it.
+        max_targets (int): Most targets published per frame, the lowest confidence ones are dropped (never best_target).
+    """
+
+    def __init__(self, name: str = DEFAULT_NAME, max_targets: int = 16):
+        size = (HEADER_COLUMNS + max_targets * TARGET_COLUMNS) * 8
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            removeStaleSegment(name)
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        self.max_targets = max_targets
+        self.header = np.ndarray((HEADER_COLUMNS,), dtype=np.int64, buffer=self.shm.buf)
+        self.rows = np.ndarray(
+            (max_targets, TARGET_COLUMNS),
+            dtype=np.float64,
+            buffer=self.shm.buf,
+            offset=self.header.nbytes,
+        )
+        self.lock = SeqLock(self.header[VERSION : VERSION + 1])
+
+        self.header[:] = 0
+        self.header[LAYOUT_ID] = LAYOUT
+        self.header[MAX_TARGETS] = max_targets
+        self.header[OWNER_PID] = os.getpid()
+
+    def publish(
+        self,
+        frame_sequence: int,
+        capture_time_ns: int,
+        targets: List[Target],
+        best_target: Optional[Target] = None,
+        position: Optional[Point3D] = None,
+        rotation: Optional[np.ndarray] = None,
+        quality_level: int = 0,
+        reduced_input: bool = False,
+    ):
+        """
+        Publishes a frame's results. The pose (position and rotation) belongs to best_target, which is put first.
+        """
+        targets = [target for target in targets if target is not best_target]
+        if best_target is not None:
+            targets.insert(0, best_target)
+        if len(targets) > self.max_targets:
+            # Not all of them fit, keep the most confident ones after best_target
+            start = 0 if best_target is None else 1
+            targets[start:] = sorted(targets[start:], key=lambda target: target.confidence, reverse=True)
+
+        self.lock.beginWrite()
+
+        count = targetsToRows(targets, self.rows[:, : POSITION.start])
+        self.rows[:count, POSITION.start :] = np.nan
+        if best_target is not None and count > 0:
+            if position is not None:
+                self.rows[0, POSITION] = (position.x, position.y, position.z)
+            if rotation is not None:
+                self.rows[0, ROTATION] = np.ravel(rotation)
+
+        header = self.header
+        header[FRAME_SEQUENCE] = frame_sequence
+        header[CAPTURE_TIME_NS] = capture_time_ns
+        header[PUBLISH_TIME_NS] = time.perf_counter_ns()
+        header[NUM_TARGETS] = count
+        header[BEST_TARGET] = 0 if best_target is not None and count > 0 else -1
+        header[QUALITY_LEVEL] = quality_level
+        header[REDUCED_INPUT] = reduced_input
+        header[CHECKSUM] = checksum(header, self.rows[:count])
+
+        self.lock.endWrite()
+
+    def close(self):
+        self.header = self.rows = self.lock = None
+        self.shm.close()
+        self.shm.unlink()
@@ -0,0 +1,79 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import time
+import zlib
+
+import numpy as np
+
+
+def checksum(*arrays: np.ndarray) -> int:
+    """
+    CRC32 of the contiguous arrays, in order. Stored by SeqLock writers next to the data, see SeqLock.
+    """
+    crc = 0
+    for array in arrays:
+        crc = zlib.crc32(array, crc)
+    return crc
+
+
+class SeqLock:
+    """
+    A single writer, many reader lock built on a version counter living in shared memory.
+
+    The writer bumps the version to an odd number before writing and back to an even number after.
+    Readers never block the writer: they note the version, copy the data out, and retry if the version was odd
+    or changed while they were copying. This keeps the writer (the vision loop) free of any waiting on readers.
+
+    Python has no memory fences, so the version alone relies on the CPU keeping the order of the writer's stores
+    (version, data, version) and of the reader's loads as seen from other cores. x86 guarantees that, ARM (the Jetson)
+    doesn't, and a reader racing a write there can copy a mix of two writes without seeing the version change. So
+    the writer also stores a checksum of the data before endWrite, and the reader checks its copy against it: a
+    mixed copy doesn't match the checksum of either write, whatever order the stores became visible in.
+
+    args:
+        version (np.ndarray): A one element int64 array, usually a view into a shared memory segment.
+    """
+
+    def __init__(self, version: np.ndarray):
+        self.version = version
+
+    def beginWrite(self):
+        self.version[0] += 1
+
+    def endWrite(self):
+        self.version[0] += 1
+
+    def readBegin(self) -> int:
+        """
+        Waits until no write is in progress and returns the version to pass to readRetry.
+        """
+        while True:
+            version = int(self.version[0])
+            if version & 1 == 0:
+                return version
+            # Let the writer finish, it may be waiting for this core
+            time.sleep(0)
+
+    def readRetry(self, version: int) -> bool:
+        """
+        Returns True if the data was changed since readBegin returned version, meaning the copy must be redone.
+        Call it after copying the data out, and check the copy against the checksum too, see the note on memory
+        ordering above.
+        """
+        return int(self.version[0]) != version
@@ -0,0 +1,160 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from detector import HUSTDetector, Target
+from util import Point2D
+
+from .SeqLock import SeqLock, checksum
+
+# Columns of a target row, the first 8 are the corner x, y pairs
+CONFIDENCE = 8
+COLOR_ID = 9
+TAG_ID = 10
+TARGET_COLUMNS = 11
+
+# Columns of the header
+VERSION = 0
+FRAME_SEQUENCE = 1
+CAPTURE_TIME_NS = 2
+NUM_TARGETS = 3
+# Of the columns before it and the target rows, see SeqLock
+CHECKSUM = 4
+HEADER_COLUMNS = 5
+
+
+def targetsToRows(targets: List[Target], rows: np.ndarray) -> int:
+    """
+    Packs targets into rows of a float array, returns how many rows were written.
+    """
+    count = min(len(targets), len(rows))
+    for i in range(count):
+        target = targets[i]
+        row = rows[i]
+        for j, vertex in enumerate(target.rect.vertices):
+            row[2 * j] = vertex.x
+            row[2 * j + 1] = vertex.y
+        row[CONFIDENCE] = target.confidence
+        row[COLOR_ID] = getattr(target, "color_id", 0)
+        row[TAG_ID] = HUSTDetector.tag_to_word.index(target.tag)
+    return count
+
+
+def rowsToTargets(rows: np.ndarray) -> List[Target]:
+    """
+    The inverse of targetsToRows.
+    """
+    targets = []
+    for row in rows:
+        points = [Point2D(float(row[2 * j]), float(row[2 * j + 1])) for j in range(4)]
+        color_id = int(row[COLOR_ID])
+        target = Target(
+            points,
+            HUSTDetector.color_to_word[color_id // 2],
+            HUSTDetector.tag_to_word[int(row[TAG_ID])],
+            float(row[CONFIDENCE]),
+        )
+        target.color_id = color_id
+        targets.append(target)
+    return targets
+
+
+class SharedDetectionBuffer:
+    """
+    A small shared memory buffer holding the detections of the newest processed frame.
+
+    There is a single writer (the inference process) and the buffer only ever holds the latest result,
+    older results that weren't read in time are overwritten. Reads are made consistent with a SeqLock.
+
+    args:
+        max_targets (int): Maximum number of targets stored per frame, extra targets (lowest confidence) are dropped.
+    """
+
+    def __init__(self, max_targets: int = 32):
+        self.max_targets = max_targets
+
+        size = HEADER_COLUMNS * 8 + max_targets * TARGET_COLUMNS * 8
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        self.available = mp.get_context("spawn").Semaphore(0)
+        self.owner = True
+
+        self.attachArrays()
+        self.header[:] = 0
+
+    def attachArrays(self):
+        self.header = np.ndarray((HEADER_COLUMNS,), dtype=np.int64, buffer=self.shm.buf)
+        self.rows = np.ndarray(
+            (self.max_targets, TARGET_COLUMNS),
+            dtype=np.float64,
+            buffer=self.shm.buf,
+            offset=self.header.nbytes,
+        )
+        self.lock = SeqLock(self.header[VERSION : VERSION + 1])
+
+    def __getstate__(self):
+        return {"name": self.shm.name, "max_targets": self.max_targets, "available": self.available}
+
+    def __setstate__(self, state):
+        self.max_targets = state["max_targets"]
+        self.available = state["available"]
+        self.shm = shared_memory.SharedMemory(name=state["name"])
+        self.owner = False
+        self.attachArrays()
+
+    def write(self, frame_sequence: int, capture_time_ns: int, targets: List[Target]):
+        self.lock.beginWrite()
+        self.header[NUM_TARGETS] = targetsToRows(targets, self.rows)
+        self.header[FRAME_SEQUENCE] = frame_sequence
+        self.header[CAPTURE_TIME_NS] = capture_time_ns
+        self.header[CHECKSUM] = checksum(
+            self.header[FRAME_SEQUENCE:CHECKSUM], self.rows[: self.header[NUM_TARGETS]]
+        )
+        self.lock.endWrite()
+        self.available.release()
+
+    def read(self, timeout: Optional[float] = None) -> Optional[Tuple[int, int, List[Target]]]:
+        """
+        Waits for a new result and returns (frame_sequence, capture_time_ns, targets), or None on timeout.
+        """
+        if not self.available.acquire(timeout=timeout):
+            return None
+
+        while self.available.acquire(block=False):
+            pass
+
+        while True:
+            version = self.lock.readBegin()
+            header = self.header.copy()
+            rows = self.rows[: max(int(header[NUM_TARGETS]), 0)].copy()
+            if (
+                self.lock.readRetry(version)
+                or checksum(header[FRAME_SEQUENCE:CHECKSUM], rows) != header[CHECKSUM]
+            ):
+                continue
+            return int(header[FRAME_SEQUENCE]), int(header[CAPTURE_TIME_NS]), rowsToTargets(rows)
+
+    def close(self):
+        self.header = self.rows = self.lock = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,183 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import multiprocessing as mp
+import zlib
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Slot header columns
+SEQUENCE = 0
+CAPTURE_TIME_NS = 1
+# CRC32 of the frame, see copyFrame
+CHECKSUM = 2
+SLOT_HEADER_COLUMNS = 3
+
+# Written into a slot's sequence while the frame in it is being replaced
+WRITING = -1
+
+CONTROL_SIZE = 64
+
+
+class SharedFrameRing:
+    """
+    A ring of fixed size frame slots in shared memory, used to pass camera frames between processes without pickling them.
+
+    The capture process writes each frame straight into the next slot and only the slot index is handed over.
+    Slots are reused round robin, so when the consumer falls behind the oldest frames are simply overwritten (drop oldest).
+    The consumer always takes the newest frame, which keeps the end to end latency bounded no matter how slow inference gets.
+
+    Each slot has a sequence number that's set to WRITING while it's being overwritten, and the CRC32 of its frame.
+    The consumer copies the frame out with copyFrame, which checks the copy against both: the sequence catches the
+    slot being replaced on x86, but ARM CPUs (the Jetson) can make the writer's stores visible out of order, and only
+    the checksum catches a copy that mixes two frames there. The writer laps the consumer whenever inference falls
+    behind capture, so this isn't rare.
+
+    Memory layout:
+        control (int64): latest slot index, latest sequence number
+        headers (int64, num_slots x 3): sequence number, capture time (time.perf_counter_ns), checksum per slot
+        frames (uint8, num_slots x height x width x channels)
+
+    args:
+        frame_shape (Tuple[int, int, int]): Shape of a frame, (height, width, channels).
+        num_slots (int): Number of slots in the ring, at least 3 so the writer never has to touch the slot being read.
+    """
+
+    def __init__(self, frame_shape: Tuple[int, int, int], num_slots: int = 4):
+        if num_slots < 3:
+            raise ValueError("SharedFrameRing needs at least 3 slots")
+
+        self.frame_shape = tuple(frame_shape)
+        self.num_slots = num_slots
+
+        self.shm = shared_memory.SharedMemory(create=True, size=self.getSize())
+        # Counts published frames, lets the consumer sleep until there's something new
+        self.available = mp.get_context("spawn").Semaphore(0)
+        self.owner = True
+
+        self.attachArrays()
+        self.control[:] = [0, WRITING]
+        self.headers[:] = WRITING
+        self.next_slot = 0
+
+    def getSize(self) -> int:
+        header_size = self.num_slots * SLOT_HEADER_COLUMNS * 8
+        return CONTROL_SIZE + header_size + self.num_slots * int(np.prod(self.frame_shape))
+
+    def attachArrays(self):
+        buffer = self.shm.buf
+        self.control = np.ndarray((2,), dtype=np.int64, buffer=buffer)
+        self.headers = np.ndarray(
+            (self.num_slots, SLOT_HEADER_COLUMNS), dtype=np.int64, buffer=buffer, offset=CONTROL_SIZE
+        )
+        self.frames = np.ndarray(
+            (self.num_slots, *self.frame_shape),
+            dtype=np.uint8,
+            buffer=buffer,
+            offset=CONTROL_SIZE + self.headers.nbytes,
+        )
+
+    # Allows the ring to be handed to a multiprocessing.Process, the child attaches to the same segment
+    def __getstate__(self):
+        return {
+            "name": self.shm.name,
+            "frame_shape": self.frame_shape,
+            "num_slots": self.num_slots,
+            "available": self.available,
+        }
+
+    def __setstate__(self, state):
+        self.frame_shape = state["frame_shape"]
+        self.num_slots = state["num_slots"]
+        self.available = state["available"]
+        self.shm = shared_memory.SharedMemory(name=state["name"])
+        self.owner = False
+        self.next_slot = 0
+        self.attachArrays()
+
+    def acquireSlot(self) -> int:
+        """
+        Writer side. Returns the index of the slot to write the next frame into, overwriting the oldest frame.
+        The slot is marked as being written until publish is called.
+        """
+        slot = self.next_slot
+        # Never hand out the slot holding the newest frame, the consumer might be just about to read it
+        if slot == self.control[0] and self.control[1] != WRITING:
+            slot = (slot + 1) % self.num_slots
+
+        self.headers[slot, SEQUENCE] = WRITING
+        self.next_slot = (slot + 1) % self.num_slots
+        return slot
+
+    def publish(self, slot: int, sequence: int, capture_time_ns: int):
+        """
+        Writer side. Marks the frame in slot as complete and makes it the newest frame.
+        """
+        self.headers[slot, CAPTURE_TIME_NS] = capture_time_ns
+        self.headers[slot, CHECKSUM] = zlib.crc32(self.frames[slot])
+        self.headers[slot, SEQUENCE] = sequence
+        self.control[0] = slot
+        self.control[1] = sequence
+        self.available.release()
+
+    def waitForLatest(self, timeout: Optional[float] = None) -> Optional[Tuple[int, int, int]]:
+        """
+        Consumer side. Waits for a new frame and returns (slot, sequence, capture_time_ns) of the newest one.
+        Any frames published since the last call but not yet picked up are skipped.
+
+        Returns:
+            None if no frame was published within timeout.
+        """
+        if not self.available.acquire(timeout=timeout):
+            return None
+
+        # Drain the count for the frames we're skipping over
+        while self.available.acquire(block=False):
+            pass
+
+        slot = int(self.control[0])
+        sequence = int(self.headers[slot, SEQUENCE])
+        if sequence == WRITING:
+            return None
+
+        return slot, sequence, int(self.headers[slot, CAPTURE_TIME_NS])
+
+    def copyFrame(self, slot: int, sequence: int, out: np.ndarray) -> bool:
+        """
+        Consumer side. Copies the frame in slot into out (frame_shape, uint8) and returns True if the copy is the
+        whole frame with the given sequence number, False if the writer overwrote the slot during the copy.
+        The checksum is computed over out rather than the slot, so it checks exactly the pixels that were copied.
+        """
+        np.copyto(out, self.frames[slot])
+        return self.headers[slot, SEQUENCE] == sequence and zlib.crc32(out) == self.headers[slot, CHECKSUM]
+
+    def isCurrent(self, slot: int, sequence: int) -> bool:
+        """
+        Consumer side. Returns True if slot still holds the frame with the given sequence number. Only reliable on
+        x86, use copyFrame to also catch frames torn on ARM.
+        """
+        return self.headers[slot, SEQUENCE] == sequence
+
+    def close(self):
+        # Drop the numpy views first, shared memory can't be closed while they still reference it
+        self.control = self.headers = self.frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,18 @@
+from results import ResultsReader, VisionResult
+
+from .PipelineRunner import PipelineConfig, PipelineRunner
+from .ResultsPublisher import ResultsPublisher
+from .SeqLock import SeqLock
+from .SharedDetectionBuffer import SharedDetectionBuffer
+from .SharedFrameRing import SharedFrameRing
+
+__all__ = [
+    "PipelineConfig",
+    "PipelineRunner",
+    "ResultsPublisher",
+    "ResultsReader",
+    "SeqLock",
+    "SharedDetectionBuffer",
+    "SharedFrameRing",
+    "VisionResult",
+]
@@ -25,6 +25,25 @@ from detector import Target
 from util import Point3D
 
 
+def loadCameraCalibration(camera_calibration_file: str):
+    """
+    Reads a calibration file in the format of example_camera_calibration.json.
+
+    returns:
+        camera_matrix: 3x3 intrinsic matrix
+        distortion_coefficients: 5x1 distortion coefficients
+        image_size: (width, height) the calibration was done at
+    """
+    with open(camera_calibration_file) as f:
+        camera_calibration = json.load(f)
+
+    camera_matrix = np.array(camera_calibration["camera_matrix"]["data"]).reshape(3, 3)
+    distortion_coefficients = np.array(camera_calibration["distortion_coefficients"]["data"]).reshape(5, 1)
+    image_size = tuple(int(x) for x in camera_calibration["img_size"]["data"])
+
+    return camera_matrix, distortion_coefficients, image_size
+
+
 class TargetPositionEstimator:
     """
     This class attempts to compute the position of the target in 3D space. It does this by using the camera calibration
@@ -35,25 +54,21 @@ class TargetPositionEstimator:
     https://docs.opencv.org/4.x/d5/d1f/calib3d_solvePnP.html
     """
 
-    def __init__(self, camera_calibration_file: str):
-        with open(camera_calibration_file) as f:
-            camera_calibration = json.load(f)
-
-            self.camera_matrix = np.array(camera_calibration["camera_matrix"]["data"]).reshape(3, 3)
+    PLATE_WIDTH_M = 0.135
+    # Since the model puts a bounding around the light bar, this height is the height of the LEDs
+    PLATE_HEIGHT_M = 0.055
 
-            self.distortion_coefficients = np.array(
-                camera_calibration["distortion_coefficients"]["data"]
-            ).reshape(5, 1)
+    def __init__(self, camera_calibration_file: str):
+        self.camera_matrix, self.distortion_coefficients, self.calibration_size = loadCameraCalibration(
+            camera_calibration_file
+        )
+        self.calibration_matrix = self.camera_matrix
 
         print("Created TargetPositionEstimator with camera calibration: ")
         print("Camera matrix: ", self.camera_matrix)
         print("Distortion coefficients: ", self.distortion_coefficients)
         print()
 
-        self.PLATE_WIDTH_M = 0.135
-        # Since the model puts a bounding around the light bar, this height is the height of the LEDs
-        self.PLATE_HEIGHT_M = 0.055
-
         self.object_points = np.array(
             [
                 (0, 0, 0),
@@ -65,6 +80,17 @@ class TargetPositionEstimator:
 
         self.aspect_ratio = self.PLATE_WIDTH_M / self.PLATE_HEIGHT_M
 
+    def setImageSize(self, width: int, height: int):
+        """
+        Scales the intrinsics for frames of a different size, call when the camera switches modes.
+
+        Only valid for modes that bin or scale the whole sensor, which changes the focal length and principal point
+        by the same factor as the width. Modes that crop the sensor need their own calibration.
+        """
+        scale = width / self.calibration_size[0]
+        self.camera_matrix = self.calibration_matrix.copy()
+        self.camera_matrix[:2] *= scale
+
     def estimatePosition(self, detected_target: Target):
         """
         Estimates the position of the target in camera space
@@ -0,0 +1,140 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import glob
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from detector import Target
+from pipeline.SharedDetectionBuffer import TARGET_COLUMNS, targetsToRows
+from util import Point3D
+
+
+def getColumnTypes(max_targets: int) -> Dict[str, tuple]:
+    """
+    Columns of the detection log, name -> (dtype, shape of one row).
+    """
+    return {
+        # Sequence numbers start at 1, rows left at 0 were never written
+        "frame_sequence": (np.int64, ()),
+        "capture_time_ns": (np.int64, ()),
+        # Index of the frame in the recorded frames, -1 if the frame wasn't recorded
+        "frame_index": (np.int64, ()),
+        "latency_ns": (np.int64, ()),
+        "quality_level": (np.int8, ()),
+        "num_targets": (np.int32, ()),
+        # Packed with pipeline.SharedDetectionBuffer.targetsToRows
+        "targets": (np.float32, (max_targets, TARGET_COLUMNS)),
+        # Position of the chosen target, NaN if there was none
+        "position": (np.float32, (3,)),
+    }
+
+
+class DetectionLog:
+    """
+    A columnar, append only log of per frame detections. Every column is its own preallocated .npy file in a chunk
+    directory, so the log loads straight into numpy with loadDetectionLog, or one column at a time with np.load.
+    A new chunk is started every chunk_rows rows.
+
+    Not thread safe, meant to be written from a single background thread.
+
+    args:
+        directory (str): Directory to create the chunk directories in.
+        chunk_rows (int): Rows per chunk.
+        max_targets (int): Targets stored per row, extra targets are dropped.
+    """
+
+    def __init__(self, directory: str, chunk_rows: int = 1000, max_targets: int = 16):
+        self.directory = directory
+        self.chunk_rows = chunk_rows
+        self.max_targets = max_targets
+        self.column_types = getColumnTypes(max_targets)
+
+        self.columns = None
+        self.chunk_index = -1
+        self.row = 0
+
+    def startChunk(self):
+        self.close()
+        self.chunk_index += 1
+        chunk_directory = os.path.join(self.directory, f"detections_{self.chunk_index:04d}")
+        os.makedirs(chunk_directory, exist_ok=True)
+
+        self.columns = {
+            name: open_memmap(
+                os.path.join(chunk_directory, f"{name}.npy"),
+                mode="w+",
+                dtype=dtype,
+                shape=(self.chunk_rows, *shape),
+            )
+            for name, (dtype, shape) in self.column_types.items()
+        }
+        self.columns["position"][:] = np.nan
+        self.row = 0
+
+    def append(
+        self,
+        frame_sequence: int,
+        capture_time_ns: int,
+        frame_index: int,
+        targets: List[Target],
+        position: Optional[Point3D],
+        latency_ns: int,
+        quality_level: int,
+    ):
+        if self.columns is None or self.row >= self.chunk_rows:
+            self.startChunk()
+
+        columns = self.columns
+        row = self.row
+        columns["frame_sequence"][row] = frame_sequence
+        columns["capture_time_ns"][row] = capture_time_ns
+        columns["frame_index"][row] = frame_index
+        columns["latency_ns"][row] = latency_ns
+        columns["quality_level"][row] = quality_level
+        columns["num_targets"][row] = targetsToRows(targets, columns["targets"][row])
+        if position is not None:
+            columns["position"][row] = (position.x, position.y, position.z)
+        self.row += 1
+
+    def close(self):
+        if self.columns is None:
+            return
+        for column in self.columns.values():
+            column.flush()
+        self.columns = None
+
+
+def loadDetectionLog(directory: str) -> Dict[str, np.ndarray]:
+    """
+    Loads every chunk of a detection log in directory, returns the columns with the unwritten rows removed.
+    """
+    result = {}
+    for chunk in sorted(glob.glob(os.path.join(directory, "detections_*"))):
+        columns = {
+            os.path.splitext(os.path.basename(path))[0]: np.load(path)
+            for path in glob.glob(os.path.join(chunk, "*.npy"))
+        }
+        written = columns["frame_sequence"] > 0
+        for name, column in columns.items():
+            result.setdefault(name, []).append(column[written])
+
+    return {name: np.concatenate(parts) if len(parts) > 1 else parts[0] for name, parts in result.items()}
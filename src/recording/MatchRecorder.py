@@ -0,0 +1,240 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import datetime
+import errno
+import os
+import queue
+import shutil
+import threading
+from typing import List, Optional
+
+import cv2
+
+from camera.FrameFile import FrameFileWriter, getFileSize
+from detector import Target
+from telemetry import metrics, tracer
+from util import Point3D
+
+from .DetectionLog import DetectionLog
+
+# Frame formats
+RAW = "raw"
+JPEG = "jpeg"
+
+
+class MatchRecorder:
+    """
+    Records what the vision system saw during a match, frames along with the detections, chosen target position
+    and latency of every frame, without slowing down the main loop.
+
+    record only puts references into a bounded queue and never waits. A background thread does all the copying,
+    encoding and writing into chunked, preallocated files:
+        frames_0000.frames, ...: raw frames (camera.FrameFileWriter), or
+        frames_0000.avi, ...: MJPG encoded frames, much smaller but encoded on the writer thread
+        detections_0000/, ...: the detection log, see DetectionLog
+
+    The frame chunks are directly replayable with camera.ReplaySource by passing it the recording directory.
+    Frames are what get dropped when the writer can't keep up (slow disk, or not much space left), the detection log
+    keeps every frame unless the queue itself is full.
+
+    args:
+        output_directory (str): A new directory named after the start time is created in here for each recording.
+        frame_format (str): "raw" or "jpeg".
+        fps (float): Frame rate written into jpeg chunks, which is what replaying them is paced at.
+        chunk_frames (int): Frames per chunk file, and rows per detection log chunk.
+        frame_interval (int): Only record every frame_interval-th frame, detections are recorded for every frame.
+        max_queued_frames (int): Frames waiting to be written before new ones are dropped.
+        min_free_bytes (int): Disk space to leave free, a frame chunk is only started if it fits with this much to spare.
+        max_targets (int): Targets stored per frame in the detection log.
+        jpeg_quality (int): JPEG quality (0 - 100) of jpeg chunks.
+    """
+
+    def __init__(
+        self,
+        output_directory: str = "recordings",
+        frame_format: str = JPEG,
+        fps: float = 100.0,
+        chunk_frames: int = 500,
+        frame_interval: int = 1,
+        max_queued_frames: int = 8,
+        min_free_bytes: int = 2**30,
+        max_targets: int = 16,
+        jpeg_quality: int = 90,
+    ):
+        if frame_format not in (RAW, JPEG):
+            raise ValueError(f"Unknown frame format {frame_format}, expected {RAW} or {JPEG}")
+
+        self.directory = os.path.join(output_directory, datetime.datetime.now().strftime("%Y%m%d_%H%M%S"))
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.frame_format = frame_format
+        self.fps = fps
+        self.chunk_frames = chunk_frames
+        self.frame_interval = frame_interval
+        self.min_free_bytes = min_free_bytes
+        self.jpeg_quality = jpeg_quality
+
+        # Detections are small, so the queue is sized generously, frames are limited separately
+        self.queue = queue.Queue(maxsize=max_queued_frames * 32)
+        self.frame_slots = threading.Semaphore(max_queued_frames)
+
+        self.detection_log = DetectionLog(self.directory, chunk_frames, max_targets)
+        self.frame_writer = None
+        self.chunk_index = -1
+        self.frames_in_chunk = 0
+        self.frames_written = 0
+        self.record_count = 0
+        self.frames_enabled = True
+
+        self.frames_dropped = metrics.counter("recorder_frames_dropped")
+        self.records_dropped = metrics.counter("recorder_records_dropped")
+
+        self.thread = threading.Thread(target=self.writeLoop, name="recorder", daemon=True)
+        self.thread.start()
+
+        print(f"Recording {frame_format} frames to {self.directory}")
+
+    def record(
+        self,
+        frame,
+        frame_sequence: int,
+        capture_time_ns: int,
+        targets: List[Target],
+        position: Optional[Point3D] = None,
+        latency_ns: int = 0,
+        quality_level: int = 0,
+    ):
+        """
+        Queues a frame and its results for writing. The frame must not be modified afterwards, it is written later.
+        """
+        self.record_count += 1
+        if self.record_count % self.frame_interval != 0:
+            frame = None
+        elif not self.frame_slots.acquire(blocking=False):
+            self.frames_dropped.add()
+            frame = None
+
+        try:
+            self.queue.put_nowait(
+                (frame, frame_sequence, capture_time_ns, targets, position, latency_ns, quality_level)
+            )
+        except queue.Full:
+            self.records_dropped.add()
+            if frame is not None:
+                self.frame_slots.release()
+
+    def writeLoop(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+
+            frame, frame_sequence, capture_time_ns, targets, position, latency_ns, quality_level = item
+            frame_index = -1
+            if frame is not None:
+                with tracer.span("record frame"):
+                    if self.writeFrame(frame, frame_sequence, capture_time_ns):
+                        frame_index = self.frames_written - 1
+                self.frame_slots.release()
+
+            self.detection_log.append(
+                frame_sequence, capture_time_ns, frame_index, targets, position, latency_ns, quality_level
+            )
+
+        self.closeFrameChunk()
+        self.detection_log.close()
+
+    def writeFrame(self, frame, frame_sequence: int, capture_time_ns: int) -> bool:
+        if not self.frames_enabled:
+            self.frames_dropped.add()
+            return False
+
+        if self.frame_writer is None or self.frames_in_chunk >= self.chunk_frames:
+            self.closeFrameChunk()
+            if not self.startFrameChunk(frame.shape):
+                self.frames_enabled = False
+                self.frames_dropped.add()
+                return False
+
+        if self.frame_format == RAW:
+            self.frame_writer.write(frame, frame_sequence, capture_time_ns)
+        else:
+            self.frame_writer.write(frame)
+
+        self.frames_in_chunk += 1
+        self.frames_written += 1
+        return True
+
+    def hasFreeSpace(self, chunk_bytes: int) -> bool:
+        """
+        True if a chunk of chunk_bytes fits with min_free_bytes to spare.
+        """
+        free = shutil.disk_usage(self.directory).free
+        if free < chunk_bytes + self.min_free_bytes:
+            print(
+                f"Only {free / 2**20:.0f} MiB of disk space left for {chunk_bytes / 2**20:.0f} MiB chunks, "
+                "no longer recording frames"
+            )
+            return False
+        return True
+
+    def startFrameChunk(self, frame_shape) -> bool:
+        """
+        Opens the next frame chunk, returns False if there isn't enough disk space for it.
+        """
+        # Raw chunks take their full size up front, jpeg chunks grow as they're written
+        chunk_bytes = getFileSize(frame_shape, self.chunk_frames) if self.frame_format == RAW else 0
+        if not self.hasFreeSpace(chunk_bytes):
+            return False
+
+        self.chunk_index += 1
+        path = os.path.join(self.directory, f"frames_{self.chunk_index:04d}")
+        if self.frame_format == RAW:
+            try:
+                self.frame_writer = FrameFileWriter(path + ".frames", frame_shape, self.chunk_frames)
+            except OSError as e:
+                if e.errno != errno.ENOSPC:
+                    raise
+                # Something else filled the disk since the check
+                print("Ran out of disk space starting a frame chunk, no longer recording frames")
+                return False
+        else:
+            height, width = frame_shape[:2]
+            self.frame_writer = cv2.VideoWriter(
+                path + ".avi", cv2.VideoWriter_fourcc(*"MJPG"), self.fps, (width, height)
+            )
+            self.frame_writer.set(cv2.VIDEOWRITER_PROP_QUALITY, self.jpeg_quality)
+        self.frames_in_chunk = 0
+        return True
+
+    def closeFrameChunk(self):
+        if self.frame_writer is None:
+            return
+        if self.frame_format == RAW:
+            self.frame_writer.close()
+        else:
+            self.frame_writer.release()
+        self.frame_writer = None
+
+    def stop(self):
+        """
+        Writes out everything still queued and closes the files.
+        """
+        self.queue.put(None)
+        self.thread.join()
@@ -0,0 +1,4 @@
+from .DetectionLog import DetectionLog, loadDetectionLog
+from .MatchRecorder import MatchRecorder
+
+__all__ = ["DetectionLog", "loadDetectionLog", "MatchRecorder"]
@@ -0,0 +1,201 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Reads the vision results published by pipeline.ResultsPublisher. Only needs numpy, so other programs on the
+coprocessor can copy this file instead of depending on the whole vision code. It's kept out of the pipeline package,
+importing that pulls in OpenCV and onnxruntime.
+
+Layout of the shared memory segment:
+    header (int64 x HEADER_COLUMNS): see the column indices below
+    targets (float64 x max_targets x TARGET_COLUMNS): one row per target, the best target first
+
+Writes are guarded by a version counter (the same protocol as pipeline.SeqLock): it's odd while a write is in
+progress, so a reader copies everything out and retries if the version was odd or changed meanwhile. Python can't
+order memory accesses between cores, and ARM CPUs (the Jetson) may make the publisher's stores visible out of order,
+so the version alone can miss a write overlapping the copy. The publisher also stores a CRC32 of the frame (see
+checksum) before finishing the write, and a copy is only used if it matches, which catches those torn copies.
+"""
+
+import os
+import time
+import zlib
+from dataclasses import dataclass
+from multiprocessing import resource_tracker, shared_memory
+from typing import Optional
+
+import numpy as np
+
+DEFAULT_NAME = "huskybot_vision"
+LAYOUT = 2
+
+# Header columns
+VERSION = 0
+LAYOUT_ID = 1
+MAX_TARGETS = 2
+FRAME_SEQUENCE = 3
+CAPTURE_TIME_NS = 4
+PUBLISH_TIME_NS = 5
+NUM_TARGETS = 6
+# Row of the target being aimed at, -1 if there's none
+BEST_TARGET = 7
+# DeadlineScheduler quality level the frame was processed at
+QUALITY_LEVEL = 8
+# 1 if detection was limited to the area around last frame's target, see DeadlineScheduler.use_reduced_input
+REDUCED_INPUT = 9
+# Process id of the publisher, so a new publisher can tell a segment left behind by a crash from one in use
+OWNER_PID = 10
+# CRC32 of the header columns before it and the frame's target rows, see checksum
+CHECKSUM = 11
+HEADER_COLUMNS = 16
+
+# Target columns, the first 8 are the corner x, y pairs in pixels (BL, TL, TR, BR)
+CONFIDENCE = 8
+COLOR_ID = 9
+# Index into HUSTDetector.tag_to_word
+TAG_ID = 10
+# Position in meters (x forwards, y left, z up) and OpenCV rotation vector, NaN where no pose was estimated
+POSITION = slice(11, 14)
+ROTATION = slice(14, 17)
+TARGET_COLUMNS = 17
+
+
+def checksum(header: np.ndarray, rows: np.ndarray) -> int:
+    """
+    CRC32 of the columns of header from LAYOUT_ID up to CHECKSUM and of rows, the frame's target rows.
+    """
+    return zlib.crc32(rows, zlib.crc32(header[LAYOUT_ID:CHECKSUM]))
+
+
+def isProcessAlive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists, but belongs to another user
+        return True
+    return True
+
+
+def untrack(shm: shared_memory.SharedMemory):
+    """
+    Python registers attached segments with its resource tracker too, which would unlink the segment when this
+    process exits and take it away from the publisher and every other reader.
+    """
+    if os.name == "posix":
+        # The tracker knows POSIX segments by their name with the leading slash, which shm.name leaves out
+        resource_tracker.unregister(f"/{shm.name}", "shared_memory")
+
+
+@dataclass
+class VisionResult:
+    frame_sequence: int
+    # time.perf_counter_ns (CLOCK_MONOTONIC on Linux) of the capture and of the publication
+    capture_time_ns: int
+    publish_time_ns: int
+    best_target: int
+    quality_level: int
+    # Only the area around the previous frame's target was searched, targets elsewhere may have been missed
+    reduced_input: bool
+    # num_targets x TARGET_COLUMNS
+    targets: np.ndarray
+
+
+class ResultsReader:
+    """
+    Attaches to the results segment, the vision program has to be running first.
+
+    args:
+        name (str): Name of the shared memory segment.
+    """
+
+    def __init__(self, name: str = DEFAULT_NAME):
+        self.shm = shared_memory.SharedMemory(name=name)
+        untrack(self.shm)
+
+        self.header = np.ndarray((HEADER_COLUMNS,), dtype=np.int64, buffer=self.shm.buf)
+        if self.header[LAYOUT_ID] != LAYOUT:
+            raise ValueError(f"Results layout {self.header[LAYOUT_ID]} isn't supported, expected {LAYOUT}")
+
+        max_targets = int(self.header[MAX_TARGETS])
+        self.rows = np.ndarray(
+            (max_targets, TARGET_COLUMNS), dtype=np.float64, buffer=self.shm.buf, offset=self.header.nbytes
+        )
+        self.last_sequence = None
+
+    def read(self, timeout: float = 0.01) -> Optional[VisionResult]:
+        """
+        Returns the latest result, or None if nothing was published yet or no consistent copy could be made within
+        timeout seconds (a write takes microseconds, so that's only when the publisher is stalled).
+
+        Raises:
+            ConnectionError: The publisher exited, possibly in the middle of a write.
+        """
+        deadline = time.perf_counter() + timeout
+        while True:
+            version = int(self.header[VERSION])
+            if version & 1 == 0:
+                header = self.header.copy()
+                rows = self.rows[: max(int(header[NUM_TARGETS]), 0)].copy()
+                if int(self.header[VERSION]) == version and (
+                    version == 0 or checksum(header, rows) == header[CHECKSUM]
+                ):
+                    break
+
+            if time.perf_counter() > deadline:
+                self.checkPublisher()
+                return None
+            time.sleep(0)
+
+        if version == 0:
+            return None
+
+        return VisionResult(
+            frame_sequence=int(header[FRAME_SEQUENCE]),
+            capture_time_ns=int(header[CAPTURE_TIME_NS]),
+            publish_time_ns=int(header[PUBLISH_TIME_NS]),
+            best_target=int(header[BEST_TARGET]),
+            quality_level=int(header[QUALITY_LEVEL]),
+            reduced_input=bool(header[REDUCED_INPUT]),
+            targets=rows,
+        )
+
+    def checkPublisher(self):
+        """
+        Raises ConnectionError if the process that published the segment is gone.
+        """
+        owner = int(self.header[OWNER_PID])
+        if owner > 0 and not isProcessAlive(owner):
+            raise ConnectionError(f"The results publisher (pid {owner}) exited")
+
+    def poll(self) -> Optional[VisionResult]:
+        """
+        Like read, but returns None unless a new frame was published since the last poll.
+        """
+        if self.header[FRAME_SEQUENCE] == self.last_sequence:
+            return None
+
+        result = self.read()
+        if result is not None:
+            self.last_sequence = result.frame_sequence
+        return result
+
+    def close(self):
+        self.header = self.rows = None
+        self.shm.close()
@@ -0,0 +1,7 @@
+from .ResultsReader import ResultsReader, VisionResult, untrack
+
+__all__ = [
+    "ResultsReader",
+    "untrack",
+    "VisionResult",
+]
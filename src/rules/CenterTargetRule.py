@@ -30,6 +30,12 @@ class CenterTargetRule(SelectionRule):
     """
 
     def __init__(self, imageWidth: int, imageHeight: int):
+        self.setImageSize(imageWidth, imageHeight)
+
+    def setImageSize(self, imageWidth: int, imageHeight: int):
+        """
+        Call when the frame size changes, e.g. as a Camera mode listener.
+        """
         self.imageWidth = imageWidth
         self.imageHeight = imageHeight
 
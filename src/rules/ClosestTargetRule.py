@@ -0,0 +1,32 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from detector import Target
+
+from .SelectionRule import SelectionRule
+
+
+class ClosestTargetRule(SelectionRule):
+    """
+    Scores targets by their distance from the robot in meters, so the closest target wins.
+    Needs targets with a position in the robot frame (target.position), like the ones from a CameraRig, which
+    makes it work across cameras where image based rules like CenterTargetRule don't.
+    """
+
+    def getScore(self, target: Target) -> float:
+        return target.position.getMagnitude()
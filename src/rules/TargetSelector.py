@@ -25,10 +25,15 @@ class TargetSelector:
 
     The TargetSelector uses a list of rules and applies the computed score to each target.
     The target with the lowest cumulative score is considered the best target.
+
+    args:
+        rules: The rules to score targets with.
+        weights: Optional weight per rule that its score is multiplied by, all 1 by default.
     """
 
-    def __init__(self, rules):
+    def __init__(self, rules, weights=None):
         self.rules = rules
+        self.weights = weights if weights is not None else [1.0] * len(rules)
 
     def getBestTarget(self, targets) -> Target:
         """
@@ -50,6 +55,6 @@ class TargetSelector:
         Computes the score for a single target
         """
         score = 0
-        for rule in self.rules:
-            score += rule.getScore(target)
+        for rule, weight in zip(self.rules, self.weights):
+            score += weight * rule.getScore(target)
         return score
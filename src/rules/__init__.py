@@ -1,9 +1,11 @@
 from .CenterTargetRule import CenterTargetRule
+from .ClosestTargetRule import ClosestTargetRule
 from .SelectionRule import SelectionRule
 from .TargetSelector import TargetSelector
 
 __all__ = [
     "CenterTargetRule",
+    "ClosestTargetRule",
     "SelectionRule",
     "TargetSelector",
 ]
@@ -0,0 +1,238 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import itertools
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+import onnxruntime as ort
+
+from camera.ReplaySource import createReader
+from detector import HUSTDetector
+from pose_estimator.TargetPositionEstimator import TargetPositionEstimator
+from rules import CenterTargetRule, TargetSelector
+from util import Point3D
+
+# Ways of fitting the frame to the model input
+LETTERBOX = "letterbox"
+CROP = "crop"
+NATIVE = "native"
+
+PROVIDERS = {
+    "cpu": ["CPUExecutionProvider"],
+    "cuda": ["CUDAExecutionProvider", "CPUExecutionProvider"],
+    "trt_fp32": [
+        ("TensorrtExecutionProvider", {"trt_fp16_enable": False, "trt_engine_cache_enable": True}),
+        "CPUExecutionProvider",
+    ],
+    "trt_fp16": [
+        ("TensorrtExecutionProvider", {"trt_fp16_enable": True, "trt_engine_cache_enable": True}),
+        "CPUExecutionProvider",
+    ],
+}
+
+
+@dataclass
+class SweepConfig:
+    """
+    One combination of the settings that trade speed for accuracy.
+
+    confidence_threshold: HUSTDetector.BOUNDING_BOX_CONFIDENCE_THRESHOLD
+    fit: "letterbox" pads the frame to a square like HUSTDetector.formatInput, "crop" only runs on the center square,
+        "native" runs on an input with the aspect ratio of the frame (HUSTDetector.fitInputShape), for models with
+        dynamic input axes
+    scale: Frames are resized by this factor before the pipeline, as if the camera ran at a lower resolution
+    provider: Key into PROVIDERS, "trt_fp16" is TensorRT with FP16 enabled
+    """
+
+    confidence_threshold: float = HUSTDetector.BOUNDING_BOX_CONFIDENCE_THRESHOLD
+    fit: str = LETTERBOX
+    scale: float = 1.0
+    provider: str = "cpu"
+
+    @property
+    def name(self) -> str:
+        return f"threshold={self.confidence_threshold} fit={self.fit} scale={self.scale} provider={self.provider}"
+
+
+def createGrid(
+    thresholds: List[float], fits: List[str], scales: List[float], providers: List[str]
+) -> List[SweepConfig]:
+    return [SweepConfig(*values) for values in itertools.product(thresholds, fits, scales, providers)]
+
+
+def loadDataset(path: str, max_frames: Optional[int] = None):
+    """
+    Opens a dataset, a directory written by the synthetic module (frames and labels.npz) or any recording
+    camera.ReplaySource can read. Returns (reader, labels), labels is None for recordings without them.
+    """
+    labels = None
+    if os.path.isdir(path) and os.path.exists(os.path.join(path, "labels.npz")):
+        labels = dict(np.load(os.path.join(path, "labels.npz")))
+        if os.path.exists(os.path.join(path, "frames.frames")):
+            path = os.path.join(path, "frames.frames")
+
+    reader = createReader(path, fps=100.0)
+    num_frames = len(reader) if max_frames is None else min(len(reader), max_frames)
+    return reader, labels, num_frames
+
+
+def isInside(point: Point3D, corners: np.ndarray) -> bool:
+    return cv2.pointPolygonTest(corners.astype(np.float32), (float(point.x), float(point.y)), False) >= 0
+
+
+def runConfig(
+    config: SweepConfig,
+    dataset_path: str,
+    model_path: str,
+    calibration_path: str,
+    max_frames=None,
+    shared_weights=False,
+):
+    """
+    Runs detect, select and pose over the dataset with config and measures latency and error against the labels.
+    """
+    if not any(
+        (provider[0] if isinstance(provider, tuple) else provider) in ort.get_available_providers()
+        for provider in PROVIDERS[config.provider][:1]
+    ):
+        return {"config": asdict(config), "name": config.name, "error": f"{config.provider} is not available"}
+
+    cv2.setNumThreads(1)
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = 1
+    estimator = TargetPositionEstimator(calibration_path)
+    # The calibration is for full resolution frames, a scaled down camera has proportionally scaled intrinsics
+    estimator.camera_matrix = estimator.camera_matrix.copy()
+    estimator.camera_matrix[:2] *= config.scale
+
+    reader, labels, num_frames = loadDataset(dataset_path, max_frames)
+    latencies = []
+    detections = 0
+    hits = 0
+    false_positives = 0
+    corner_errors = []
+    position_errors = []
+    detector = None
+    selector = None
+
+    for index in range(num_frames):
+        result = reader.read()
+        if result is None:
+            break
+        frame = result[0]
+        if config.scale != 1.0:
+            frame = cv2.resize(frame, None, fx=config.scale, fy=config.scale, interpolation=cv2.INTER_AREA)
+        height, width = frame.shape[:2]
+        if selector is None:
+            selector = TargetSelector([CenterTargetRule(width, height)])
+            # Created once the frame size is known, for the native fit
+            input_shape = HUSTDetector.fitInputShape(width, height) if config.fit == NATIVE else None
+            detector = HUSTDetector(
+                model_path,
+                PROVIDERS[config.provider],
+                options,
+                shared_weights=shared_weights,
+                input_shape=input_shape,
+            )
+            detector.BOUNDING_BOX_CONFIDENCE_THRESHOLD = config.confidence_threshold
+
+        roi = None
+        if config.fit == CROP:
+            size = min(width, height)
+            roi = ((width - size) // 2, (height - size) // 2, size, size)
+
+        start = time.perf_counter_ns()
+        targets = detector.processInput(frame, roi)
+        best = None
+        position = None
+        if len(targets) > 0:
+            best = selector.getBestTarget(targets)
+            corners = np.array([(vertex.x, vertex.y) for vertex in best.rect.vertices])
+            _, _, position = estimator.estimatePosition(best)
+        latencies.append(time.perf_counter_ns() - start)
+
+        detections += len(targets)
+        if labels is None or best is None:
+            continue
+
+        label_corners = labels["corners"][index] * config.scale
+        if isInside(best.getCenter(), label_corners):
+            hits += 1
+            false_positives += len(targets) - 1
+            corner_errors.append(np.linalg.norm(corners - label_corners, axis=1).mean() / config.scale)
+            expected = Point3D.convertFromOpenCVToNormalAxes(Point3D(*labels["translation_vector"][index]))
+            position_errors.append(
+                np.linalg.norm([position.x - expected.x, position.y - expected.y, position.z - expected.z])
+            )
+        else:
+            false_positives += len(targets)
+
+    latencies_ms = np.array(latencies) / 1e6
+    result = {
+        "config": asdict(config),
+        "name": config.name,
+        "frames": len(latencies),
+        "latency_p50_ms": float(np.percentile(latencies_ms, 50)),
+        "latency_p90_ms": float(np.percentile(latencies_ms, 90)),
+        "latency_p99_ms": float(np.percentile(latencies_ms, 99)),
+        "detections_per_frame": detections / max(len(latencies), 1),
+    }
+    if labels is not None:
+        result.update(
+            {
+                "recall": hits / max(len(latencies), 1),
+                "false_positives_per_frame": false_positives / max(len(latencies), 1),
+                # In full resolution pixels, so scales can be compared
+                "corner_error_px": float(np.mean(corner_errors)) if corner_errors else float("inf"),
+                "position_error_median_m": (
+                    float(np.median(position_errors)) if position_errors else float("inf")
+                ),
+                "position_error_p90_m": (
+                    float(np.percentile(position_errors, 90)) if position_errors else float("inf")
+                ),
+            }
+        )
+    return result
+
+
+# Pool.imap only passes a single argument
+def runConfigTask(task: tuple) -> Dict:
+    return runConfig(*task)
+
+
+def findParetoFront(results: List[Dict], cost_key: str, error_key: str) -> List[Dict]:
+    """
+    Returns the results no other result beats on both cost and error, lower is better for both, sorted by cost.
+    A negative error_key (e.g. "-recall") means higher is better.
+    """
+    sign = -1 if error_key.startswith("-") else 1
+    error_key = error_key.lstrip("-")
+
+    front = []
+    best_error = float("inf")
+    for result in sorted(results, key=lambda result: (result[cost_key], sign * result[error_key])):
+        error = sign * result[error_key]
+        if error < best_error:
+            front.append(result)
+            best_error = error
+    return front
@@ -0,0 +1,3 @@
+from .Sweep import SweepConfig, createGrid, findParetoFront, runConfig
+
+__all__ = ["createGrid", "findParetoFront", "runConfig", "SweepConfig"]
@@ -0,0 +1,135 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Runs detect, select and pose over a dataset for every combination of settings and reports which are worth using.
+
+Usage (from src):
+    python -m synthetic --count 500 --output synthetic_scenes/
+    python -m sweep synthetic_scenes/ --thresholds 0.5 0.85 --fits letterbox crop --scales 1.0 0.5 --output sweep.json
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+
+from detector import Detector
+
+from .Sweep import PROVIDERS, createGrid, findParetoFront, runConfigTask
+
+
+def printTable(results, columns, pareto_names):
+    header = f"{'':2}{'configuration':<62}" + "".join(f"{column:>26}" for column in columns)
+    print(header)
+    for result in results:
+        marker = "* " if result["name"] in pareto_names else "  "
+        values = "".join(f"{result[column]:>26.4g}" for column in columns)
+        print(f"{marker}{result['name']:<62}{values}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep settings that trade speed for accuracy")
+    parser.add_argument("dataset", help="Directory from the synthetic module, or any recording")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.85], help="Confidence thresholds")
+    parser.add_argument("--fits", nargs="+", default=["letterbox"], choices=["letterbox", "crop", "native"])
+    parser.add_argument("--scales", type=float, nargs="+", default=[1.0], help="Frame resolution factors")
+    parser.add_argument("--providers", nargs="+", default=["cpu"], choices=list(PROVIDERS))
+    parser.add_argument("--model", default="detector/models/HUST_model.onnx", help="ONNX model to run")
+    parser.add_argument("--calibration", default="example_camera_calibration.json")
+    parser.add_argument("--max-frames", type=int, help="Only use the first frames of the dataset")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Configurations run in parallel")
+    parser.add_argument("--latency", default="latency_p99_ms", help="Latency column the Pareto front uses")
+    parser.add_argument(
+        "--error",
+        default="position_error_median_m",
+        help='Error column the Pareto front uses, prefix with "-" if higher is better, e.g. -recall',
+    )
+    parser.add_argument(
+        "--shared-weights",
+        action="store_true",
+        help="Share one copy of the model weights between the workers, prepacking is off so latency is a bit higher",
+    )
+    parser.add_argument("--output", help="Save every result as JSON")
+    args = parser.parse_args()
+
+    grid = createGrid(args.thresholds, args.fits, args.scales, args.providers)
+    workers = min(args.workers, len(grid))
+    print(f"Running {len(grid)} configurations on {workers} workers")
+    if workers > 1:
+        print("Configurations share the CPU while running, use --workers 1 for the cleanest latency numbers")
+
+    if args.shared_weights:
+        # Write the shared models once up front, instead of every worker racing to write them
+        for provider in args.providers:
+            Detector.createSession(args.model, PROVIDERS[provider], shared_weights=True)
+
+    tasks = [
+        (config, args.dataset, args.model, args.calibration, args.max_frames, args.shared_weights)
+        for config in grid
+    ]
+    context = mp.get_context("spawn")
+    with context.Pool(workers) as pool:
+        results = []
+        for result in pool.imap_unordered(runConfigTask, tasks):
+            results.append(result)
+            status = result.get("error", f"p50 {result.get('latency_p50_ms', 0):.2f} ms")
+            print(f"[{len(results)}/{len(tasks)}] {result['name']}: {status}")
+
+    failed = [result for result in results if "error" in result]
+    results = sorted((result for result in results if "error" not in result), key=lambda r: r[args.latency])
+    if len(results) == 0:
+        print("No configuration could run")
+        return
+
+    labelled = "recall" in results[0]
+    if labelled:
+        columns = [
+            args.latency,
+            "recall",
+            "false_positives_per_frame",
+            "corner_error_px",
+            "position_error_median_m",
+        ]
+        front = findParetoFront(results, args.latency, args.error)
+    else:
+        print("The dataset has no labels, only latency and detection counts are reported")
+        columns = ["latency_p50_ms", "latency_p99_ms", "detections_per_frame"]
+        front = []
+
+    print()
+    printTable(results, columns, {result["name"] for result in front})
+    if labelled:
+        print(
+            f"\n* Pareto front: nothing else is both faster ({args.latency}) and more accurate ({args.error})"
+        )
+    for result in failed:
+        print(f"Skipped {result['name']}: {result['error']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {"results": results, "pareto_front": [r["name"] for r in front], "skipped": failed},
+                f,
+                indent=2,
+            )
+        print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import math
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from detector import HUSTDetector
+from pose_estimator.TargetPositionEstimator import TargetPositionEstimator, loadCameraCalibration
+from util import Point3D
+
+PLATE_WIDTH_M = TargetPositionEstimator.PLATE_WIDTH_M
+PLATE_HEIGHT_M = TargetPositionEstimator.PLATE_HEIGHT_M
+
+# The panel between the light bars, larger than the light bars, in the plate's frame
+PANEL_MARGIN_M = 0.01
+PANEL_HEIGHT_M = 0.12
+LIGHT_BAR_WIDTH_M = 0.008
+
+# Texture the panel is drawn from, in pixels
+PANEL_TEXTURE_SIZE = (256, 228)
+
+# Light bar core and glow colors by HUST color id // 2 (Blue, Red), BGR
+LIGHT_BAR_CORE = [(255, 230, 200), (210, 210, 255)]
+LIGHT_BAR_GLOW = [(255, 120, 0), (0, 40, 255)]
+
+TAG_TEXT = {"Sentry": "S", "Outpost": "O", "Base": "B"}
+
+
+@dataclass
+class SceneConfig:
+    """
+    Ranges poses are drawn from and how much the image is degraded. Angles are in degrees.
+    """
+
+    min_distance_m: float = 1.0
+    max_distance_m: float = 6.0
+    max_yaw: float = 60.0
+    max_pitch: float = 15.0
+    max_roll: float = 5.0
+    # Keep the plate at least this many pixels from the edge of the image
+    edge_margin: int = 20
+
+    # Exposure is a gain applied to the whole image
+    min_exposure: float = 0.6
+    max_exposure: float = 1.4
+    max_gaussian_blur_sigma: float = 1.5
+    max_motion_blur_length: int = 9
+    noise_sigma: float = 4.0
+
+
+@dataclass
+class PlateLabel:
+    """
+    Ground truth of a rendered plate.
+
+    corners: (4, 2) image points in the order of detector targets and TargetPositionEstimator.object_points
+    rotation_vector, translation_vector: Pose of the plate in OpenCV camera axes, as returned by cv2.solvePnP.
+        The translation is of the first corner, same as TargetPositionEstimator.estimatePosition.
+    center: Position of the center of the plate in the normal axes used by the rest of the code, see Point3D.
+    """
+
+    corners: np.ndarray
+    rotation_vector: np.ndarray
+    translation_vector: np.ndarray
+    center: Point3D
+    color_id: int
+    tag_id: int
+
+
+def getRotationMatrix(yaw: float, pitch: float, roll: float) -> np.ndarray:
+    yaw, pitch, roll = math.radians(yaw), math.radians(pitch), math.radians(roll)
+    rotate_x = np.array(
+        [[1, 0, 0], [0, math.cos(pitch), -math.sin(pitch)], [0, math.sin(pitch), math.cos(pitch)]]
+    )
+    rotate_y = np.array([[math.cos(yaw), 0, math.sin(yaw)], [0, 1, 0], [-math.sin(yaw), 0, math.cos(yaw)]])
+    rotate_z = np.array(
+        [[math.cos(roll), -math.sin(roll), 0], [math.sin(roll), math.cos(roll), 0], [0, 0, 1]]
+    )
+    return rotate_z @ rotate_y @ rotate_x
+
+
+def createPanelTexture(tag: str) -> np.ndarray:
+    width, height = PANEL_TEXTURE_SIZE
+    texture = np.full((height, width, 3), 45, dtype=np.uint8)
+
+    # Sticker in the middle with the robot number on it
+    cv2.rectangle(texture, (width // 4, height // 8), (3 * width // 4, 7 * height // 8), (150, 150, 150), -1)
+    text = TAG_TEXT.get(tag, tag)
+    scale = 4.0
+    (text_width, text_height), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, scale, 12)
+    origin = ((width - text_width) // 2, (height + text_height) // 2)
+    cv2.putText(texture, text, origin, cv2.FONT_HERSHEY_SIMPLEX, scale, (20, 20, 20), 12, cv2.LINE_AA)
+    return texture
+
+
+class SceneGenerator:
+    """
+    Renders armor plates at known 3D poses through the calibrated camera model, with exact labels for the corners
+    and pose. Used to measure how much accuracy a faster or cheaper change to the pipeline costs, without a robot.
+
+    The plate is modelled after TargetPositionEstimator: two light bars PLATE_HEIGHT_M tall and PLATE_WIDTH_M apart,
+    with a panel carrying the robot number between them. Everything is projected with cv2.projectPoints using the
+    camera matrix and distortion from the calibration file, so a perfect detector and the estimator should recover
+    the pose up to the degradation added on top (blur, noise, exposure).
+
+    Scenes are drawn from a seeded random generator, the same seed always gives the same scenes.
+
+    args:
+        camera_calibration_file (str): Calibration to render with, also sets the image size.
+        config (SceneConfig): Pose ranges and degradation.
+        backgrounds (List[np.ndarray]): Images to draw backgrounds from, random noise if empty.
+        seed (int): Seed of the random generator.
+    """
+
+    def __init__(
+        self,
+        camera_calibration_file: str,
+        config: SceneConfig = SceneConfig(),
+        backgrounds: Optional[List[np.ndarray]] = None,
+        seed: int = 0,
+    ):
+        self.camera_matrix, self.distortion_coefficients, self.image_size = loadCameraCalibration(
+            camera_calibration_file
+        )
+        self.config = config
+        self.backgrounds = backgrounds or []
+        self.rng = np.random.default_rng(seed)
+
+        # Object points in the plate's frame, same layout as TargetPositionEstimator.object_points
+        self.corner_points = np.array(
+            [(0, 0, 0), (0, PLATE_HEIGHT_M, 0), (PLATE_WIDTH_M, PLATE_HEIGHT_M, 0), (PLATE_WIDTH_M, 0, 0)],
+            dtype=np.float64,
+        )
+        self.plate_center = np.array([PLATE_WIDTH_M / 2, PLATE_HEIGHT_M / 2, 0])
+
+        panel_top = PLATE_HEIGHT_M / 2 - PANEL_HEIGHT_M / 2
+        panel_bottom = PLATE_HEIGHT_M / 2 + PANEL_HEIGHT_M / 2
+        self.panel_points = np.array(
+            [
+                (PANEL_MARGIN_M, panel_top, 0),
+                (PLATE_WIDTH_M - PANEL_MARGIN_M, panel_top, 0),
+                (PLATE_WIDTH_M - PANEL_MARGIN_M, panel_bottom, 0),
+                (PANEL_MARGIN_M, panel_bottom, 0),
+            ]
+        )
+        self.light_bar_points = [
+            np.array(
+                [
+                    (x - LIGHT_BAR_WIDTH_M / 2, 0, 0),
+                    (x + LIGHT_BAR_WIDTH_M / 2, 0, 0),
+                    (x + LIGHT_BAR_WIDTH_M / 2, PLATE_HEIGHT_M, 0),
+                    (x - LIGHT_BAR_WIDTH_M / 2, PLATE_HEIGHT_M, 0),
+                ]
+            )
+            for x in (0, PLATE_WIDTH_M)
+        ]
+        self.textures = {tag: createPanelTexture(tag) for tag in HUSTDetector.tag_to_word}
+
+    def project(self, points: np.ndarray, rotation_vector: np.ndarray, translation_vector: np.ndarray):
+        image_points, _ = cv2.projectPoints(
+            points, rotation_vector, translation_vector, self.camera_matrix, self.distortion_coefficients
+        )
+        return image_points.reshape(-1, 2)
+
+    def samplePose(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Draws a random pose that keeps the whole plate in view, returns (rotation_vector, translation_vector).
+        """
+        config = self.config
+        width, height = self.image_size
+        fx, fy = self.camera_matrix[0, 0], self.camera_matrix[1, 1]
+        cx, cy = self.camera_matrix[0, 2], self.camera_matrix[1, 2]
+
+        while True:
+            distance = self.rng.uniform(config.min_distance_m, config.max_distance_m)
+            u = self.rng.uniform(config.edge_margin, width - config.edge_margin)
+            v = self.rng.uniform(config.edge_margin, height - config.edge_margin)
+            center = np.array([(u - cx) / fx * distance, (v - cy) / fy * distance, distance])
+
+            rotation = getRotationMatrix(
+                self.rng.uniform(-config.max_yaw, config.max_yaw),
+                self.rng.uniform(-config.max_pitch, config.max_pitch),
+                self.rng.uniform(-config.max_roll, config.max_roll),
+            )
+            rotation_vector = cv2.Rodrigues(rotation)[0].flatten()
+            translation_vector = center - rotation @ self.plate_center
+
+            panel = self.project(self.panel_points, rotation_vector, translation_vector)
+            inside = (
+                (panel[:, 0] >= config.edge_margin).all()
+                and (panel[:, 0] < width - config.edge_margin).all()
+                and (panel[:, 1] >= config.edge_margin).all()
+                and (panel[:, 1] < height - config.edge_margin).all()
+            )
+            if inside:
+                return rotation_vector, translation_vector
+
+    def createBackground(self) -> np.ndarray:
+        width, height = self.image_size
+        if len(self.backgrounds) == 0:
+            background = self.rng.normal(40, 20, (height // 8, width // 8, 3)).clip(0, 255).astype(np.uint8)
+            return cv2.resize(background, (width, height), interpolation=cv2.INTER_LINEAR)
+
+        background = self.backgrounds[self.rng.integers(len(self.backgrounds))]
+        return cv2.resize(background, (width, height))
+
+    def drawPlate(self, image, rotation_vector, translation_vector, color: int, tag: str):
+        # Panel texture, the homography ignores lens distortion across the panel, which is tiny at this size
+        panel = self.project(self.panel_points, rotation_vector, translation_vector).astype(np.float32)
+        texture = self.textures[tag]
+        texture_height, texture_width = texture.shape[:2]
+        texture_corners = np.array(
+            [(0, 0), (texture_width, 0), (texture_width, texture_height), (0, texture_height)],
+            dtype=np.float32,
+        )
+        homography = cv2.getPerspectiveTransform(texture_corners, panel)
+
+        x, y, box_width, box_height = cv2.boundingRect(panel)
+        # Pad the box so the light bar glow fits in it too
+        pad = max(box_width, box_height) // 2 + 4
+        x0, y0 = max(x - pad, 0), max(y - pad, 0)
+        x1, y1 = min(x + box_width + pad, image.shape[1]), min(y + box_height + pad, image.shape[0])
+        region = image[y0:y1, x0:x1]
+
+        shift = np.array([[1, 0, -x0], [0, 1, -y0], [0, 0, 1]])
+        size = (x1 - x0, y1 - y0)
+        warped = cv2.warpPerspective(texture, shift @ homography, size)
+        mask = cv2.warpPerspective(np.full(texture.shape[:2], 255, np.uint8), shift @ homography, size)
+        region[mask > 0] = warped[mask > 0]
+
+        # Light bars, a blurred glow with a bright core on top
+        glow = np.zeros_like(region)
+        bars = []
+        for bar_points in self.light_bar_points:
+            bar = self.project(bar_points, rotation_vector, translation_vector) - (x0, y0)
+            bars.append(np.round(bar).astype(np.int32))
+            cv2.fillConvexPoly(glow, bars[-1], LIGHT_BAR_GLOW[color // 2], cv2.LINE_AA)
+
+        bar_width = np.linalg.norm(bars[0][1] - bars[0][0])
+        glow = cv2.GaussianBlur(glow, (0, 0), max(bar_width, 1.0))
+        cv2.add(region, glow, dst=region)
+        cv2.add(region, glow, dst=region)
+        for bar in bars:
+            cv2.fillConvexPoly(region, bar, LIGHT_BAR_CORE[color // 2], cv2.LINE_AA)
+
+    def degrade(self, image: np.ndarray) -> np.ndarray:
+        config = self.config
+
+        motion_length = int(self.rng.integers(1, config.max_motion_blur_length + 1))
+        if motion_length > 1:
+            kernel = np.zeros((motion_length, motion_length), dtype=np.float32)
+            kernel[motion_length // 2, :] = 1.0 / motion_length
+            angle = self.rng.uniform(0, 180)
+            rotation = cv2.getRotationMatrix2D((motion_length / 2 - 0.5, motion_length / 2 - 0.5), angle, 1.0)
+            kernel = cv2.warpAffine(kernel, rotation, (motion_length, motion_length))
+            image = cv2.filter2D(image, -1, kernel / max(kernel.sum(), 1e-6))
+
+        sigma = self.rng.uniform(0, config.max_gaussian_blur_sigma)
+        if sigma > 0.1:
+            image = cv2.GaussianBlur(image, (0, 0), sigma)
+
+        exposure = self.rng.uniform(config.min_exposure, config.max_exposure)
+        image = image.astype(np.float32) * exposure
+        if config.noise_sigma > 0:
+            image += self.rng.normal(0, config.noise_sigma, image.shape).astype(np.float32)
+
+        return image.clip(0, 255).astype(np.uint8)
+
+    def render(self) -> Tuple[np.ndarray, PlateLabel]:
+        """
+        Renders the next random scene, returns the frame and the label of the plate in it.
+        """
+        rotation_vector, translation_vector = self.samplePose()
+        color_id = int(self.rng.choice([0, 2]))
+        tag_id = int(self.rng.integers(len(HUSTDetector.tag_to_word)))
+
+        image = self.createBackground()
+        self.drawPlate(image, rotation_vector, translation_vector, color_id, HUSTDetector.tag_to_word[tag_id])
+        image = self.degrade(image)
+
+        rotation = cv2.Rodrigues(rotation_vector)[0]
+        center = Point3D.convertFromOpenCVToNormalAxes(
+            Point3D(*(rotation @ self.plate_center + translation_vector))
+        )
+        label = PlateLabel(
+            corners=self.project(self.corner_points, rotation_vector, translation_vector).astype(np.float32),
+            rotation_vector=rotation_vector,
+            translation_vector=translation_vector,
+            center=center,
+            color_id=color_id,
+            tag_id=tag_id,
+        )
+        return image, label
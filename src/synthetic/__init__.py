@@ -0,0 +1,3 @@
+from .SceneGenerator import PlateLabel, SceneConfig, SceneGenerator
+
+__all__ = ["PlateLabel", "SceneConfig", "SceneGenerator"]
@@ -0,0 +1,129 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Renders synthetic armor plate scenes with ground truth labels.
+
+Usage (from src):
+    python -m synthetic --count 1000 --output synthetic_scenes/
+Writes frames.frames (replayable with camera.ReplaySource) or numbered PNGs, plus labels.npz with one row per frame.
+"""
+
+import argparse
+import os
+
+import cv2
+import numpy as np
+
+from camera.FrameFile import FrameFileWriter
+from camera.ReplaySource import IMAGE_EXTENSIONS
+
+from .SceneGenerator import SceneConfig, SceneGenerator
+
+# Spacing of the timestamps in raw frame files, so realtime replay runs at 100 fps
+FRAME_INTERVAL_NS = 10_000_000
+
+
+def loadBackgrounds(directory: str):
+    return [
+        cv2.imread(os.path.join(directory, name))
+        for name in sorted(os.listdir(directory))
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Render armor plates at known poses with ground truth labels"
+    )
+    parser.add_argument("--count", type=int, default=1000, help="Number of frames to render")
+    parser.add_argument("--output", required=True, help="Directory to write the frames and labels to")
+    parser.add_argument("--format", choices=["raw", "png"], default="raw", help="How frames are saved")
+    parser.add_argument(
+        "--calibration", default="example_camera_calibration.json", help="Camera to render with"
+    )
+    parser.add_argument("--backgrounds", help="Directory of images to use as backgrounds")
+    parser.add_argument("--seed", type=int, default=0, help="Same seed, same scenes")
+    parser.add_argument("--min-distance", type=float, default=SceneConfig.min_distance_m)
+    parser.add_argument("--max-distance", type=float, default=SceneConfig.max_distance_m)
+    parser.add_argument("--max-yaw", type=float, default=SceneConfig.max_yaw)
+    parser.add_argument(
+        "--exposure", type=float, nargs=2, default=(SceneConfig.min_exposure, SceneConfig.max_exposure)
+    )
+    parser.add_argument(
+        "--blur", type=float, default=SceneConfig.max_gaussian_blur_sigma, help="Max blur sigma"
+    )
+    parser.add_argument(
+        "--motion-blur", type=int, default=SceneConfig.max_motion_blur_length, help="Max length"
+    )
+    parser.add_argument("--noise", type=float, default=SceneConfig.noise_sigma, help="Noise sigma")
+    args = parser.parse_args()
+
+    config = SceneConfig(
+        min_distance_m=args.min_distance,
+        max_distance_m=args.max_distance,
+        max_yaw=args.max_yaw,
+        min_exposure=args.exposure[0],
+        max_exposure=args.exposure[1],
+        max_gaussian_blur_sigma=args.blur,
+        max_motion_blur_length=args.motion_blur,
+        noise_sigma=args.noise,
+    )
+    backgrounds = loadBackgrounds(args.backgrounds) if args.backgrounds else None
+    generator = SceneGenerator(args.calibration, config, backgrounds, args.seed)
+
+    os.makedirs(args.output, exist_ok=True)
+    width, height = generator.image_size
+    writer = None
+    if args.format == "raw":
+        writer = FrameFileWriter(os.path.join(args.output, "frames.frames"), (height, width, 3), args.count)
+
+    labels = {
+        "corners": np.zeros((args.count, 4, 2), dtype=np.float32),
+        "rotation_vector": np.zeros((args.count, 3)),
+        "translation_vector": np.zeros((args.count, 3)),
+        "center": np.zeros((args.count, 3)),
+        "color_id": np.zeros(args.count, dtype=np.int32),
+        "tag_id": np.zeros(args.count, dtype=np.int32),
+    }
+
+    for i in range(args.count):
+        frame, label = generator.render()
+        if writer is not None:
+            writer.write(frame, i + 1, i * FRAME_INTERVAL_NS)
+        else:
+            cv2.imwrite(os.path.join(args.output, f"frame_{i:06d}.png"), frame)
+
+        labels["corners"][i] = label.corners
+        labels["rotation_vector"][i] = label.rotation_vector
+        labels["translation_vector"][i] = label.translation_vector
+        labels["center"][i] = (label.center.x, label.center.y, label.center.z)
+        labels["color_id"][i] = label.color_id
+        labels["tag_id"][i] = label.tag_id
+
+        if (i + 1) % 100 == 0:
+            print(f"Rendered {i + 1}/{args.count}")
+
+    if writer is not None:
+        writer.close()
+    np.savez(os.path.join(args.output, "labels.npz"), **labels)
+    print(f"Saved {args.count} frames and labels to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+from typing import List
+
+from .Histogram import getBucketUpperBound
+from .Metrics import Metrics, MetricsSnapshot
+
+
+class MetricsSink:
+    """
+    Somewhere to send metrics to. export is called from the exporter thread with the cumulative snapshot and the
+    difference since the previous export.
+    """
+
+    def export(self, snapshot: MetricsSnapshot, interval: MetricsSnapshot):
+        pass
+
+
+class ConsoleSink(MetricsSink):
+    """
+    Prints the frame rate and the latency of each stage over the last interval, replaces FrameRateTracker's prints.
+    """
+
+    def export(self, snapshot: MetricsSnapshot, interval: MetricsSnapshot):
+        summary = interval.summarize()
+        seconds = interval.time_ns / 1e9
+
+        frames = interval.counters.get("frames", 0)
+        lines = [f"Processed {frames} camera frames in the last {seconds:.1f} second(s)"]
+        for name, stats in summary["histograms"].items():
+            lines.append(
+                f"  {name:<12} p50 {stats['p50_ms']:7.2f} ms  p99 {stats['p99_ms']:7.2f} ms  max {stats['max_ms']:7.2f} ms"
+            )
+        counters = ", ".join(
+            f"{name}: {value}" for name, value in summary["counters"].items() if name != "frames"
+        )
+        if counters:
+            lines.append(f"  {counters}")
+
+        print("\n".join(lines))
+
+
+class UDPSink(MetricsSink):
+    """
+    Sends a JSON summary of each interval as a UDP datagram, e.g. to a plotting script on a laptop.
+    The socket is non-blocking, if the send can't complete right away the summary is dropped.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 9870):
+        self.address = (host, port)
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setblocking(False)
+
+    def export(self, snapshot: MetricsSnapshot, interval: MetricsSnapshot):
+        summary = interval.summarize()
+        summary["interval_s"] = interval.time_ns / 1e9
+        try:
+            self.socket.sendto(json.dumps(summary).encode(), self.address)
+        except OSError:
+            pass
+
+
+class PrometheusFileSink(MetricsSink):
+    """
+    Writes the cumulative metrics in the Prometheus text format, for node_exporter's textfile collector.
+    The file is replaced atomically so the collector never reads a half written file.
+    """
+
+    def __init__(self, path: str, prefix: str = "huskybot"):
+        self.path = path
+        self.prefix = prefix
+
+    def export(self, snapshot: MetricsSnapshot, interval: MetricsSnapshot):
+        name = f"{self.prefix}_stage_latency_seconds"
+        lines = [f"# TYPE {name} histogram"]
+
+        for stage, buckets in snapshot.histograms.items():
+            cumulative = 0
+            for index, count in enumerate(buckets):
+                if count == 0:
+                    continue
+                cumulative += count
+                upper_bound = getBucketUpperBound(index) / 1e9
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{upper_bound:.9g}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {cumulative}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {snapshot.totals[stage] / 1e9:.9g}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {cumulative}')
+
+        for counter, value in snapshot.counters.items():
+            lines.append(f"# TYPE {self.prefix}_{counter}_total counter")
+            lines.append(f"{self.prefix}_{counter}_total {value}")
+
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(temporary_path, self.path)
+
+
+class MetricsExporter:
+    """
+    Takes a snapshot of the metrics every interval and passes it to each sink, all on a background thread,
+    so nothing is printed or sent from the main loop.
+    """
+
+    def __init__(self, metrics: Metrics, sinks: List[MetricsSink], interval_seconds: float = 1.0):
+        self.metrics = metrics
+        self.sinks = sinks
+        self.interval_seconds = interval_seconds
+
+        self.thread = threading.Thread(target=self.run, name="metrics-exporter", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        previous = self.metrics.snapshot()
+
+        while True:
+            time.sleep(self.interval_seconds)
+
+            snapshot = self.metrics.snapshot()
+            interval = snapshot - previous
+            previous = snapshot
+
+            for sink in self.sinks:
+                try:
+                    sink.export(snapshot, interval)
+                except OSError as e:
+                    print(f"Failed to export metrics to {type(sink).__name__}: {e}")
@@ -0,0 +1,121 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from typing import List
+
+# Each power of two is split into 2^SUB_BUCKET_BITS buckets, 3 bits keeps the error of a bucket under 12.5%
+SUB_BUCKET_BITS = 3
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+# Largest value that gets its own bucket is 2^MAX_BITS ns (about 18 minutes), anything above lands in the last bucket
+MAX_BITS = 40
+NUM_BUCKETS = (MAX_BITS - SUB_BUCKET_BITS + 1) * SUB_BUCKETS
+
+
+def getBucketIndex(value: int) -> int:
+    """
+    Values below 2 * SUB_BUCKETS get a bucket each, above that buckets double in width every SUB_BUCKETS buckets.
+    """
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    if shift > 0:
+        return min(shift * SUB_BUCKETS + (value >> shift), NUM_BUCKETS - 1)
+
+    return max(value, 0)
+
+
+def getBucketLowerBound(index: int) -> int:
+    if index < 2 * SUB_BUCKETS:
+        return index
+
+    shift = index // SUB_BUCKETS - 1
+    return (index - shift * SUB_BUCKETS) << shift
+
+
+def getBucketUpperBound(index: int) -> int:
+    return getBucketLowerBound(index + 1)
+
+
+class LatencyHistogram:
+    """
+    Fixed memory histogram with logarithmic buckets, for recording latencies in nanoseconds.
+
+    Recording is a handful of integer operations on a preallocated list, cheap enough to call for every stage
+    of every frame. Reading (percentiles, snapshots) is expected to happen on another thread, it copies the
+    bucket counts without stopping the writer. A copy may be off by the one sample being recorded at that moment.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.buckets = [0] * NUM_BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value_ns: int):
+        # Same as getBucketIndex, inlined and without min/max calls since this runs for every sample
+        shift = value_ns.bit_length() - SUB_BUCKET_BITS - 1
+        if shift > 0:
+            index = shift * SUB_BUCKETS + (value_ns >> shift)
+            if index >= NUM_BUCKETS:
+                index = NUM_BUCKETS - 1
+        elif value_ns > 0:
+            index = value_ns
+        else:
+            index = 0
+
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += value_ns
+        if value_ns > self.max:
+            self.max = value_ns
+
+
+def getPercentile(buckets: List[int], percentile: float) -> int:
+    """
+    Returns the value at percentile (0 - 100) of a list of bucket counts, as the midpoint of the bucket it lands in.
+    """
+    count = sum(buckets)
+    if count == 0:
+        return 0
+
+    rank = percentile / 100 * count
+    seen = 0
+    for index, bucket_count in enumerate(buckets):
+        seen += bucket_count
+        if seen >= rank and bucket_count > 0:
+            return (getBucketLowerBound(index) + getBucketUpperBound(index)) // 2
+
+    return getBucketLowerBound(len(buckets) - 1)
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    histogram = LatencyHistogram("test")
+    values = [int(random.lognormvariate(15, 0.5)) for _ in range(100000)]
+
+    start = time.perf_counter_ns()
+    for value in values:
+        histogram.record(value)
+    end = time.perf_counter_ns()
+    print(f"Record cost: {(end - start) / len(values):.1f} ns per sample")
+
+    values.sort()
+    for percentile in (50, 90, 99):
+        exact = values[int(percentile / 100 * len(values)) - 1]
+        print(f"p{percentile}: {getPercentile(histogram.buckets, percentile)} (exact {exact})")
@@ -0,0 +1,125 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import time
+from typing import Dict
+
+from .Histogram import LatencyHistogram, getBucketLowerBound, getPercentile
+
+
+class Counter:
+    """
+    A monotonically increasing count, e.g. dropped frames or detections.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.value = 0
+
+    def add(self, amount: int = 1):
+        self.value += amount
+
+
+class Metrics:
+    """
+    A registry of named latency histograms and counters.
+
+    Components grab their histograms and counters once (usually in __init__) and record into them directly,
+    the registry itself is only involved when creating them and when taking snapshots for exporting.
+    """
+
+    def __init__(self):
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.counters: Dict[str, Counter] = {}
+        self.start_time_ns = time.perf_counter_ns()
+
+    def histogram(self, name: str) -> LatencyHistogram:
+        if name not in self.histograms:
+            self.histograms[name] = LatencyHistogram(name)
+        return self.histograms[name]
+
+    def counter(self, name: str) -> Counter:
+        if name not in self.counters:
+            self.counters[name] = Counter(name)
+        return self.counters[name]
+
+    def snapshot(self) -> "MetricsSnapshot":
+        """
+        Copies the current state of every histogram and counter, safe to call from another thread.
+        """
+        histograms = list(self.histograms.items())
+        return MetricsSnapshot(
+            time.perf_counter_ns(),
+            {name: list(histogram.buckets) for name, histogram in histograms},
+            {name: histogram.total for name, histogram in histograms},
+            {name: counter.value for name, counter in list(self.counters.items())},
+        )
+
+
+class MetricsSnapshot:
+    """
+    A point in time copy of the metrics. Subtracting an older snapshot gives the activity in between.
+    """
+
+    def __init__(
+        self, time_ns: int, histograms: Dict[str, list], totals: Dict[str, int], counters: Dict[str, int]
+    ):
+        self.time_ns = time_ns
+        # Bucket counts and the sum of all recorded values (ns) of each histogram
+        self.histograms = histograms
+        self.totals = totals
+        self.counters = counters
+
+    def __sub__(self, older: "MetricsSnapshot") -> "MetricsSnapshot":
+        histograms = {}
+        for name, buckets in self.histograms.items():
+            old_buckets = older.histograms.get(name)
+            histograms[name] = (
+                buckets if old_buckets is None else [a - b for a, b in zip(buckets, old_buckets)]
+            )
+
+        totals = {name: total - older.totals.get(name, 0) for name, total in self.totals.items()}
+        counters = {name: value - older.counters.get(name, 0) for name, value in self.counters.items()}
+        # time_ns of the difference is the length of the interval between the two snapshots
+        return MetricsSnapshot(self.time_ns - older.time_ns, histograms, totals, counters)
+
+    def summarize(self) -> dict:
+        """
+        Returns count, mean, percentiles and max (in milliseconds) for each histogram, and the counter values.
+        """
+        histograms = {}
+        for name, buckets in self.histograms.items():
+            count = sum(buckets)
+            if count == 0:
+                continue
+
+            max_index = max(i for i, c in enumerate(buckets) if c > 0)
+            histograms[name] = {
+                "count": count,
+                "mean_ms": self.totals[name] / count / 1e6,
+                "p50_ms": getPercentile(buckets, 50) / 1e6,
+                "p90_ms": getPercentile(buckets, 90) / 1e6,
+                "p99_ms": getPercentile(buckets, 99) / 1e6,
+                "max_ms": getBucketLowerBound(max_index + 1) / 1e6,
+            }
+
+        return {"histograms": histograms, "counters": dict(self.counters)}
+
+
+# Shared registry for the process, so stages in different modules report to the same place
+metrics = Metrics()
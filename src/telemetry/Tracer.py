@@ -0,0 +1,283 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import collections
+import datetime
+import functools
+import json
+import multiprocessing as mp
+import os
+import signal
+import socket
+import threading
+import time
+
+from .Histogram import LatencyHistogram
+
+# Spans kept per thread, older spans are overwritten once a thread records more than this while tracing
+BUFFER_CAPACITY = 100000
+
+
+class NullSpan:
+    """
+    Returned by Tracer.span while tracing is off, does nothing.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span:
+    __slots__ = ("tracer", "name", "start_ns")
+
+    def __init__(self, tracer: "Tracer", name: str):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *args):
+        self.tracer.addSpan(self.name, self.start_ns, time.perf_counter_ns())
+
+
+def runInBackground():
+    """
+    Moves the calling thread to normal scheduling on any core at a low priority. Threads (and processes) inherit the
+    policy and affinity of the thread that started them, which for the tracer's timer is usually the loop's real time
+    placement (see util.applyPlacement), and at the same real time priority the trace writer would take turns with
+    the loop on its cores.
+    """
+    if hasattr(os, "sched_setscheduler"):
+        try:
+            os.sched_setscheduler(0, os.SCHED_OTHER, os.sched_param(0))
+            os.sched_setaffinity(0, range(os.cpu_count()))
+        except OSError:
+            pass
+    os.nice(10)
+
+
+def writeTrace(path: str, pid: int, buffers: list):
+    """
+    Writes a copy of the tracer's buffers, [(tid, thread_name, spans)], as a Chrome trace JSON file.
+    Runs in its own process, see Tracer.save.
+    """
+    # Also done by Tracer.stop before starting this process, but save can be called from any thread
+    runInBackground()
+
+    events = [{"ph": "M", "name": "process_name", "pid": pid, "args": {"name": f"HuskyBot CV ({pid})"}}]
+    for tid, thread_name, spans in buffers:
+        events.append(
+            {"ph": "M", "name": "thread_name", "pid": pid, "tid": tid, "args": {"name": thread_name}}
+        )
+
+        for kind, name, start_ns, value in spans:
+            if kind == "X":
+                events.append(
+                    {
+                        "ph": "X",
+                        "name": name,
+                        "pid": pid,
+                        "tid": tid,
+                        "ts": start_ns / 1000,
+                        "dur": value / 1000,
+                    }
+                )
+            else:
+                events.append(
+                    {"ph": "C", "name": name, "pid": pid, "ts": start_ns / 1000, "args": {name: value}}
+                )
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    print(f"Trace saved to {path}")
+
+
+class Tracer:
+    """
+    Records what each thread was doing and when, and saves it as a Chrome trace that can be opened in
+    https://ui.perfetto.dev or chrome://tracing to see stalls, overlap between threads and processes, and jitter.
+
+    Tracing is off by default and every recording call starts by checking tracer.enabled, so leaving the
+    instrumentation in the hot path costs a single attribute check. Hot code can also do the check itself:
+
+        if tracer.enabled:
+            tracer.addSpan("inference", start_ns, end_ns)
+
+    Tracing is turned on for a number of seconds with start, by sending the process SIGUSR1 (see listenForSignal)
+    or by sending "trace <seconds>" to the control socket (see startControlSocket). When the time is up, the trace
+    is written to a timestamped JSON file in output_directory.
+
+    Each thread records into its own bounded ring buffer, so threads never wait on each other to record.
+    """
+
+    def __init__(self, output_directory: str = "traces"):
+        self.enabled = False
+        self.output_directory = output_directory
+
+        self.local = threading.local()
+        self.buffers = []
+        self.buffers_lock = threading.Lock()
+        self.stop_timer = None
+
+    def getBuffer(self):
+        buffer = getattr(self.local, "buffer", None)
+        if buffer is None:
+            buffer = collections.deque(maxlen=BUFFER_CAPACITY)
+            self.local.buffer = buffer
+            with self.buffers_lock:
+                self.buffers.append((threading.get_native_id(), threading.current_thread().name, buffer))
+        return buffer
+
+    def addSpan(self, name: str, start_ns: int, end_ns: int):
+        """
+        Records that the current thread spent start_ns to end_ns (time.perf_counter_ns) in name.
+        """
+        if self.enabled:
+            self.getBuffer().append(("X", name, start_ns, end_ns - start_ns))
+
+    def span(self, name: str):
+        """
+        Context manager recording the time spent in the with block as a span.
+        """
+        return Span(self, name) if self.enabled else NULL_SPAN
+
+    def counter(self, name: str, value: float):
+        """
+        Records the value of a counter, shown as a graph above the threads.
+        """
+        if self.enabled:
+            self.getBuffer().append(("C", name, time.perf_counter_ns(), value))
+
+    def traced(self, name: str = None):
+        """
+        Decorator recording every call of a function as a span, a replacement for line_profiler's @profile.
+        """
+
+        def decorator(function):
+            span_name = name or function.__qualname__
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+
+                start_ns = time.perf_counter_ns()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.addSpan(span_name, start_ns, time.perf_counter_ns())
+
+            return wrapper
+
+        return decorator
+
+    def start(self, duration_seconds: float):
+        """
+        Starts tracing, after duration_seconds tracing stops and the trace is saved.
+        Calling start while already tracing extends the current trace instead of starting a new one.
+        """
+        if self.stop_timer is not None:
+            self.stop_timer.cancel()
+        else:
+            with self.buffers_lock:
+                for _, _, buffer in self.buffers:
+                    buffer.clear()
+            print(f"Tracing for {duration_seconds} seconds")
+
+        self.enabled = True
+        self.stop_timer = threading.Timer(duration_seconds, self.stop)
+        self.stop_timer.daemon = True
+        self.stop_timer.start()
+
+    def stop(self):
+        self.enabled = False
+        self.stop_timer = None
+
+        # This is the timer's own thread, so the writer process starts out (and imports) in the background too
+        runInBackground()
+        path = self.save()
+        print(f"Writing trace to {path}")
+
+    def save(self) -> str:
+        """
+        Writes everything in the buffers as a Chrome trace JSON file and returns its path.
+
+        Only a copy of the buffers is taken here. Building and writing the JSON holds the GIL for as long as it takes,
+        which would stall the loop, so it's done by a separate process (see writeTrace) and the file is complete
+        once that exits.
+        """
+        pid = os.getpid()
+        with self.buffers_lock:
+            buffers = [(tid, thread_name, list(buffer)) for tid, thread_name, buffer in self.buffers]
+
+        time_string = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        path = os.path.join(self.output_directory, f"trace_{time_string}_{pid}.json")
+
+        writer = mp.get_context("spawn").Process(
+            target=writeTrace, args=(path, pid, buffers), name="trace-writer"
+        )
+        writer.start()
+        return path
+
+    def listenForSignal(self, duration_seconds: float = 5.0, signal_number: int = signal.SIGUSR1):
+        """
+        Starts tracing for duration_seconds whenever the process receives signal_number, e.g. `kill -USR1 <pid>`.
+        Must be called from the main thread.
+        """
+        signal.signal(signal_number, lambda *_: self.start(duration_seconds))
+
+    def startControlSocket(self, host: str = "127.0.0.1", port: int = 9871):
+        """
+        Listens for "trace <seconds>" on a UDP port, e.g. `echo "trace 5" | nc -u -w0 127.0.0.1 9871`.
+        """
+        control_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        control_socket.bind((host, port))
+
+        def listen():
+            while True:
+                command = control_socket.recv(1024).decode(errors="ignore").split()
+                if len(command) == 2 and command[0] == "trace":
+                    try:
+                        self.start(float(command[1]))
+                    except ValueError:
+                        print(f"Invalid trace duration: {command[1]}")
+
+        threading.Thread(target=listen, name="trace-control", daemon=True).start()
+
+
+# Shared tracer for the process
+tracer = Tracer()
+
+
+def recordStage(histogram: LatencyHistogram, start_ns: int, end_ns: int):
+    """
+    Records a pipeline stage into its latency histogram and, while tracing, as a span named after the histogram.
+    """
+    histogram.record(end_ns - start_ns)
+    if tracer.enabled:
+        tracer.addSpan(histogram.name, start_ns, end_ns)
@@ -0,0 +1,21 @@
+from .Exporters import ConsoleSink, MetricsExporter, MetricsSink, PrometheusFileSink, UDPSink
+from .Histogram import LatencyHistogram, getPercentile
+from .Metrics import Counter, Metrics, MetricsSnapshot, metrics
+from .Tracer import Tracer, recordStage, tracer
+
+__all__ = [
+    "ConsoleSink",
+    "Counter",
+    "getPercentile",
+    "LatencyHistogram",
+    "Metrics",
+    "metrics",
+    "MetricsExporter",
+    "MetricsSink",
+    "MetricsSnapshot",
+    "PrometheusFileSink",
+    "recordStage",
+    "Tracer",
+    "tracer",
+    "UDPSink",
+]
@@ -0,0 +1,191 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import math
+import os
+import socket
+import threading
+from typing import Callable, Dict, Optional
+
+from rules import SelectionRule, TargetSelector
+
+from .TuningConfig import CAMERA_PROPERTIES, TuningConfig
+
+
+def parseNumber(text: str) -> float:
+    # float accepts "nan" and "inf", a single NaN weight would make every target score NaN
+    value = float(text)
+    if not math.isfinite(value):
+        raise ValueError(f"{text} isn't a finite number")
+    return value
+
+
+class LiveTuning:
+    """
+    Lets thresholds, target selection rules, camera settings and the debug flag be changed while the loop runs,
+    by sending text commands to a UDP port, e.g. `echo "set threshold 0.7" | nc -u -w1 127.0.0.1 9872`:
+        show                              reply with the current settings
+        set threshold <value>             minimum detection confidence
+        set debug on|off                  debug printing and stream
+        rule add <name> [weight]          add a rule from rule_factories, weight 1 by default
+        rule remove <name>
+        rule weight <name> <weight>
+        camera <property> <value>         see CAMERA_PROPERTIES
+        model load <path>                 switch to another model file, checked before it's used (Detector.loadModel)
+    Every command is answered with the new settings, or an error.
+
+    Commands are handled on a background thread, which builds a new TuningConfig (including the TargetSelector)
+    and replaces self.config with it. Replacing a reference is atomic, so the loop only has to read self.config once
+    per frame and check whether it changed, there are no locks on the loop. Changes that must happen on the loop's
+    thread, like camera properties, are applied by the loop, see applyCamera.
+
+    args:
+        rule_factories (Dict[str, Callable[[], SelectionRule]]): Creates each rule that can be added, by name.
+        config (TuningConfig): The starting settings, can also be set later with setConfig (e.g. once the camera
+            the rules need exists), commands are refused until then.
+    """
+
+    def __init__(
+        self, rule_factories: Dict[str, Callable[[], SelectionRule]], config: Optional[TuningConfig] = None
+    ):
+        self.rule_factories = rule_factories
+        self.rule_instances = {}
+        self.applied_camera = {}
+        # Commands are handled one at a time, this only guards against two control threads, never the loop
+        self.update_lock = threading.Lock()
+        self.config = None
+        if config is not None:
+            self.setConfig(config)
+
+    def setConfig(self, config: TuningConfig):
+        """
+        Replaces the settings with config, building its TargetSelector.
+        """
+        with self.update_lock:
+            self.config = config.update(selector=self.createSelector(config.rules))
+
+    def createSelector(self, rules) -> TargetSelector:
+        # Rules are reused between versions, so a rule keeping state across frames doesn't lose it on every change
+        for name, _ in rules:
+            if name not in self.rule_instances:
+                self.rule_instances[name] = self.rule_factories[name]()
+
+        return TargetSelector(
+            [self.rule_instances[name] for name, _ in rules], [weight for _, weight in rules]
+        )
+
+    def handleCommand(self, text: str) -> str:
+        """
+        Applies a command and returns the reply, see the class docs for the commands.
+        """
+        command = text.split()
+        with self.update_lock:
+            if self.config is None:
+                return "error: still starting up"
+            try:
+                changes = self.parseCommand(command)
+                changes = {
+                    name: value for name, value in changes.items() if getattr(self.config, name) != value
+                }
+            except (ValueError, KeyError, IndexError) as e:
+                return f"error: {e or 'invalid command'} ({text.strip()})"
+
+            if changes:
+                if "rules" in changes:
+                    changes["selector"] = self.createSelector(changes["rules"])
+                self.config = self.config.update(**changes)
+                print(f"Tuning changed: {self.config}")
+
+            return str(self.config)
+
+    def parseCommand(self, command) -> dict:
+        config = self.config
+        rules = dict(config.rules)
+
+        match command:
+            case ["show"]:
+                return {}
+            case ["set", "threshold", value]:
+                threshold = float(value)
+                if not 0 <= threshold <= 1:
+                    raise ValueError("threshold must be between 0 and 1")
+                return {"confidence_threshold": threshold}
+            case ["set", "debug", ("on" | "off") as value]:
+                return {"debug": value == "on"}
+            case ["rule", "add", name, *weight] if len(weight) <= 1:
+                if name not in self.rule_factories:
+                    raise ValueError(f"unknown rule {name}, known rules: {', '.join(self.rule_factories)}")
+                if name in rules:
+                    raise ValueError(f"rule {name} is already used")
+                return {"rules": config.rules + ((name, parseNumber(weight[0]) if weight else 1.0),)}
+            case ["rule", "remove", name]:
+                if name not in rules:
+                    raise ValueError(f"rule {name} isn't used")
+                return {"rules": tuple(rule for rule in config.rules if rule[0] != name)}
+            case ["rule", "weight", name, weight]:
+                if name not in rules:
+                    raise ValueError(f"rule {name} isn't used")
+                weight = parseNumber(weight)
+                return {"rules": tuple((n, weight if n == name else w) for n, w in config.rules)}
+            case ["model", "load", path]:
+                if not os.path.isfile(path):
+                    raise ValueError(f"{path} doesn't exist")
+                return {"model_path": path}
+            case ["camera", name, value]:
+                if name not in CAMERA_PROPERTIES:
+                    raise ValueError(f"unknown camera property {name}, known: {', '.join(CAMERA_PROPERTIES)}")
+                return {"camera": {**config.camera, name: parseNumber(value)}}
+
+        raise ValueError("unknown command")
+
+    def applyCamera(self, camera, config: TuningConfig):
+        """
+        Sets the camera properties that changed since the last call, must be called from the thread using the camera.
+        """
+        for name, value in config.camera.items():
+            if self.applied_camera.get(name) == value:
+                continue
+
+            self.applied_camera[name] = value
+            # Sources that aren't real cameras (replays) have no properties to set
+            if not hasattr(camera, "set") or not camera.set(CAMERA_PROPERTIES[name], value):
+                print(f"Camera property {name} couldn't be set to {value:g}")
+
+    def reapplyCamera(self, camera):
+        """
+        Sets every tuned camera property again, for after the camera's own config was reapplied (a mode switch or
+        reconnect, see Camera.addConfigListener), which reverts them.
+        """
+        self.applied_camera = {}
+        if self.config is not None:
+            self.applyCamera(camera, self.config)
+
+    def startControlSocket(self, host: str = "127.0.0.1", port: int = 9872):
+        """
+        Listens for commands on a UDP port and replies to the sender.
+        """
+        control_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        control_socket.bind((host, port))
+
+        def listen():
+            while True:
+                data, address = control_socket.recvfrom(1024)
+                reply = self.handleCommand(data.decode(errors="ignore"))
+                control_socket.sendto(reply.encode() + b"\n", address)
+
+        threading.Thread(target=listen, name="tuning-control", daemon=True).start()
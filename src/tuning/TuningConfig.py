@@ -0,0 +1,73 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from dataclasses import dataclass, field, replace
+from typing import Dict, Tuple
+
+import cv2
+
+from rules import TargetSelector
+
+# Camera properties that can be changed while running, by the names used in CameraConfig
+CAMERA_PROPERTIES = {
+    "auto_exposure": cv2.CAP_PROP_AUTO_EXPOSURE,
+    "exposure": cv2.CAP_PROP_EXPOSURE,
+    "saturation": cv2.CAP_PROP_SATURATION,
+    "auto_white_balance": cv2.CAP_PROP_AUTO_WB,
+    "white_balance": cv2.CAP_PROP_WB_TEMPERATURE,
+    "gain": cv2.CAP_PROP_GAIN,
+}
+
+
+@dataclass(frozen=True)
+class TuningConfig:
+    """
+    One version of the settings that can be tuned while running. Never modified once created, every change makes
+    a new TuningConfig with a higher version, so the loop can hold on to one for a whole frame without locking.
+
+    args:
+        version (int): Increased by every change.
+        confidence_threshold (float): Minimum confidence of a detection, see HUSTDetector.
+        debug (bool): Whether debug printing and the debug stream are on.
+        rules (Tuple[Tuple[str, float], ...]): (rule name, weight) of each target selection rule, in order.
+        camera (Dict[str, float]): Camera properties that were changed, by name in CAMERA_PROPERTIES.
+        model_path (str): Model the detector should run, a change is loaded in the background, see Detector.loadModel.
+        selector (TargetSelector): Selector built from rules, ready for the loop to use.
+    """
+
+    version: int = 0
+    confidence_threshold: float = 0.85
+    debug: bool = False
+    rules: Tuple[Tuple[str, float], ...] = ()
+    camera: Dict[str, float] = field(default_factory=dict)
+    model_path: str = ""
+    selector: TargetSelector = field(default=None, compare=False, repr=False)
+
+    def update(self, **changes) -> "TuningConfig":
+        """
+        Returns a copy with changes applied and the version increased.
+        """
+        return replace(self, version=self.version + 1, **changes)
+
+    def __str__(self):
+        rules = ", ".join(f"{name} x{weight:g}" for name, weight in self.rules) or "none"
+        camera = ", ".join(f"{name}={value:g}" for name, value in self.camera.items()) or "unchanged"
+        return (
+            f"v{self.version} confidence_threshold={self.confidence_threshold:g} debug={'on' if self.debug else 'off'} "
+            f"rules: {rules} camera: {camera} model: {self.model_path or 'unchanged'}"
+        )
@@ -0,0 +1,8 @@
+from .LiveTuning import LiveTuning
+from .TuningConfig import CAMERA_PROPERTIES, TuningConfig
+
+__all__ = [
+    "CAMERA_PROPERTIES",
+    "LiveTuning",
+    "TuningConfig",
+]
@@ -0,0 +1,167 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import time
+from enum import IntEnum
+
+from telemetry import metrics, recordStage
+
+
+class QualityLevel(IntEnum):
+    """
+    Levels of work the main loop can shed when it runs over its deadline, in the order they are shed.
+    """
+
+    # Everything enabled
+    FULL = 0
+    # Skip optional work like debug prints and drawing
+    NO_DEBUG = 1
+    # Run the detector on a region around the last target instead of the full frame
+    REDUCED_INPUT = 2
+    # Only process some frames, the rest are grabbed and thrown away to keep the camera buffer fresh
+    SKIP_FRAMES = 3
+
+
+class DeadlineScheduler:
+    """
+    Keeps the main loop within a per frame latency budget by stepping quality down when frames run over
+    and back up when there's headroom again. Stage latencies are also recorded into the telemetry histograms
+    and, while tracing, as spans.
+
+    Frame latency is measured from when the frame was captured until endFrame is called. A smoothed latency is
+    compared against the deadline: after down_frames over budget frames in a row the level steps down,
+    after up_frames frames in a row below headroom * deadline it steps back up. The gap between the two
+    thresholds, along with the much longer wait to step up, keeps the level from flipping back and forth.
+
+    args:
+        deadline_ms (float): Latency budget from capture to the end of the frame, in milliseconds.
+        headroom (float): Fraction of the deadline the latency has to stay under before stepping back up.
+        down_frames (int): Consecutive over budget frames before stepping down.
+        up_frames (int): Consecutive frames with headroom before stepping up.
+        skip_interval (int): At SKIP_FRAMES, only 1 in skip_interval frames is processed.
+        smoothing (float): Weight of the newest frame in the smoothed latencies (0 - 1).
+    """
+
+    def __init__(
+        self,
+        deadline_ms: float,
+        headroom: float = 0.7,
+        down_frames: int = 3,
+        up_frames: int = 60,
+        skip_interval: int = 2,
+        smoothing: float = 0.2,
+    ):
+        self.deadline_ns = int(deadline_ms * 1e6)
+        self.headroom_ns = int(self.deadline_ns * headroom)
+        self.down_frames = down_frames
+        self.up_frames = up_frames
+        self.skip_interval = skip_interval
+        self.smoothing = smoothing
+
+        self.level = QualityLevel.FULL
+        self.frame_histogram = metrics.histogram("frame")
+        self.frame_latency_ns = 0.0
+        self.last_frame_latency_ns = 0
+        self.stage_latency_ns = {}
+        self.stage_histograms = {}
+
+        self.over_count = 0
+        self.under_count = 0
+        self.frame_count = 0
+        self.frame_start_ns = 0
+        self.last_mark_ns = 0
+
+    @property
+    def run_debug(self) -> bool:
+        return self.level < QualityLevel.NO_DEBUG
+
+    @property
+    def use_reduced_input(self) -> bool:
+        return self.level >= QualityLevel.REDUCED_INPUT
+
+    @property
+    def slack_ns(self) -> int:
+        """
+        Time the last frame had left of its deadline when endFrame was called, negative if it ran over.
+        """
+        return self.deadline_ns - self.last_frame_latency_ns
+
+    def shouldSkipFrame(self) -> bool:
+        """
+        Call once per camera frame, before retrieving it. Returns True if this frame should be dropped.
+        """
+        self.frame_count += 1
+        return self.level >= QualityLevel.SKIP_FRAMES and self.frame_count % self.skip_interval != 0
+
+    def startFrame(self, capture_time_ns: int):
+        """
+        Marks the start of a frame, capture_time_ns is the time.perf_counter_ns timestamp of the frame.
+        """
+        self.frame_start_ns = capture_time_ns
+        self.last_mark_ns = time.perf_counter_ns()
+
+    def endStage(self, name: str):
+        """
+        Records the time since the previous stage ended (or the frame started) as the latency of stage name.
+        """
+        now = time.perf_counter_ns()
+        elapsed = now - self.last_mark_ns
+
+        previous = self.stage_latency_ns.get(name, elapsed)
+        self.stage_latency_ns[name] = previous + self.smoothing * (elapsed - previous)
+
+        histogram = self.stage_histograms.get(name)
+        if histogram is None:
+            histogram = self.stage_histograms[name] = metrics.histogram(name)
+        recordStage(histogram, self.last_mark_ns, now)
+        self.last_mark_ns = now
+
+    def endFrame(self):
+        now = time.perf_counter_ns()
+        latency = now - self.frame_start_ns
+        self.last_frame_latency_ns = latency
+        recordStage(self.frame_histogram, self.frame_start_ns, now)
+        self.frame_latency_ns += self.smoothing * (latency - self.frame_latency_ns)
+
+        if self.frame_latency_ns > self.deadline_ns:
+            self.over_count += 1
+            self.under_count = 0
+        elif self.frame_latency_ns < self.headroom_ns:
+            self.under_count += 1
+            self.over_count = 0
+        else:
+            self.over_count = 0
+            self.under_count = 0
+
+        if self.over_count >= self.down_frames and self.level < QualityLevel.SKIP_FRAMES:
+            self.setLevel(QualityLevel(self.level + 1))
+        elif self.under_count >= self.up_frames and self.level > QualityLevel.FULL:
+            self.setLevel(QualityLevel(self.level - 1))
+
+    def setLevel(self, level: QualityLevel):
+        stages = ", ".join(
+            f"{name}: {latency / 1e6:.2f} ms" for name, latency in self.stage_latency_ns.items()
+        )
+        print(
+            f"Quality {self.level.name} -> {level.name}, latency {self.frame_latency_ns / 1e6:.2f} ms "
+            f"(deadline {self.deadline_ns / 1e6:.2f} ms) {stages}"
+        )
+
+        self.level = level
+        self.over_count = 0
+        self.under_count = 0
@@ -0,0 +1,156 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+import cv2
+
+from detector import Target
+from telemetry import metrics, tracer
+
+from .ImageLabeller import putTextOnImage
+
+BOUNDARY = "frame"
+
+INDEX_PAGE = b"""<html>
+<head><title>HuskyBot CV</title></head>
+<body style="margin: 0; background: black"><img src="/stream" style="width: 100%"></body>
+</html>"""
+
+
+class DebugStreamer:
+    """
+    Serves the camera feed with detections drawn on top as an MJPEG stream over HTTP, viewable in any browser at
+    http://<coprocessor ip>:<port>/
+
+    All the expensive work (copying the frame, drawing, JPEG encoding, networking) happens on a background thread.
+    The main loop only hands over a reference to the frame and its targets through a single slot channel:
+    if the background thread is still busy with the previous frame, or the frame comes in faster than max_fps,
+    the new frame is just dropped. Publishing never waits on anything.
+
+    args:
+        host (str): Address to serve on, "0.0.0.0" to allow viewing from other computers on the network.
+        port (int): Port to serve on.
+        max_fps (float): Maximum rate frames are drawn and sent at.
+        jpeg_quality (int): JPEG quality (0 - 100), lower is cheaper to encode and send.
+    """
+
+    def __init__(
+        self, host: str = "0.0.0.0", port: int = 8080, max_fps: float = 15.0, jpeg_quality: int = 70
+    ):
+        self.min_interval_ns = int(1e9 / max_fps)
+        self.encode_params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
+
+        self.pending = queue.Queue(maxsize=1)
+        self.last_published_ns = 0
+        self.dropped = metrics.counter("debug_frames_dropped")
+
+        self.jpeg = None
+        self.jpeg_count = 0
+        self.new_jpeg = threading.Condition()
+
+        self.server = ThreadingHTTPServer((host, port), self.createHandler())
+        self.server.daemon_threads = True
+
+        threading.Thread(target=self.server.serve_forever, name="debug-http", daemon=True).start()
+        threading.Thread(target=self.drawLoop, name="debug-draw", daemon=True).start()
+
+        print(f"Debug stream available at http://{host}:{port}/")
+
+    def publish(self, frame, targets: List[Target]):
+        """
+        Offers a frame to the stream. The frame must not be modified afterwards, it is drawn on a copy.
+        """
+        now = time.perf_counter_ns()
+        if now - self.last_published_ns < self.min_interval_ns:
+            return
+
+        try:
+            self.pending.put_nowait((frame, targets))
+            self.last_published_ns = now
+        except queue.Full:
+            self.dropped.add()
+
+    def drawLoop(self):
+        while True:
+            frame, targets = self.pending.get()
+
+            with tracer.span("debug draw"):
+                image = putTextOnImage(frame.copy(), targets)
+                success, jpeg = cv2.imencode(".jpg", image, self.encode_params)
+            if not success:
+                continue
+
+            with self.new_jpeg:
+                self.jpeg = jpeg.tobytes()
+                self.jpeg_count += 1
+                self.new_jpeg.notify_all()
+
+    def waitForJpeg(self, last_count: int):
+        with self.new_jpeg:
+            self.new_jpeg.wait_for(lambda: self.jpeg_count != last_count, timeout=1.0)
+            return self.jpeg_count, self.jpeg
+
+    def createHandler(self):
+        streamer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/":
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/html")
+                    self.send_header("Content-Length", str(len(INDEX_PAGE)))
+                    self.end_headers()
+                    self.wfile.write(INDEX_PAGE)
+                elif self.path == "/stream":
+                    self.sendStream()
+                else:
+                    self.send_error(404)
+
+            def sendStream(self):
+                self.send_response(200)
+                self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+
+                count = 0
+                try:
+                    while True:
+                        new_count, jpeg = streamer.waitForJpeg(count)
+                        if new_count == count or jpeg is None:
+                            continue
+                        count = new_count
+
+                        self.wfile.write(f"--{BOUNDARY}\r\n".encode())
+                        self.wfile.write(b"Content-Type: image/jpeg\r\n")
+                        self.wfile.write(f"Content-Length: {len(jpeg)}\r\n\r\n".encode())
+                        self.wfile.write(jpeg)
+                        self.wfile.write(b"\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    # Viewer closed the page
+                    pass
+
+            def log_message(self, format, *args):
+                # Don't print every request
+                pass
+
+        return Handler
@@ -0,0 +1,139 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import gc
+import time
+
+from telemetry import metrics, recordStage
+
+# Modes
+DEFAULT = "default"
+TUNED = "tuned"
+MANUAL = "manual"
+MODES = (DEFAULT, TUNED, MANUAL)
+
+
+class GCController:
+    """
+    Keeps Python's cyclic garbage collector from pausing the main loop at random.
+
+    The loop allocates lots of short lived objects every frame (Point2D, Target, numpy temporaries, message bytes),
+    so with the default settings a collection can start in the middle of any frame and cost a few milliseconds.
+    Once warmup_frames frames have run, everything allocated so far (models, camera, modules) is moved out of the
+    collector's reach with gc.freeze, and then depending on mode:
+        default: nothing else changes.
+        tuned: the youngest generation is collected far less often, so collections are rarer but cost about the same.
+        manual: automatic collection is turned off, and endFrame collects only when a frame finished with at least
+            min_slack_ms to spare. Older generations are included as often as Python would include them, so the
+            occasional full collection only walks what was allocated since the freeze. If garbage keeps piling up
+            because there is never any slack, a collection is forced once it passes force_threshold objects, so
+            memory stays bounded.
+
+    Every collection, automatic or not, is timed into the "gc_pause" histogram, compare its p99 between modes.
+
+    args:
+        mode (str): "default", "tuned" or "manual".
+        warmup_frames (int): Frames to run before freezing.
+        min_slack_ms (float): Manual mode, time that has to be left in the frame budget before collecting.
+        young_threshold (int): Tuned and manual modes, allocations before the youngest generation is collected.
+        force_threshold (int): Manual mode, allocations after which a collection happens even without slack.
+    """
+
+    def __init__(
+        self,
+        mode: str = MANUAL,
+        warmup_frames: int = 100,
+        min_slack_ms: float = 2.0,
+        young_threshold: int = 10000,
+        force_threshold: int = 100000,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown GC mode {mode}, expected one of {MODES}")
+
+        self.mode = mode
+        self.warmup_frames = warmup_frames
+        self.min_slack_ns = int(min_slack_ms * 1e6)
+        self.young_threshold = young_threshold
+        self.force_threshold = force_threshold
+
+        self.frame_count = 0
+        self.active = False
+        self.collection_start_ns = 0
+        self.pause_histogram = metrics.histogram("gc_pause")
+        self.collection_counter = metrics.counter("gc_collections")
+        self.forced_counter = metrics.counter("gc_forced_collections")
+
+        gc.callbacks.append(self.onCollection)
+
+    def onCollection(self, phase: str, info: dict):
+        if phase == "start":
+            self.collection_start_ns = time.perf_counter_ns()
+        else:
+            recordStage(self.pause_histogram, self.collection_start_ns, time.perf_counter_ns())
+            self.collection_counter.add()
+
+    def start(self):
+        """
+        Freezes everything allocated so far and applies the mode. Called by endFrame after the warmup frames.
+        """
+        self.active = True
+        gc.collect()
+        gc.freeze()
+
+        if self.mode == TUNED:
+            _, older, oldest = gc.get_threshold()
+            gc.set_threshold(self.young_threshold, older, oldest)
+        elif self.mode == MANUAL:
+            gc.disable()
+
+        print(f"GC {self.mode} mode, {gc.get_freeze_count()} objects frozen")
+
+    def endFrame(self, slack_ns: int):
+        """
+        Call once the frame's work is done with the time left in its budget.
+        """
+        if not self.active:
+            self.frame_count += 1
+            if self.frame_count >= self.warmup_frames:
+                self.start()
+            return
+
+        if self.mode != MANUAL:
+            return
+
+        # The older generations are collected as often as they normally would be, relative to the one below them,
+        # so cyclic garbage that survived into the oldest generation is still reclaimed
+        young, middle, oldest = gc.get_count()
+        _, middle_threshold, oldest_threshold = gc.get_threshold()
+        if oldest >= oldest_threshold:
+            generation = 2
+        elif middle >= middle_threshold:
+            generation = 1
+        else:
+            generation = 0
+
+        if young >= self.force_threshold:
+            self.forced_counter.add()
+            gc.collect(max(generation, 1))
+        elif young >= self.young_threshold and slack_ns >= self.min_slack_ns:
+            gc.collect(generation)
+
+    def stop(self):
+        gc.enable()
+        gc.unfreeze()
+        gc.callbacks.remove(self.onCollection)
@@ -0,0 +1,126 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+from dataclasses import dataclass
+from typing import List, Optional
+
+import onnxruntime as ort
+
+# Scheduling policies
+NORMAL = "normal"
+FIFO = "fifo"
+ROUND_ROBIN = "rr"
+
+
+@dataclass
+class PlacementProfile:
+    """
+    Where a pipeline thread or process runs and at what priority.
+
+    cores: Cores to pin to, None to let it move between all cores.
+    policy: "normal", or "fifo" / "rr" to run under the SCHED_FIFO / SCHED_RR real time policies, which always
+        run before normal threads on the same core. Needs root or CAP_SYS_NICE, falls back to normal otherwise.
+    priority: Real time priority (1 - 99).
+    """
+
+    cores: Optional[List[int]] = None
+    policy: str = NORMAL
+    priority: int = 50
+
+    @property
+    def is_real_time(self) -> bool:
+        return self.policy in (FIFO, ROUND_ROBIN)
+
+
+# What applyPlacement actually did, for checking at startup
+placement_report: List[str] = []
+
+
+def applyPlacement(name: str, profile: Optional[PlacementProfile]) -> str:
+    """
+    Applies profile to the calling thread and returns (and prints) a line saying what was applied.
+
+    On Linux, affinity and scheduling policy are per thread and inherited by threads created afterwards,
+    including ONNXRuntime's thread pool, so apply the profile before creating anything that starts threads.
+    """
+    if profile is None:
+        return reportPlacement(name, "not configured, left to the OS")
+    if not hasattr(os, "sched_setaffinity"):
+        return reportPlacement(name, "CPU placement isn't supported on this OS")
+
+    parts = []
+    all_cores = list(range(os.cpu_count()))
+    if profile.cores is None:
+        # Undo any pinning inherited from the thread that created this one
+        try:
+            os.sched_setaffinity(0, all_cores)
+        except OSError:
+            pass
+        parts.append(f"not pinned, cores {sorted(os.sched_getaffinity(0))}")
+    else:
+        cores = [core for core in profile.cores if core in all_cores]
+        missing = sorted(set(profile.cores) - set(cores))
+        if len(cores) == 0:
+            parts.append(f"none of cores {profile.cores} exist, not pinned")
+        else:
+            try:
+                os.sched_setaffinity(0, cores)
+                parts.append(f"cores {sorted(os.sched_getaffinity(0))}")
+            except OSError as e:
+                parts.append(f"pinning to {cores} failed ({e}), not pinned")
+            if missing:
+                parts.append(f"cores {missing} don't exist")
+
+    if profile.is_real_time:
+        policy = os.SCHED_FIFO if profile.policy == FIFO else os.SCHED_RR
+        policy_name = "SCHED_FIFO" if profile.policy == FIFO else "SCHED_RR"
+        try:
+            os.sched_setscheduler(0, policy, os.sched_param(profile.priority))
+            parts.append(f"{policy_name} priority {profile.priority}")
+        except (PermissionError, OSError) as e:
+            parts.append(f"{policy_name} not permitted ({e.strerror}), kept SCHED_OTHER")
+    else:
+        parts.append("SCHED_OTHER")
+
+    return reportPlacement(name, ", ".join(parts))
+
+
+def reportPlacement(name: str, description: str) -> str:
+    line = f"Placement {name} (pid {os.getpid()}): {description}"
+    placement_report.append(line)
+    print(line)
+    return line
+
+
+def createSessionOptions(profile: Optional[PlacementProfile]) -> ort.SessionOptions:
+    """
+    ONNXRuntime session options sized to the cores of profile: one intra-op thread per core, counting the
+    thread that calls run. The pool inherits the affinity of the thread creating the session.
+    """
+    options = ort.SessionOptions()
+    if profile is None:
+        return options
+
+    if profile.cores is not None:
+        options.intra_op_num_threads = max(len(profile.cores), 1)
+        options.inter_op_num_threads = 1
+    if profile.is_real_time:
+        # Spinning real time threads would starve everything else on their cores while waiting for work
+        options.add_session_config_entry("session.intra_op.allow_spinning", "0")
+    return options
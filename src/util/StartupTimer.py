@@ -0,0 +1,94 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import threading
+import time
+
+
+def getProcessAgeNs() -> int:
+    """
+    Time since this process was started, from /proc on Linux. 0 where that isn't available.
+    """
+    try:
+        with open("/proc/self/stat") as f:
+            # The command name can contain spaces, the fields after it are fixed
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        start_time = int(fields[19]) / os.sysconf("SC_CLK_TCK")
+        return max(int((uptime - start_time) * 1e9), 0)
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class StartupTimer:
+    """
+    Times each phase of startup relative to when the process started, to see where the time goes between
+    power on and the first message sent to the MCB. Phases can run concurrently and be timed from any thread.
+
+    Create it as early as possible, anything before that (interpreter startup, imports above it) only shows up
+    in the first phase.
+    """
+
+    def __init__(self):
+        self.start_ns = time.perf_counter_ns() - getProcessAgeNs()
+        self.last_mark_ns = self.start_ns
+        # (name, start_ns, end_ns)
+        self.phases = []
+        self.lock = threading.Lock()
+        self.done = False
+
+    def mark(self, name: str):
+        """
+        Records a phase from the previous mark (or process start) until now, for things that run one after another.
+        """
+        now = time.perf_counter_ns()
+        with self.lock:
+            self.phases.append((name, self.last_mark_ns, now))
+            self.last_mark_ns = now
+
+    def run(self, name: str, function, *args, **kwargs):
+        """
+        Calls function and records how long it took as a phase, for things that run concurrently.
+        """
+        start = time.perf_counter_ns()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            with self.lock:
+                self.phases.append((name, start, time.perf_counter_ns()))
+
+    def finish(self, name: str):
+        """
+        Marks the last phase and prints the report, only the first call does anything.
+        """
+        if self.done:
+            return
+        self.done = True
+        self.mark(name)
+        print(self.getReport())
+
+    def getReport(self) -> str:
+        lines = ["Startup (ms since process start):"]
+        for name, start, end in sorted(self.phases, key=lambda phase: phase[1]):
+            lines.append(
+                f"  {name:<24} {(start - self.start_ns) / 1e6:9.1f} -> {(end - self.start_ns) / 1e6:9.1f}"
+                f"  ({(end - start) / 1e6:8.1f})"
+            )
+        return "\n".join(lines)
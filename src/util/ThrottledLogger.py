@@ -0,0 +1,51 @@
+"""
+This file is part of HuskyBot CV.
+Copyright (C) 2025 Advanced Robotics at the University of Washington <robomstr@uw.edu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import time
+
+
+class ThrottledLogger:
+    """
+    Prints messages at most once per interval for each key, so logging from the main loop doesn't cost a print every frame.
+    Values are only converted to strings when they are actually printed.
+    """
+
+    def __init__(self, interval_seconds: float = 1.0):
+        self.interval_ns = int(interval_seconds * 1e9)
+        self.last_logged_ns = {}
+        self.suppressed = {}
+
+    def log(self, key: str, *values, sep: str = " "):
+        now = time.perf_counter_ns()
+        if now - self.last_logged_ns.get(key, -self.interval_ns) < self.interval_ns:
+            self.suppressed[key] = self.suppressed.get(key, 0) + 1
+            return
+
+        suppressed = self.suppressed.pop(key, 0)
+        if suppressed > 0:
+            values = (*values, f"({suppressed} similar messages suppressed)")
+
+        self.last_logged_ns[key] = now
+        print(*values, sep=sep)
+
+
+if __name__ == "__main__":
+    logger = ThrottledLogger(0.5)
+
+    for i in range(1000000):
+        logger.log("counter", "Counter at", i)
@@ -1,11 +1,22 @@
+from .DeadlineScheduler import DeadlineScheduler, QualityLevel
 from .FrameRateTracker import FrameRateTracker
+from .GCController import GCController
 from .Geometry import Point2D, Point3D, Rectangle
 from .ImageLabeller import putTextOnImage
+from .Placement import PlacementProfile, applyPlacement, createSessionOptions
+from .ThrottledLogger import ThrottledLogger
 
 __all__ = [
+    "DeadlineScheduler",
+    "QualityLevel",
     "FrameRateTracker",
+    "GCController",
     "putTextOnImage",
+    "PlacementProfile",
+    "applyPlacement",
+    "createSessionOptions",
     "Point2D",
     "Point3D",
     "Rectangle",
+    "ThrottledLogger",
 ]